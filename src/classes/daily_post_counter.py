@@ -0,0 +1,51 @@
+import datetime
+from datetime import timezone
+
+
+class DailyPostCounter:
+    """
+    Number of Hall of Fame posts each guild made on the current UTC day, and whether the guild was already warned
+    that it reached the daily limit. The counts are loaded once at startup and kept up to date as posts are made,
+    so checking the daily limit needs no database query. Everything is reset when the UTC day changes.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DailyPostCounter, cls).__new__(cls)
+            cls._instance.day = datetime.datetime.now(timezone.utc).date()
+            cls._instance.counts = {}
+            cls._instance.warned_guild_ids = set()
+        return cls._instance
+
+    def _roll_over(self):
+        today = datetime.datetime.now(timezone.utc).date()
+        if today != self.day:
+            self.day = today
+            self.counts = {}
+            self.warned_guild_ids = set()
+
+    def load(self, counts: dict[int, int]):
+        """
+        Replace the counts of the current day, used at startup
+        :param counts: The number of posts made today keyed by guild id
+        :return: None
+        """
+        self._roll_over()
+        self.counts = dict(counts)
+
+    def count(self, guild_id: int) -> int:
+        self._roll_over()
+        return self.counts.get(guild_id, 0)
+
+    def increment(self, guild_id: int):
+        self._roll_over()
+        self.counts[guild_id] = self.counts.get(guild_id, 0) + 1
+
+    def warning_sent(self, guild_id: int) -> bool:
+        self._roll_over()
+        return guild_id in self.warned_guild_ids
+
+    def mark_warning_sent(self, guild_id: int):
+        self._roll_over()
+        self.warned_guild_ids.add(guild_id)
@@ -0,0 +1,111 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class EditScheduler:
+    """
+    Coalesces edits of Hall of Fame posts. Only the latest edit of a post is kept, and a post is edited at most
+    once every `min_interval` seconds, so a burst of reactions on a popular post costs one edit per interval on
+    the rate limit bucket of the Hall of Fame channel instead of one per reaction. Edits wait while new Hall of
+    Fame posts are being sent, which keeps new posts ahead of counter refreshes.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EditScheduler, cls).__new__(cls)
+            cls._instance.min_interval = 5.0
+            cls._instance.pending_edits = {}
+            cls._instance.tasks = {}
+            cls._instance.posts_in_flight = 0
+            cls._instance.posts_idle = asyncio.Event()
+            cls._instance.posts_idle.set()
+
+            cls._instance.scheduled_edits = 0
+            cls._instance.coalesced_edits = 0
+            cls._instance.discarded_edits = 0
+            cls._instance.sent_edits = 0
+            cls._instance.failed_edits = 0
+            cls._instance.edits_deferred_for_posts = 0
+        return cls._instance
+
+    def schedule(self, hall_of_fame_message_id: int, send_edit):
+        """
+        Schedule an edit of a Hall of Fame post, replacing an edit of the post that has not been sent yet
+        :param hall_of_fame_message_id: The ID of the Hall of Fame post
+        :param send_edit: Coroutine function without arguments that sends the edit
+        :return: None
+        """
+        self.scheduled_edits += 1
+        if hall_of_fame_message_id in self.pending_edits:
+            self.coalesced_edits += 1
+        self.pending_edits[hall_of_fame_message_id] = send_edit
+
+        if hall_of_fame_message_id not in self.tasks:
+            self.tasks[hall_of_fame_message_id] = asyncio.create_task(self._run(hall_of_fame_message_id))
+
+    def discard(self, hall_of_fame_message_id: int):
+        """
+        Drop the pending edit of a post, used when the post is edited directly or its pending edit became stale
+        :param hall_of_fame_message_id: The ID of the Hall of Fame post
+        :return: None
+        """
+        if self.pending_edits.pop(hall_of_fame_message_id, None) is not None:
+            self.discarded_edits += 1
+
+    @asynccontextmanager
+    async def new_post(self):
+        """
+        Hold back scheduled edits while a new Hall of Fame post is being sent
+        """
+        self.posts_in_flight += 1
+        self.posts_idle.clear()
+        try:
+            yield
+        finally:
+            self.posts_in_flight -= 1
+            if self.posts_in_flight == 0:
+                self.posts_idle.set()
+
+    async def _run(self, hall_of_fame_message_id: int):
+        loop = asyncio.get_running_loop()
+        last_edit_time = None
+        try:
+            # The task stays alive for one interval after each edit, so edits scheduled meanwhile wait their turn
+            while True:
+                if last_edit_time is not None:
+                    delay = last_edit_time + self.min_interval - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if hall_of_fame_message_id not in self.pending_edits:
+                    break
+                if not self.posts_idle.is_set():
+                    self.edits_deferred_for_posts += 1
+                    await self.posts_idle.wait()
+
+                send_edit = self.pending_edits.pop(hall_of_fame_message_id, None)
+                if send_edit is None:
+                    break
+                last_edit_time = loop.time()
+                try:
+                    await send_edit()
+                    self.sent_edits += 1
+                except Exception:
+                    self.failed_edits += 1
+        finally:
+            del self.tasks[hall_of_fame_message_id]
+
+    def stats(self) -> dict:
+        """
+        Counters describing how many edits were scheduled, coalesced into a newer edit, discarded and sent
+        :return: The counters of the scheduler
+        """
+        return {
+            "scheduled_edits": self.scheduled_edits,
+            "coalesced_edits": self.coalesced_edits,
+            "discarded_edits": self.discarded_edits,
+            "sent_edits": self.sent_edits,
+            "failed_edits": self.failed_edits,
+            "edits_deferred_for_posts": self.edits_deferred_for_posts,
+            "pending_edits": len(self.pending_edits),
+        }
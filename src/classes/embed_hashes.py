@@ -0,0 +1,87 @@
+import hashlib
+import json
+from collections import OrderedDict
+import discord
+
+
+class EmbedHashes:
+    """
+    Content hashes of the embed each Hall of Fame post was last rendered with. An edit whose embed hashes the
+    same as the last render would not change anything on Discord and is skipped. Hashes are kept in memory and
+    written to hall_of_fame_message.embed_hash with the next reaction count flush, so the stored hash serves as
+    the fallback after a restart. The hashes of the `max_posts` most recently rendered posts are held, older posts
+    fall back to their stored hash as well.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EmbedHashes, cls).__new__(cls)
+            cls._instance.max_posts = 10000
+            cls._instance.hashes = OrderedDict()
+            cls._instance.unsaved_hashes = {}
+            cls._instance.edits = 0
+            cls._instance.avoided_edits = 0
+        return cls._instance
+
+    @staticmethod
+    def compute(embed: discord.Embed) -> str:
+        return hashlib.sha256(json.dumps(embed.to_dict(), sort_keys=True).encode("utf-8")).hexdigest()
+
+    def is_unchanged(self, message_id: int, embed_hash: str, stored_hash: str | None) -> bool:
+        """
+        Check whether the post already shows the embed with the given hash, counting the edit as avoided if so
+        :param message_id: The ID of the original message
+        :param embed_hash: The hash of the embed about to be sent
+        :param stored_hash: The hash stored with the message in the database, used when none is held in memory
+        :return: True if the edit can be skipped
+        """
+        if message_id in self.hashes:
+            self.hashes.move_to_end(message_id)
+        # An evicted hash that was not flushed yet is newer than the stored one
+        if self.hashes.get(message_id, self.unsaved_hashes.get(message_id, stored_hash)) == embed_hash:
+            self.avoided_edits += 1
+            return True
+        return False
+
+    def record(self, message_id: int, embed_hash: str):
+        """
+        Remember the hash of the embed a post was just rendered with
+        :param message_id: The ID of the original message
+        :param embed_hash: The hash of the sent embed
+        :return: None
+        """
+        self.edits += 1
+        self.hashes[message_id] = embed_hash
+        self.hashes.move_to_end(message_id)
+        self.unsaved_hashes[message_id] = embed_hash
+        while len(self.hashes) > self.max_posts:
+            self.hashes.popitem(last=False)
+
+    def forget(self, message_id: int):
+        """
+        Drop the hash of a post whose edit failed, so the next render is sent again
+        :param message_id: The ID of the original message
+        :return: None
+        """
+        self.hashes.pop(message_id, None)
+        self.unsaved_hashes.pop(message_id, None)
+
+    def take_unsaved(self) -> dict[int, str]:
+        batch, self.unsaved_hashes = self.unsaved_hashes, {}
+        return batch
+
+    def restore_unsaved(self, batch: dict[int, str]):
+        for message_id, embed_hash in batch.items():
+            self.unsaved_hashes.setdefault(message_id, embed_hash)
+
+    def stats(self) -> dict:
+        """
+        Counters describing how many post edits were sent and how many were skipped as unchanged
+        :return: The counters of the embed hashes
+        """
+        return {
+            "edits": self.edits,
+            "avoided_edits": self.avoided_edits,
+            "tracked_posts": len(self.hashes),
+        }
@@ -0,0 +1,29 @@
+import re
+from functools import lru_cache
+
+CUSTOM_EMOJI_PATTERN = re.compile(r"<a?:\w+:(\d+)>")
+VARIATION_SELECTOR = "️"
+
+
+@lru_cache(maxsize=4096)
+def emoji_key(emoji: str) -> str:
+    """
+    Normalize an emoji for whitelist matching: the ID of a custom emoji, so a renamed or animated emoji still
+    matches, or the unicode emoji without variation selectors
+    :param emoji: The emoji as text, e.g. "😂" or "<:name:123>"
+    :return: The normalized key
+    """
+    emoji = emoji.strip()
+    custom_emoji = CUSTOM_EMOJI_PATTERN.fullmatch(emoji)
+    if custom_emoji:
+        return custom_emoji.group(1)
+    return emoji.replace(VARIATION_SELECTOR, "")
+
+
+def compile_whitelist(whitelisted_emojis) -> frozenset[str]:
+    """
+    Compile the whitelisted emojis of a guild into the set of their normalized keys
+    :param whitelisted_emojis: The whitelisted emojis as stored in the server config
+    :return: The normalized keys
+    """
+    return frozenset(emoji_key(str(emoji)) for emoji in whitelisted_emojis or [])
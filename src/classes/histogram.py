@@ -0,0 +1,36 @@
+import bisect
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations in seconds. Each observation is counted in the first bucket whose upper
+    bound it does not exceed; observations above the last bound are counted in an overflow bucket.
+    """
+    def __init__(self, bounds: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)):
+        """
+        :param bounds: The ascending upper bounds of the buckets in seconds
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def stats(self) -> dict:
+        """
+        The bucket counts keyed by their upper bound in milliseconds, together with the count, mean and maximum
+        :return: The counters of the histogram
+        """
+        observations = sum(self.counts)
+        buckets = {f"le_{bound * 1000:g}ms": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["gt_{:g}ms".format(self.bounds[-1] * 1000)] = self.counts[-1]
+        return {
+            "count": observations,
+            "mean_ms": round(self.total / observations * 1000, 1) if observations else 0,
+            "max_ms": round(self.maximum * 1000, 1),
+            **buckets,
+        }
@@ -0,0 +1,124 @@
+import asyncio
+
+
+class LogShipper:
+    """
+    Background delivery of log lines to the Discord log channels. utils.logging only queues a line and returns,
+    and a single task sends the lines queued for a channel as one message every `interval` seconds. Lines
+    logged with duplicate validation are dropped while an identical line was queued within the last `dedupe_ttl`
+    seconds, which replaces reading the channel history before every send.
+    """
+    _instance = None
+    # Discord rejects messages longer than 2000 characters
+    MAX_MESSAGE_LENGTH = 2000
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LogShipper, cls).__new__(cls)
+            cls._instance.interval = 5.0
+            cls._instance.dedupe_ttl = 3600.0
+            cls._instance.queued_lines = {}
+            cls._instance.recent_lines = {}
+            cls._instance.task = None
+            cls._instance.flush_lock = asyncio.Lock()
+
+            cls._instance.queued = 0
+            cls._instance.deduplicated = 0
+            cls._instance.sent_messages = 0
+            cls._instance.failed_messages = 0
+        return cls._instance
+
+    def enqueue(self, bot, channel_id: int, line: str, dedupe_key=None):
+        """
+        Queue a log line for its channel without waiting for delivery
+        :param bot: The Discord bot
+        :param channel_id: The ID of the log channel
+        :param line: The formatted log line
+        :param dedupe_key: Key of the line for duplicate validation, or None to always queue it
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        if dedupe_key is not None:
+            if self.recent_lines.get(dedupe_key, 0) > loop.time():
+                self.deduplicated += 1
+                return
+            self.recent_lines[dedupe_key] = loop.time() + self.dedupe_ttl
+
+        self.queued += 1
+        self.queued_lines.setdefault(channel_id, []).append(line)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run(bot))
+
+    async def _run(self, bot):
+        while self.queued_lines:
+            await asyncio.sleep(self.interval)
+            await self.flush(bot)
+
+    async def flush(self, bot):
+        """
+        Send every queued line, batched into as few messages per channel as fit the Discord length limit
+        :param bot: The Discord bot
+        :return: None
+        """
+        async with self.flush_lock:
+            queued_lines, self.queued_lines = self.queued_lines, {}
+            now = asyncio.get_running_loop().time()
+            self.recent_lines = {key: expires_at for key, expires_at in self.recent_lines.items() if expires_at > now}
+
+            target_guild = bot.get_guild(1180006529575960616)
+            for channel_id, lines in queued_lines.items():
+                channel = target_guild.get_channel(channel_id) if target_guild else None
+                if not channel:
+                    self.failed_messages += 1
+                    continue
+                for message in self._batch(lines):
+                    try:
+                        await channel.send(message)
+                        self.sent_messages += 1
+                    except Exception as e:
+                        self.failed_messages += 1
+                        print(f"[ERROR] Failed to send log message to channel {channel_id}: {e}")
+
+    async def stop(self, bot):
+        """
+        Stop the delivery task and send the lines still queued, used on shutdown while the bot can still send
+        :param bot: The Discord bot
+        :return: None
+        """
+        task, self.task = self.task, None
+        if task is not None:
+            # Waits for a flush in progress, so the task is cancelled before it takes the next lines
+            async with self.flush_lock:
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush(bot)
+
+    def _batch(self, lines: list[str]) -> list[str]:
+        wrapper_length = len("```diff\n\n```")
+        max_line_length = self.MAX_MESSAGE_LENGTH - wrapper_length
+        batches = []
+        current = []
+        current_length = 0
+        for line in lines:
+            line = line if len(line) <= max_line_length else line[:max_line_length - 3] + "..."
+            if current and current_length + len(line) + 1 > max_line_length:
+                batches.append(current)
+                current, current_length = [], 0
+            current.append(line)
+            current_length += len(line) + 1
+        if current:
+            batches.append(current)
+        return ["```diff\n" + "\n".join(batch) + "\n```" for batch in batches]
+
+    def stats(self) -> dict:
+        """
+        Counters describing how many log lines were queued and deduplicated, and how many messages were sent
+        :return: The counters of the log shipper
+        """
+        return {
+            "queued": self.queued,
+            "deduplicated": self.deduplicated,
+            "sent_messages": self.sent_messages,
+            "failed_messages": self.failed_messages,
+            "queued_lines": sum(len(lines) for lines in self.queued_lines.values()),
+        }
@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+import discord
+
+
+class MessageCache:
+    """
+    Bounded LRU cache of fetched messages keyed by (channel_id, message_id). An entry expires `ttl` seconds after
+    it was fetched and is invalidated by edits and deletes of its message, so its content and metadata stay
+    current. Reaction changes do not invalidate an entry, so the reactions of a cached message can be outdated.
+    Reaction counting and seeding use `refresh`, which always fetches the message and caches it again.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MessageCache, cls).__new__(cls)
+            cls._instance.max_messages = 5000
+            cls._instance.ttl = 300.0
+            cls._instance.messages = OrderedDict()
+
+            cls._instance.hits = 0
+            cls._instance.misses = 0
+            cls._instance.expired = 0
+            cls._instance.invalidations = 0
+            cls._instance.refreshes = 0
+        return cls._instance
+
+    def get(self, channel_id: int, message_id: int) -> discord.Message | None:
+        """
+        Get a cached message that has not expired
+        :param channel_id: The ID of the channel of the message
+        :param message_id: The ID of the message
+        :return: The cached message, or None on a miss
+        """
+        key = (channel_id, message_id)
+        entry = self.messages.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        message, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.messages[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self.messages.move_to_end(key)
+        self.hits += 1
+        return message
+
+    def put(self, message: discord.Message):
+        key = (message.channel.id, message.id)
+        self.messages[key] = (message, time.monotonic() + self.ttl)
+        self.messages.move_to_end(key)
+        while len(self.messages) > self.max_messages:
+            self.messages.popitem(last=False)
+
+    def invalidate(self, channel_id: int, message_id: int):
+        if self.messages.pop((channel_id, message_id), None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self.messages.clear()
+
+    async def fetch(self, channel, message_id: int) -> discord.Message:
+        """
+        Get a message from the cache, fetching and caching it on a miss
+        :param channel: The channel of the message
+        :param message_id: The ID of the message
+        :return: The message
+        """
+        message = self.get(channel.id, message_id)
+        if message is None:
+            message = await channel.fetch_message(message_id)
+            self.put(message)
+        return message
+
+    async def refresh(self, channel, message_id: int) -> discord.Message:
+        """
+        Fetch a message with its current reactions and cache it
+        :param channel: The channel of the message
+        :param message_id: The ID of the message
+        :return: The message
+        """
+        message = await channel.fetch_message(message_id)
+        self.refreshes += 1
+        self.put(message)
+        return message
+
+    def stats(self) -> dict:
+        """
+        Counters describing how many lookups hit or missed the cache, how many entries expired or were invalidated,
+        and how many messages were fetched again for their reactions
+        :return: The counters of the cache
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "refreshes": self.refreshes,
+            "cached_messages": len(self.messages),
+        }
@@ -0,0 +1,127 @@
+import asyncio
+
+
+class PostRateLimiter:
+    """
+    Token bucket per guild shaping the rate of new Hall of Fame posts. A guild can post up to `burst` messages
+    at once, after which it earns `refill_per_hour` posts per hour. Posts over budget are queued instead of
+    dropped and released one per token in the order the original messages were created. A message that is
+    evaluated again while queued replaces its queued post, so the post shows its latest reactions.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PostRateLimiter, cls).__new__(cls)
+            cls._instance.burst = 10
+            cls._instance.refill_per_hour = 20.0
+            cls._instance.tokens = {}
+            cls._instance.last_refill_times = {}
+            cls._instance.queued_posts = {}
+            cls._instance.posting_message_ids = set()
+            cls._instance.tasks = {}
+
+            cls._instance.immediate_posts = 0
+            cls._instance.queued = 0
+            cls._instance.replaced = 0
+            cls._instance.withdrawn = 0
+            cls._instance.released_posts = 0
+            cls._instance.failed_posts = 0
+        return cls._instance
+
+    def _refill(self, guild_id: int) -> float:
+        now = asyncio.get_running_loop().time()
+        last_refill_time = self.last_refill_times.get(guild_id, now)
+        tokens = self.tokens.get(guild_id, float(self.burst))
+        tokens = min(float(self.burst), tokens + (now - last_refill_time) * self.refill_per_hour / 3600)
+        self.tokens[guild_id] = tokens
+        self.last_refill_times[guild_id] = now
+        return tokens
+
+    async def submit(self, guild_id: int, message_id: int, created_at, post):
+        """
+        Post right away if the guild has a token and nothing queued, otherwise queue the post
+        :param guild_id: The ID of the guild
+        :param message_id: The ID of the original message
+        :param created_at: The creation time of the original message, queued posts are released oldest first
+        :param post: Coroutine function without arguments that makes the post
+        :return: None
+        """
+        if message_id in self.posting_message_ids:
+            return
+        if message_id in self.queued_posts.get(guild_id, {}):
+            self.replaced += 1
+            self.queued_posts[guild_id][message_id] = (created_at, post)
+            return
+
+        if not self.queued_posts.get(guild_id) and self._refill(guild_id) >= 1:
+            self.tokens[guild_id] -= 1
+            self.immediate_posts += 1
+            self.posting_message_ids.add(message_id)
+            try:
+                await post()
+            finally:
+                self.posting_message_ids.discard(message_id)
+            return
+
+        self.queued += 1
+        self.queued_posts.setdefault(guild_id, {})[message_id] = (created_at, post)
+        if guild_id not in self.tasks:
+            self.tasks[guild_id] = asyncio.create_task(self._release(guild_id))
+
+    def withdraw(self, guild_id: int, message_id: int):
+        """
+        Remove a queued post, used when the message no longer qualifies for the Hall of Fame
+        :param guild_id: The ID of the guild
+        :param message_id: The ID of the original message
+        :return: None
+        """
+        if self.queued_posts.get(guild_id, {}).pop(message_id, None) is not None:
+            self.withdrawn += 1
+
+    async def _release(self, guild_id: int):
+        try:
+            while self.queued_posts.get(guild_id):
+                tokens = self._refill(guild_id)
+                if tokens < 1:
+                    await asyncio.sleep((1 - tokens) * 3600 / self.refill_per_hour)
+                    continue
+
+                queue = self.queued_posts[guild_id]
+                message_id = min(queue, key=lambda queued_message_id: queue[queued_message_id][0])
+                _, post = queue.pop(message_id)
+                self.tokens[guild_id] -= 1
+                self.posting_message_ids.add(message_id)
+                try:
+                    await post()
+                    self.released_posts += 1
+                except Exception:
+                    self.failed_posts += 1
+                finally:
+                    self.posting_message_ids.discard(message_id)
+        finally:
+            del self.tasks[guild_id]
+            if not self.queued_posts.get(guild_id):
+                self.queued_posts.pop(guild_id, None)
+
+    def queue_depths(self) -> dict[int, int]:
+        """
+        The number of queued posts of every guild with a non-empty queue
+        :return: The queue depth keyed by guild id
+        """
+        return {guild_id: len(queue) for guild_id, queue in self.queued_posts.items() if queue}
+
+    def stats(self) -> dict:
+        """
+        Counters describing how many posts were made right away, queued, replaced, withdrawn and released
+        :return: The counters of the rate limiter
+        """
+        return {
+            "immediate_posts": self.immediate_posts,
+            "queued": self.queued,
+            "replaced": self.replaced,
+            "withdrawn": self.withdrawn,
+            "released_posts": self.released_posts,
+            "failed_posts": self.failed_posts,
+            "queued_posts": sum(self.queue_depths().values()),
+        }
@@ -0,0 +1,104 @@
+import datetime
+from datetime import timezone
+import discord
+from classes.server_config_cache import ServerConfigCache
+from message_reactions import is_counted_emoji
+
+
+class ReactionAdmission:
+    """
+    Cheap predicates run on every raw reaction event before it is scheduled for evaluation. Each rule only looks
+    at the payload, the cached server config and in-memory state, so rejected events never reach the Discord API
+    or the database. The Hall of Fame messages are held per guild for the guilds the bot serves, and dropped when
+    the original message is deleted or the bot leaves the guild, since neither can receive reactions any more.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ReactionAdmission, cls).__new__(cls)
+            cls._instance.hall_of_fame_message_ids = {}
+            cls._instance.daily_cap_reached = {}
+            cls._instance.admitted = 0
+            cls._instance.rejections = {
+                "hall_of_fame_channel": 0,
+                "emoji_not_whitelisted": 0,
+                "past_due_date": 0,
+                "daily_cap_reached": 0,
+            }
+        return cls._instance
+
+    def load_hall_of_fame_message_ids(self, message_ids: dict[int, set[int]]):
+        """
+        Replace the Hall of Fame messages, used at startup
+        :param message_ids: The IDs of the original messages keyed by guild id
+        :return: None
+        """
+        self.hall_of_fame_message_ids = {guild_id: set(ids) for guild_id, ids in message_ids.items()}
+
+    def add_hall_of_fame_message(self, guild_id: int, message_id: int):
+        self.hall_of_fame_message_ids.setdefault(guild_id, set()).add(message_id)
+
+    def remove_hall_of_fame_message(self, guild_id: int, message_id: int):
+        self.hall_of_fame_message_ids.get(guild_id, set()).discard(message_id)
+
+    def forget_guild(self, guild_id: int):
+        self.hall_of_fame_message_ids.pop(guild_id, None)
+        self.daily_cap_reached.pop(guild_id, None)
+
+    def is_hall_of_fame_message(self, guild_id: int, message_id: int) -> bool:
+        return message_id in self.hall_of_fame_message_ids.get(guild_id, ())
+
+    def mark_daily_cap_reached(self, guild_id: int):
+        """
+        Reject further reactions of the guild until the end of the current UTC day
+        :param guild_id: The ID of the guild that reached the daily post limit
+        :return: None
+        """
+        self.daily_cap_reached[guild_id] = datetime.datetime.now(timezone.utc).date()
+
+    def rejection_reason(self, payload: discord.RawReactionActionEvent) -> str | None:
+        """
+        Check a raw reaction event against the admission rules
+        :param payload: The raw reaction event
+        :return: The name of the first rule rejecting the event, or None if the event should be evaluated
+        """
+        server_config = ServerConfigCache()[payload.guild_id]
+
+        if payload.channel_id == server_config.hall_of_fame_channel_id:
+            return "hall_of_fame_channel"
+
+        if not is_counted_emoji(server_config, str(payload.emoji)):
+            return "emoji_not_whitelisted"
+
+        # The creation time is encoded in the message id, so the age is known without fetching the message
+        message_age = datetime.datetime.now(timezone.utc) - discord.utils.snowflake_time(payload.message_id)
+        is_hall_of_fame_message = self.is_hall_of_fame_message(payload.guild_id, payload.message_id)
+        if message_age.days > server_config.post_due_date and not is_hall_of_fame_message:
+            return "past_due_date"
+
+        # Existing posts still have their counters refreshed and can be hidden below the threshold
+        if (self.daily_cap_reached.get(payload.guild_id) == datetime.datetime.now(timezone.utc).date()
+                and not is_hall_of_fame_message):
+            return "daily_cap_reached"
+
+        return None
+
+    def admit(self, payload: discord.RawReactionActionEvent) -> bool:
+        """
+        Check a raw reaction event against the admission rules and count the outcome
+        :param payload: The raw reaction event
+        :return: True if the event should be scheduled for evaluation
+        """
+        reason = self.rejection_reason(payload)
+        if reason is None:
+            self.admitted += 1
+            return True
+        self.rejections[reason] += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            **{f"rejected_{rule}": count for rule, count in self.rejections.items()},
+        }
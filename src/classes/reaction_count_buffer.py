@@ -0,0 +1,68 @@
+class ReactionCountBuffer:
+    """
+    Write-behind buffer for the reaction counts of Hall of Fame messages. Only the latest count of a message is
+    kept, so repeated re-evaluations of a hot message collapse into a single row of the next batch, which
+    utils.flush_reaction_counts writes every few seconds and once more on shutdown.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ReactionCountBuffer, cls).__new__(cls)
+            cls._instance.pending_counts = {}
+            cls._instance.buffered_updates = 0
+            cls._instance.superseded_updates = 0
+            cls._instance.flushed_updates = 0
+            cls._instance.flushes = 0
+            cls._instance.failed_flushes = 0
+        return cls._instance
+
+    def set(self, message_id: int, reaction_count: int):
+        """
+        Buffer the latest reaction count of a Hall of Fame message
+        :param message_id: The ID of the original message
+        :param reaction_count: The new reaction count
+        :return: None
+        """
+        self.buffered_updates += 1
+        if message_id in self.pending_counts:
+            self.superseded_updates += 1
+        self.pending_counts[message_id] = reaction_count
+
+    def take(self) -> dict[int, int]:
+        """
+        Remove and return every buffered count for writing
+        :return: The reaction counts keyed by message id
+        """
+        batch, self.pending_counts = self.pending_counts, {}
+        return batch
+
+    def restore(self, batch: dict[int, int]):
+        """
+        Put back a batch that failed to be written. Counts buffered since the batch was taken are newer and win.
+        Only correct because the flush writes the counts and their stat deltas in one transaction: a failed flush
+        wrote neither, so the deltas are derived again from the stored counts on the retry.
+        :param batch: The batch returned by take
+        :return: None
+        """
+        self.failed_flushes += 1
+        for message_id, reaction_count in batch.items():
+            self.pending_counts.setdefault(message_id, reaction_count)
+
+    def mark_flushed(self, batch: dict[int, int]):
+        self.flushes += 1
+        self.flushed_updates += len(batch)
+
+    def stats(self) -> dict:
+        """
+        Counters describing how many updates were buffered, collapsed into a newer count and written
+        :return: The counters of the buffer
+        """
+        return {
+            "buffered_updates": self.buffered_updates,
+            "superseded_updates": self.superseded_updates,
+            "flushed_updates": self.flushed_updates,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "pending_messages": len(self.pending_counts),
+        }
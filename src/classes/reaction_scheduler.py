@@ -0,0 +1,112 @@
+import asyncio
+from collections import OrderedDict
+
+
+class ReactionScheduler:
+    """
+    Coalesces reaction events per message. A burst of reactions on the same message collapses into a single
+    trailing evaluation that runs once the message has been quiet for `quiet_window` seconds (or at the latest
+    `max_delay` seconds after the first event of the burst). Events that arrive while an evaluation is running
+    re-arm the message, so the final reaction state is always evaluated. Messages that arrive while `max_pending`
+    messages are waiting are deferred with their latest payload and scheduled in arrival order as pending
+    messages are evaluated. The deferred messages are not bounded, they hold one payload per message.
+    """
+    def __init__(self, evaluate, quiet_window: float = 1.5, max_delay: float = 10.0, max_pending: int = 5000):
+        """
+        :param evaluate: Coroutine function called with the latest payload of a message
+        :param quiet_window: Seconds without new events before a message is evaluated
+        :param max_delay: Upper bound in seconds between the first event of a burst and its evaluation
+        :param max_pending: Maximum number of messages waiting for evaluation before new messages are deferred
+        """
+        self.evaluate = evaluate
+        self.quiet_window = quiet_window
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+
+        self.pending_payloads = {}
+        self.deferred_payloads = OrderedDict()
+        self.first_event_times = {}
+        self.last_event_times = {}
+        self.tasks = {}
+
+        self.received_events = 0
+        self.coalesced_events = 0
+        self.deferred_events = 0
+        self.evaluations = 0
+        self.failed_evaluations = 0
+
+    def schedule(self, payload):
+        """
+        Schedule an evaluation of the message the payload belongs to
+        :param payload: The raw reaction event
+        :return: None
+        """
+        message_id = payload.message_id
+        self.received_events += 1
+
+        if message_id in self.pending_payloads:
+            self.coalesced_events += 1
+        elif message_id in self.deferred_payloads:
+            self.coalesced_events += 1
+            self.deferred_payloads[message_id] = payload
+            return
+        elif len(self.pending_payloads) >= self.max_pending:
+            self.deferred_events += 1
+            self.deferred_payloads[message_id] = payload
+            return
+        else:
+            self.first_event_times[message_id] = asyncio.get_running_loop().time()
+
+        self._arm(message_id, payload)
+
+    def _arm(self, message_id: int, payload):
+        self.pending_payloads[message_id] = payload
+        self.last_event_times[message_id] = asyncio.get_running_loop().time()
+
+        if message_id not in self.tasks:
+            self.tasks[message_id] = asyncio.create_task(self._run(message_id))
+
+    def _schedule_deferred(self):
+        while self.deferred_payloads and len(self.pending_payloads) < self.max_pending:
+            message_id, payload = self.deferred_payloads.popitem(last=False)
+            self.first_event_times[message_id] = asyncio.get_running_loop().time()
+            self._arm(message_id, payload)
+
+    async def _run(self, message_id: int):
+        loop = asyncio.get_running_loop()
+        try:
+            while message_id in self.pending_payloads:
+                while True:
+                    due = min(self.last_event_times[message_id] + self.quiet_window,
+                              self.first_event_times[message_id] + self.max_delay)
+                    delay = due - loop.time()
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+
+                payload = self.pending_payloads.pop(message_id)
+                del self.first_event_times[message_id]
+                del self.last_event_times[message_id]
+                self._schedule_deferred()
+
+                self.evaluations += 1
+                try:
+                    await self.evaluate(payload)
+                except Exception:
+                    self.failed_evaluations += 1
+        finally:
+            del self.tasks[message_id]
+
+    def stats(self) -> dict:
+        """
+        Counters describing how many events were received, coalesced into a waiting evaluation or deferred
+        :return: The counters of the scheduler
+        """
+        return {
+            "received_events": self.received_events,
+            "coalesced_events": self.coalesced_events,
+            "evaluations": self.evaluations,
+            "failed_evaluations": self.failed_evaluations,
+            "pending_messages": len(self.pending_payloads),
+            "deferred_messages": len(self.deferred_payloads),
+        }
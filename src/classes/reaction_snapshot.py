@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ReactionSnapshot:
+    """
+    The reaction figures of a message, computed once per evaluation and shared by the threshold check,
+    the embed and the database writes
+    """
+    message_id: int
+    reaction_count: int
+    top_emoji: str
+    emoji_counts: tuple[tuple[str, int], ...]
@@ -0,0 +1,423 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import discord
+from classes.message_cache import MessageCache
+from classes.reactor_set import ReactorSet
+
+
+class MessageReactionState:
+    """
+    The reactions of a single message as a mapping of emoji to the ids of the users that reacted with it
+    """
+    def __init__(self, message: discord.Message, reactions: dict[str, ReactorSet]):
+        self.message = message
+        self.message_id = message.id
+        self.guild_id = message.guild.id
+        self.author_id = message.author.id
+        self.reactions = reactions
+
+    @classmethod
+    async def from_message(cls, message: discord.Message, known_reactions: dict[str, ReactorSet] = None):
+        """
+        Build the reaction state of a fetched message by paging through the reactors of every emoji once
+        :param message: The fetched message
+        :param known_reactions: Reactor sets known from before, reused for every emoji whose reaction count matches
+        :return: The reaction state of the message
+        """
+        known_reactions = known_reactions or {}
+        reactions = {}
+        for reaction in message.reactions:
+            emoji = str(reaction.emoji)
+            known_user_ids = known_reactions.get(emoji)
+            if known_user_ids is not None and len(known_user_ids) == reaction.count:
+                reactions[emoji] = known_user_ids
+                continue
+            user_ids = {user.id async for user in reaction.users()}
+            if reaction.burst_count:
+                user_ids.update([user.id async for user in reaction.users(type=discord.enums.ReactionType.burst)])
+            reactions[emoji] = ReactorSet(user_ids)
+        return cls(message, reactions)
+
+    def apply(self, emoji: str, user_id: int, added: bool):
+        """
+        Apply a single reaction add or remove to the state
+        :param emoji: The emoji of the reaction
+        :param user_id: The user that added or removed the reaction
+        :param added: True for an added reaction, False for a removed one
+        :return: None
+        """
+        if added:
+            self.reactions.setdefault(emoji, ReactorSet()).add(user_id)
+            return
+        user_ids = self.reactions.get(emoji)
+        if user_ids is None:
+            return
+        user_ids.discard(user_id)
+        if not user_ids:
+            del self.reactions[emoji]
+
+
+class MessageReactionCounts:
+    """
+    The raw reaction counts of a message that has not been seeded, enough to settle most threshold checks without
+    paging the reactors. Whether the author reacted with an emoji, and the reactors of an emoji, are only known
+    once they have been paged.
+    """
+    def __init__(self, message: discord.Message):
+        self.message = message
+        self.message_id = message.id
+        self.guild_id = message.guild.id
+        self.author_id = message.author.id
+        self.counts = {str(reaction.emoji): reaction.count for reaction in message.reactions}
+        self.author_reacted = {}
+        self.reactors = {}
+        self.paging = {}
+
+    def apply(self, emoji: str, user_id: int, added: bool):
+        """
+        Apply a single reaction add or remove to the counts
+        :param emoji: The emoji of the reaction
+        :param user_id: The user that added or removed the reaction
+        :param added: True for an added reaction, False for a removed one
+        :return: None
+        """
+        if emoji in self.paging:
+            self.paging[emoji].append((user_id, added))
+        count = self.counts.get(emoji, 0) + (1 if added else -1)
+        if count <= 0:
+            self.counts.pop(emoji, None)
+            self.author_reacted.pop(emoji, None)
+            self.reactors.pop(emoji, None)
+            return
+        self.counts[emoji] = count
+        if user_id == self.author_id:
+            self.author_reacted[emoji] = added
+        if emoji in self.reactors:
+            if added:
+                self.reactors[emoji].add(user_id)
+            else:
+                self.reactors[emoji].discard(user_id)
+        elif added and count == 1:
+            # A new emoji has a single reactor, so it is fully known without paging
+            self.reactors[emoji] = {user_id}
+            self.author_reacted[emoji] = user_id == self.author_id
+
+
+class ReactionStore:
+    """
+    In-memory reaction state keyed by message id. A message is seeded by a single fetch the first time it is
+    evaluated and is kept current from the raw gateway reaction events afterwards. The reactor sets of seeded
+    messages are marked for writing as they change.
+
+    Reactor sets of messages that are not seeded, because they were loaded at startup, their state was evicted or
+    their message was edited, are parked and kept current from the gateway events as well. Seeding reuses a parked
+    set whose size matches the reaction count of its emoji instead of paging the reactors again. A set that missed
+    events while the bot was offline or reconnecting is paged again once its size is off, only a removal and an
+    addition by another user of the same emoji within the gap go unnoticed.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ReactionStore, cls).__new__(cls)
+            cls._instance.max_messages = 10000
+            cls._instance.states = OrderedDict()
+            cls._instance.counted = OrderedDict()
+            cls._instance.parked = OrderedDict()
+            cls._instance.unsaved = {}
+            cls._instance.seeding = {}
+            cls._instance.locks = {}
+            cls._instance.generation = 0
+            cls._instance.seeds = 0
+            cls._instance.hits = 0
+            cls._instance.counts = 0
+            cls._instance.count_hits = 0
+            cls._instance.reused_reactor_sets = 0
+            cls._instance.paged_reactor_sets = 0
+        return cls._instance
+
+    def load_persisted(self, reactor_sets: dict):
+        """
+        Park the persisted reactor sets of the messages that can still be evaluated
+        :param reactor_sets: Dict of message id to (guild_id, {emoji: user_ids})
+        :return: None
+        """
+        self.parked = OrderedDict()
+        for message_id in sorted(reactor_sets)[-self.max_messages:]:
+            guild_id, reactions = reactor_sets[message_id]
+            self.parked[message_id] = (guild_id, {emoji: ReactorSet(user_ids) for emoji, user_ids in reactions.items()})
+
+    def _park(self, message_id: int, guild_id: int, reactions: dict[str, ReactorSet]):
+        # A set evicted from the parked sets stops receiving events, it was written as of its last change
+        self.parked[message_id] = (guild_id, reactions)
+        self.parked.move_to_end(message_id)
+        while len(self.parked) > self.max_messages:
+            self.parked.popitem(last=False)
+
+    def _mark_unsaved(self, guild_id: int, message_id: int, emoji: str, user_ids: ReactorSet | None):
+        # The reactor set is written as it is at the next flush, None or an empty set deletes it
+        self.unsaved[(message_id, emoji)] = (guild_id, user_ids)
+
+    def _apply_state(self, state: MessageReactionState, emoji: str, user_id: int, added: bool):
+        state.apply(emoji, user_id, added)
+        self._mark_unsaved(state.guild_id, state.message_id, emoji, state.reactions.get(emoji))
+
+    def _apply_parked(self, message_id: int, emoji: str, user_id: int, added: bool):
+        if message_id not in self.parked:
+            return
+        guild_id, reactions = self.parked[message_id]
+        if added:
+            reactions.setdefault(emoji, ReactorSet()).add(user_id)
+        elif emoji in reactions:
+            reactions[emoji].discard(user_id)
+            if not reactions[emoji]:
+                del reactions[emoji]
+        self._mark_unsaved(guild_id, message_id, emoji, reactions.get(emoji))
+
+    def take_unsaved(self) -> dict:
+        """
+        Remove and return every reactor set changed since the last flush
+        :return: Dict of (message_id, emoji) to (guild_id, user_ids), user_ids is None or empty for a deleted set
+        """
+        batch, self.unsaved = self.unsaved, {}
+        return batch
+
+    def restore_unsaved(self, batch: dict):
+        """
+        Put back a batch that failed to be written. Changes marked since the batch was taken are newer and win.
+        :param batch: The batch returned by take_unsaved
+        :return: None
+        """
+        for key, value in batch.items():
+            self.unsaved.setdefault(key, value)
+
+    def reset(self):
+        """
+        Drop the reaction state and counts of every message, used after a new gateway session was identified. Events
+        missed while disconnected without a resume would otherwise leave them wrong for good. Their reactor sets are
+        parked and checked against the reaction counts on the next seed. Seeds in flight finish for their callers
+        but are not stored.
+        :return: None
+        """
+        self.generation += 1
+        for state in self.states.values():
+            self._park(state.message_id, state.guild_id, state.reactions)
+        self.states.clear()
+        self.counted.clear()
+
+    @asynccontextmanager
+    async def _message_lock(self, message_id: int):
+        # Serializes seeding and counting per message, so a second caller waits for the first and reuses its result
+        # instead of overwriting its buffer of reaction events
+        lock_entry = self.locks.get(message_id)
+        if lock_entry is None:
+            lock_entry = self.locks[message_id] = [asyncio.Lock(), 0]
+        lock_entry[1] += 1
+        try:
+            async with lock_entry[0]:
+                yield
+        finally:
+            lock_entry[1] -= 1
+            if lock_entry[1] == 0:
+                del self.locks[message_id]
+
+    def get(self, message_id: int) -> MessageReactionState | None:
+        state = self.states.get(message_id)
+        if state is not None:
+            self.states.move_to_end(message_id)
+        return state
+
+    async def get_or_seed(self, channel, message_id: int) -> MessageReactionState:
+        """
+        Get the reaction state of a message, fetching and seeding it if the message has not been seen before
+        :param channel: The channel of the message
+        :param message_id: The ID of the message
+        :return: The reaction state of the message
+        """
+        async with self._message_lock(message_id):
+            state = self.get(message_id)
+            if state is not None:
+                self.hits += 1
+                return state
+            return await self._seed(await MessageCache().refresh(channel, message_id))
+
+    async def get_or_count(self, channel, message_id: int) -> MessageReactionState | MessageReactionCounts:
+        """
+        Get the reaction state of a seeded message, or the raw reaction counts of a message that has not been
+        seeded, fetching the message if it has not been seen before. Fetching for counts does not page any reactors,
+        unless a reaction removal raced the fetch, in which case the message is seeded instead.
+        :param channel: The channel of the message
+        :param message_id: The ID of the message
+        :return: The reaction state or the reaction counts of the message
+        """
+        async with self._message_lock(message_id):
+            state = self.get(message_id)
+            if state is not None:
+                self.hits += 1
+                return state
+            reaction_counts = self.counted.get(message_id)
+            if reaction_counts is not None:
+                self.count_hits += 1
+                self.counted.move_to_end(message_id)
+                return reaction_counts
+
+            generation = self.generation
+            self.seeding[message_id] = []
+            try:
+                message = await MessageCache().refresh(channel, message_id)
+            finally:
+                buffered_events = self.seeding.pop(message_id, [])
+            for emoji, user_id, added in buffered_events:
+                self._apply_parked(message_id, emoji, user_id, added)
+
+            # Events that raced the fetch may or may not be part of its counts. Replaying an add can only overcount,
+            # which at worst seeds the message earlier than needed. Replaying a remove could undercount and skip a
+            # message that qualifies, so the reactors are paged instead, from a fetch that follows the removal.
+            if any(not added for _, _, added in buffered_events):
+                return await self._seed(await MessageCache().refresh(channel, message_id))
+            reaction_counts = MessageReactionCounts(message)
+            for emoji, user_id, added in buffered_events:
+                reaction_counts.apply(emoji, user_id, added)
+
+            # A parked reactor set matching the count of its emoji settles the author and the reactors without paging
+            _, known_reactions = self.parked.get(message_id, (None, {}))
+            for emoji, user_ids in known_reactions.items():
+                if reaction_counts.counts.get(emoji) == len(user_ids):
+                    reaction_counts.reactors[emoji] = set(user_ids)
+                    reaction_counts.author_reacted[emoji] = reaction_counts.author_id in user_ids
+
+            self.counts += 1
+            if generation != self.generation:
+                return reaction_counts
+            self.counted[message_id] = reaction_counts
+            while len(self.counted) > self.max_messages:
+                self.counted.popitem(last=False)
+            return reaction_counts
+
+    async def seed(self, message: discord.Message) -> MessageReactionState:
+        """
+        Seed the state of a fetched message. Reaction events arriving while the reactors are paged are buffered
+        and replayed on top of the seeded state. A message seeded meanwhile by another caller is not seeded again.
+        :param message: The fetched message
+        :return: The reaction state of the message
+        """
+        async with self._message_lock(message.id):
+            state = self.get(message.id)
+            if state is not None:
+                self.hits += 1
+                return state
+            return await self._seed(message)
+
+    async def _seed(self, message: discord.Message) -> MessageReactionState:
+        generation = self.generation
+        guild_id, known_reactions = self.parked.pop(message.id, (message.guild.id, {}))
+        self.seeding[message.id] = []
+        try:
+            state = await MessageReactionState.from_message(message, known_reactions)
+        except BaseException:
+            self._park(message.id, guild_id, known_reactions)
+            raise
+        finally:
+            buffered_events = self.seeding.pop(message.id, [])
+
+        for emoji, user_ids in state.reactions.items():
+            if user_ids is known_reactions.get(emoji):
+                self.reused_reactor_sets += 1
+            else:
+                self.paged_reactor_sets += 1
+                self._mark_unsaved(state.guild_id, state.message_id, emoji, user_ids)
+        for emoji in known_reactions.keys() - state.reactions.keys():
+            self._mark_unsaved(state.guild_id, state.message_id, emoji, None)
+        for emoji, user_id, added in buffered_events:
+            self._apply_state(state, emoji, user_id, added)
+
+        self.seeds += 1
+        if generation != self.generation:
+            return state
+        self.counted.pop(message.id, None)
+        self.states[message.id] = state
+        self.states.move_to_end(message.id)
+        while len(self.states) > self.max_messages:
+            evicted_message_id, evicted_state = self.states.popitem(last=False)
+            self._park(evicted_message_id, evicted_state.guild_id, evicted_state.reactions)
+        return state
+
+    def apply_event(self, payload: discord.RawReactionActionEvent):
+        """
+        Apply a raw reaction add or remove event to the stored state of its message
+        :param payload: The raw reaction event
+        :return: None
+        """
+        reaction_event = (str(payload.emoji), payload.user_id, payload.event_type == "REACTION_ADD")
+        if payload.message_id in self.seeding:
+            self.seeding[payload.message_id].append(reaction_event)
+            return
+        state = self.states.get(payload.message_id)
+        if state is not None:
+            self._apply_state(state, *reaction_event)
+            return
+        reaction_counts = self.counted.get(payload.message_id)
+        if reaction_counts is not None:
+            reaction_counts.apply(*reaction_event)
+        self._apply_parked(payload.message_id, *reaction_event)
+
+    def clear(self, message_id: int, emoji: str = None):
+        """
+        Clear all reactions of a message, or only the reactions of a single emoji
+        :param message_id: The ID of the message
+        :param emoji: The emoji to clear, or None to clear all reactions
+        :return: None
+        """
+        if emoji is None:
+            self.counted.pop(message_id, None)
+        elif message_id in self.counted:
+            reaction_counts = self.counted[message_id]
+            reaction_counts.counts.pop(emoji, None)
+            reaction_counts.author_reacted.pop(emoji, None)
+            reaction_counts.reactors.pop(emoji, None)
+
+        if message_id in self.parked:
+            guild_id, reactions = self.parked[message_id]
+            self._clear_reactions(guild_id, message_id, reactions, emoji)
+        state = self.states.get(message_id)
+        if state is not None:
+            self._clear_reactions(state.guild_id, message_id, state.reactions, emoji)
+
+    def _clear_reactions(self, guild_id: int, message_id: int, reactions: dict[str, ReactorSet], emoji: str = None):
+        cleared_emojis = list(reactions) if emoji is None else [emoji]
+        for cleared_emoji in cleared_emojis:
+            if reactions.pop(cleared_emoji, None) is not None:
+                self._mark_unsaved(guild_id, message_id, cleared_emoji, None)
+
+    def forget(self, message_id: int, deleted: bool = False):
+        """
+        Stop tracking a message. The reactor sets of an edited message stay valid and are kept for the next seed,
+        those of a deleted message are deleted.
+        :param message_id: The ID of the message
+        :param deleted: Whether the message was deleted
+        :return: None
+        """
+        state = self.states.pop(message_id, None)
+        self.counted.pop(message_id, None)
+        if deleted:
+            self.clear(message_id)
+            self.parked.pop(message_id, None)
+            if state is not None:
+                self._clear_reactions(state.guild_id, message_id, state.reactions)
+        elif state is not None:
+            self._park(message_id, state.guild_id, state.reactions)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_messages": len(self.states),
+            "counted_messages": len(self.counted),
+            "seeds": self.seeds,
+            "hits": self.hits,
+            "counts": self.counts,
+            "count_hits": self.count_hits,
+            "parked_messages": len(self.parked),
+            "reused_reactor_sets": self.reused_reactor_sets,
+            "paged_reactor_sets": self.paged_reactor_sets,
+            "unsaved_reactor_sets": len(self.unsaved),
+        }
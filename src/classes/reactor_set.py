@@ -0,0 +1,34 @@
+from array import array
+from bisect import bisect_left
+
+
+class ReactorSet:
+    """
+    The ids of the users that reacted with an emoji, kept as a sorted array of 64-bit integers. It takes a
+    fraction of the memory of a set of ints and supports the membership, size and iteration the reaction
+    calculations need.
+    """
+    __slots__ = ("user_ids",)
+
+    def __init__(self, user_ids=()):
+        self.user_ids = array("q", sorted(set(user_ids)))
+
+    def __contains__(self, user_id: int) -> bool:
+        index = bisect_left(self.user_ids, user_id)
+        return index < len(self.user_ids) and self.user_ids[index] == user_id
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __iter__(self):
+        return iter(self.user_ids)
+
+    def add(self, user_id: int):
+        index = bisect_left(self.user_ids, user_id)
+        if index == len(self.user_ids) or self.user_ids[index] != user_id:
+            self.user_ids.insert(index, user_id)
+
+    def discard(self, user_id: int):
+        index = bisect_left(self.user_ids, user_id)
+        if index < len(self.user_ids) and self.user_ids[index] == user_id:
+            del self.user_ids[index]
@@ -1,3 +1,6 @@
+from classes.emoji_whitelist import compile_whitelist
+
+
 class Server:
     def __init__(self, hall_of_fame_channel_id: int, guild_id: int, reaction_threshold: int, post_due_date: int,
                  sweep_limit: int, sweep_limited: bool, include_author_in_reaction_calculation: bool,
@@ -23,6 +26,16 @@ class Server:
         self.server_member_count = server_member_count
         self.require_image_or_video = require_image_or_video
 
+    @property
+    def whitelisted_emojis(self) -> list:
+        return self._whitelisted_emojis
+
+    @whitelisted_emojis.setter
+    def whitelisted_emojis(self, whitelisted_emojis: list):
+        # Compiled once per change, reaction filtering only does set lookups on the normalized keys
+        self._whitelisted_emojis = whitelisted_emojis
+        self.whitelisted_emoji_keys = compile_whitelist(whitelisted_emojis)
+
 class ServerClass(Server):
     @staticmethod
     def from_row(row):
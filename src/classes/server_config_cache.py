@@ -0,0 +1,67 @@
+from classes.server_class import Server
+from repositories import server_config_repo
+
+
+class ServerConfigCache:
+    """
+    Write-through cache of the server configs keyed by guild id. This is the single read path for per-guild
+    settings at runtime; changes are written to the database first and then applied to the cached config.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ServerConfigCache, cls).__new__(cls)
+            cls._instance.server_classes = {}
+        return cls._instance
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self.server_classes
+
+    def __getitem__(self, guild_id: int) -> Server:
+        return self.server_classes[guild_id]
+
+    def __setitem__(self, guild_id: int, server_class: Server):
+        self.server_classes[guild_id] = server_class
+
+    def __delitem__(self, guild_id: int):
+        del self.server_classes[guild_id]
+
+    def __len__(self) -> int:
+        return len(self.server_classes)
+
+    def get(self, guild_id: int) -> Server | None:
+        return self.server_classes.get(guild_id)
+
+    def values(self):
+        return self.server_classes.values()
+
+    async def reload(self, connection, guild_id: int = None):
+        """
+        Reload the cached configs from the database
+        :param connection: The database connection
+        :param guild_id: Only reload the config of this guild, or None to reload all configs
+        :return: None
+        """
+        if guild_id is None:
+            self.server_classes = await server_config_repo.get_server_classes(connection)
+            return
+
+        server_class = await server_config_repo.get_server_class(connection, guild_id)
+        if server_class is None:
+            self.server_classes.pop(guild_id, None)
+        else:
+            self.server_classes[guild_id] = server_class
+
+    async def update_parameter(self, connection, guild_id: int, param_name: str, param_value):
+        """
+        Write a config value to the database and apply it to the cached config of the guild
+        :param connection: The database connection
+        :param guild_id: The ID of the guild
+        :param param_name: The name of the config column
+        :param param_value: The new value
+        :return: None
+        """
+        await server_config_repo.update_server_config_param(guild_id, param_name, param_value, connection)
+        if guild_id in self.server_classes:
+            setattr(self.server_classes[guild_id], param_name, param_value)
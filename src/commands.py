@@ -1,8 +1,10 @@
 import discord
 import utils
+import database
 from constants import version
 from enums import command_refs
-from repositories import server_config_repo, server_user_repo
+from classes.server_config_cache import ServerConfigCache
+from repositories import server_user_repo
 
 async def get_help(interaction: discord.Interaction):
     """
@@ -65,36 +67,36 @@ async def manual_sweep(interaction: discord.Interaction, guild_id: int, sweep_li
     await utils.check_all_server_messages(int(guild_id), sweep_limit, sweep_limited, bot, collection, reaction_threshold, post_due_date, target_channel_id, allow_messages_in_hof_channel, interaction)
 
 
-async def set_reaction_threshold(interaction: discord.Interaction, reaction_threshold: int, connection):
+async def set_reaction_threshold(interaction: discord.Interaction, reaction_threshold: int):
     """
     Command to set the reaction threshold for posting a message in the Hall of Fame
     :param interaction:
     :param reaction_threshold:
-    :param connection:
     :return:
     """
-    server_config_repo.update_server_config_param(interaction.guild.id, 'reaction_threshold', reaction_threshold, connection)
+    async with database.connection() as connection:
+        await ServerConfigCache().update_parameter(connection, interaction.guild.id, 'reaction_threshold', reaction_threshold)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(f"Reaction threshold set to {reaction_threshold}.\n"
                                             f"Note: The reaction threshold is based on the highest reaction count"
                                             f" of a single emoji per message.")
 
 
-async def user_server_profile(interaction, user, user_stats, connection, month_emoji: str, all_time_emoji: str):
+async def user_server_profile(interaction, user, user_stats, month_emoji: str, all_time_emoji: str):
     """
     Command to get the Hall of Fame profile for a user in a specific server
     :param interaction:
     :param user:
     :param user_stats:
-    :param connection:
     :param month_emoji:
     :param all_time_emoji:
     :return:
     """
-    user_has_most_this_month_hall_of_fame_messages = server_user_repo.check_if_user_is_top_of_stat(
-        connection, user.id, interaction.guild.id, "this_month_hall_of_fame_messages")
-    user_with_most_all_time_hall_of_fame_messages = server_user_repo.check_if_user_is_top_of_stat(
-        connection, user.id, interaction.guild.id, "total_hall_of_fame_messages")
+    async with database.connection() as connection:
+        user_has_most_this_month_hall_of_fame_messages = await server_user_repo.check_if_user_is_top_of_stat(
+            connection, user.id, interaction.guild.id, "this_month_hall_of_fame_messages")
+        user_with_most_all_time_hall_of_fame_messages = await server_user_repo.check_if_user_is_top_of_stat(
+            connection, user.id, interaction.guild.id, "total_hall_of_fame_messages")
 
     embed = discord.Embed(
         title=f"📊 {user.name}'s Server Profile",
@@ -132,11 +134,10 @@ async def user_server_profile(interaction, user, user_stats, connection, month_e
     await interaction.response.send_message(embed=embed)
 
 
-async def server_leaderboard(interaction, connection, month_emoji: str, all_time_emoji: str):
+async def server_leaderboard(interaction, month_emoji: str, all_time_emoji: str):
     """
     Command to get the Hall of Fame leaderboard for a server
     :param interaction:
-    :param connection:
     :param month_emoji:
     :param all_time_emoji:
     :return:
@@ -144,6 +145,12 @@ async def server_leaderboard(interaction, connection, month_emoji: str, all_time
     # Defer the interaction response to prevent timeout
     await interaction.response.defer()
 
+    async with database.connection() as connection:
+        top_monthly = await server_user_repo.get_top_users_by_stat(connection, interaction.guild_id, "this_month_hall_of_fame_messages", limit=5)
+        top_all_time = await server_user_repo.get_top_users_by_stat(connection, interaction.guild_id, "total_hall_of_fame_messages", limit=5)
+        top_monthly_reactions = await server_user_repo.get_top_users_by_stat(connection, interaction.guild_id, "this_month_hall_of_fame_message_reactions", limit=5)
+        top_all_time_reactions = await server_user_repo.get_top_users_by_stat(connection, interaction.guild_id, "total_hall_of_fame_message_reactions", limit=5)
+
     embed = discord.Embed(
         title=f"📊 {interaction.guild.name} Hall of Fame Leaderboard",
         description="Here are the top users in this server:",
@@ -154,7 +161,6 @@ async def server_leaderboard(interaction, connection, month_emoji: str, all_time
     leaderboard = ""
 
     # Top 5 This Month's Hall of Fame Messages
-    top_monthly = server_user_repo.get_top_users_by_stat(connection, interaction.guild_id, "this_month_hall_of_fame_messages", limit=5)
     leaderboard += f"{month_emoji} **Top 5 This Month's Hall of Fame Messages**\n"
     for rank, user in enumerate(top_monthly, start=1):
         try:
@@ -164,7 +170,6 @@ async def server_leaderboard(interaction, connection, month_emoji: str, all_time
             leaderboard += f"{rank}. Unknown Member: {user.get('this_month_hall_of_fame_messages', 0)} messages\n"
 
     # Top 5 All-Time Hall of Fame Messages
-    top_all_time = server_user_repo.get_top_users_by_stat(connection, interaction.guild_id, "total_hall_of_fame_messages", limit=5)
     leaderboard += f"\n{all_time_emoji} **Top 5 All-Time Hall of Fame Messages**\n"
     for rank, user in enumerate(top_all_time, start=1):
         try:
@@ -174,7 +179,6 @@ async def server_leaderboard(interaction, connection, month_emoji: str, all_time
             leaderboard += f"{rank}. Unknown Member: {user.get('total_hall_of_fame_messages', 0)} messages\n"
 
     # Top 5 This Month's Reactions
-    top_monthly_reactions = server_user_repo.get_top_users_by_stat(connection, interaction.guild_id, "this_month_hall_of_fame_message_reactions", limit=5)
     leaderboard += f"\n💬 **Top 5 This Month's Reactions**\n"
     for rank, user in enumerate(top_monthly_reactions, start=1):
         try:
@@ -184,7 +188,6 @@ async def server_leaderboard(interaction, connection, month_emoji: str, all_time
             leaderboard += f"{rank}. Unknown Member: {user.get('this_month_hall_of_fame_message_reactions', 0)} reactions\n"
 
     # Top 5 All-Time Reactions
-    top_all_time_reactions = server_user_repo.get_top_users_by_stat(connection, interaction.guild_id, "total_hall_of_fame_message_reactions", limit=5)
     leaderboard += f"\n💬 **Top 5 All-Time Reactions**\n"
     for rank, user in enumerate(top_all_time_reactions, start=1):
         try:
@@ -0,0 +1,65 @@
+import os
+import time
+from contextlib import asynccontextmanager
+import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+from classes.histogram import Histogram
+
+# The pool of the running bot, set by main.start_bot
+pool: AsyncConnectionPool | None = None
+# How long connections are held between checkout and return to the pool
+hold_times = Histogram()
+
+
+def get_conninfo(dev_test: bool = False) -> str:
+    """
+    Build the Postgres connection string from the environment
+    :param dev_test: Whether to connect to the local development database
+    :return: The connection string
+    """
+    return make_conninfo(
+        host=os.getenv('POSTGRES_HOST_LOCAL') if dev_test else os.getenv('POSTGRES_HOST'),
+        dbname=os.getenv('POSTGRES_DB_LOCAL') if dev_test else os.getenv('POSTGRES_DB'),
+        user=os.getenv('POSTGRES_USER'),
+        password=os.getenv('POSTGRES_PASSWORD'))
+
+
+def create_pool(dev_test: bool = False, max_size: int = 10, timeout: float = 60.0) -> AsyncConnectionPool:
+    """
+    Create the connection pool of the bot. The pool is opened by entering it with `async with` inside the
+    running event loop. Callers that find all connections in use wait in line for the next free one, and only
+    fail once they have waited `timeout` seconds.
+    :param dev_test: Whether to connect to the local development database
+    :param max_size: The maximum number of open connections
+    :param timeout: Seconds a caller waits for a free connection before failing
+    :return: The unopened connection pool
+    """
+    return AsyncConnectionPool(get_conninfo(dev_test), min_size=1, max_size=max_size, timeout=timeout, open=False)
+
+
+async def connect(dev_test: bool = False) -> psycopg.AsyncConnection:
+    """
+    Open a single connection for the standalone scripts that do not run a pool
+    :param dev_test: Whether to connect to the local development database
+    :return: The open connection
+    """
+    return await psycopg.AsyncConnection.connect(get_conninfo(dev_test))
+
+
+@asynccontextmanager
+async def connection():
+    """
+    Check out a connection from the pool for the duration of the block. The transaction is committed when the
+    block exits normally and rolled back when it raises. Keep the block to the statements themselves; awaiting
+    Discord inside it keeps the connection away from every other caller.
+    :return: The checked out connection
+    """
+    checked_out_at = None
+    try:
+        async with pool.connection() as conn:
+            checked_out_at = time.monotonic()
+            yield conn
+    finally:
+        if checked_out_at is not None:
+            hold_times.observe(time.monotonic() - checked_out_at)
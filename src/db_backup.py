@@ -3,8 +3,9 @@ from datetime import datetime
 import json
 from pymongo.mongo_client import MongoClient
 from dotenv import load_dotenv
-import psycopg2
-from repositories import hall_of_fame_message_repo, server_config_repo, server_user_repo, hof_wrapped_repo, hof_wrapped_guild_status_repo
+import asyncio
+import database
+import migrate
 
 
 def backup_database(db_client):
@@ -35,7 +36,7 @@ def backup_database(db_client):
             print(f"Database backup completed for collection {collection_name} in database {db_name}")
     print(f"Database backup completed in folder {backup_folder}")
 
-def convert_mongodb_to_postgresql(db_client, connection):
+async def convert_mongodb_to_postgresql(db_client, connection):
     """
     Convert MongoDB collections to Postgresql-compatible JSON files
     """
@@ -63,7 +64,7 @@ def convert_mongodb_to_postgresql(db_client, connection):
         reaction_count_calculation_method = server_config.get("reaction_count_calculation_method")
         hide_hof_post_below_threshold = server_config.get("hide_hof_post_below_threshold")
 
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO server_configs (
                 guild_id, hall_of_fame_channel_id, reaction_threshold, post_due_date, leaderboard_message_ids,
                 sweep_limit, sweep_limited, include_author_in_reaction_calculation, allow_messages_in_hof_channel,
@@ -88,7 +89,7 @@ def convert_mongodb_to_postgresql(db_client, connection):
         created_at = hof_message.get("created_at") or datetime(1970, 1, 1)
         video_link_message_id = hof_message.get("video_link_message_id")
 
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO hall_of_fame_message 
             (message_id, channel_id, guild_id, hall_of_fame_message_id, reaction_count, author_id, created_at, video_link_message_id)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
@@ -116,7 +117,7 @@ def convert_mongodb_to_postgresql(db_client, connection):
         monthly_message_rank = server_user.get("monthly_message_rank")
         this_month_hall_of_fame_message_reactions = server_user.get("this_month_hall_of_fame_message_reactions")
         total_hall_of_fame_message_reactions = server_user.get("total_hall_of_fame_message_reactions")
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO server_user 
             (user_id, guild_id, monthly_reaction_rank, total_message_rank, total_reaction_rank,
              this_month_hall_of_fame_messages, total_hall_of_fame_messages, monthly_message_rank,
@@ -136,27 +137,26 @@ def convert_mongodb_to_postgresql(db_client, connection):
               this_month_hall_of_fame_message_reactions, total_hall_of_fame_message_reactions)
         )
 
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
 
 # Todo: Implement a recurring job to back up data every 15 min, then every hour, then every day, etc.
 
+async def migrate_to_postgresql(db_client):
+    connection = await database.connect()
+    try:
+        await migrate.apply_migrations(connection)
+
+        await convert_mongodb_to_postgresql(db_client, connection)
+    finally:
+        await connection.close()
+
+
 if __name__ == "__main__":
     load_dotenv()
     mongo_uri = os.getenv('MONGODB_URI')
     client = MongoClient(mongo_uri)
     backup_database(client)
 
-    connection = psycopg2.connect(host=os.getenv('POSTGRES_HOST'),
-                                  database=os.getenv('POSTGRES_DB'),
-                                  user=os.getenv('POSTGRES_USER'),
-                                  password=os.getenv('POSTGRES_PASSWORD'))
-
-    hall_of_fame_message_repo.create_hall_of_fame_message_table(connection)
-    server_config_repo.create_server_config_table(connection)
-    server_user_repo.create_server_user_table(connection)
-    hof_wrapped_repo.create_hof_wrapped_table(connection)
-    hof_wrapped_guild_status_repo.create_hof_wrapped_progress_table(connection)
-
-    convert_mongodb_to_postgresql(client, connection)
+    asyncio.run(migrate_to_postgresql(client))
@@ -1,10 +1,13 @@
 import discord
 import asyncio
 import datetime
+import time
 import utils
+import database
 from translations import messages
-from enums import command_refs
-from repositories import server_config_repo, hall_of_fame_message_repo
+from enums import command_refs, log_type
+from classes.histogram import Histogram
+from repositories import hall_of_fame_message_repo
 
 
 async def post_wrapped():
@@ -18,13 +21,13 @@ async def post_wrapped():
         # disabled until tested for dynamic usage across multiple servers and refactored
         # await hof_wrapped.main(bot.get_guild(guild_id), collection, reaction_threshold, target_channel_id)
 
-async def check_for_new_server_classes(bot, connection):
+async def check_for_new_server_classes(bot, server_classes):
     new_server_classes = {}
     for guild in bot.guilds:
-        if not server_config_repo.check_if_guild_exists(connection, guild.id) and guild.me.guild_permissions.manage_channels:
+        if guild.id not in server_classes and guild.me.guild_permissions.manage_channels:
             await utils.logging(bot, f"Guild {guild.name} not found in database, creating...", guild.id)
             try:
-                new_server_class = await utils.create_database_context(bot, guild, connection)
+                new_server_class = await utils.create_database_context(bot, guild)
                 new_server_classes[guild.id] = new_server_class
             except Exception as e:
                 await utils.logging(bot, f"Failed to create database context for server {guild.name}: {e}", guild.id)
@@ -47,7 +50,7 @@ async def bot_login(bot: discord.Client, tree):
     await utils.logging(bot, f"Total servers: {len(bot.guilds)}")
 
 
-async def on_raw_reaction(message: discord.RawReactionActionEvent, bot: discord.Client, connection,
+async def on_raw_reaction(message: discord.RawReactionActionEvent, bot: discord.Client,
                           reaction_threshold: int, post_due_date: int, target_channel_id: int,
                           ignore_bot_messages: bool, hide_hof_post_below_threshold: bool,
                           require_image_or_video: bool = False):
@@ -55,7 +58,6 @@ async def on_raw_reaction(message: discord.RawReactionActionEvent, bot: discord.
     Event handler for when a reaction is added to a message
     :param message: The message that the reaction was removed from
     :param bot: The bot client
-    :param connection:
     :param reaction_threshold: The threshold for reactions
     :param post_due_date: The due date for posting
     :param target_channel_id: The target channel id
@@ -66,12 +68,14 @@ async def on_raw_reaction(message: discord.RawReactionActionEvent, bot: discord.
     """
 
     try:
-        await utils.validate_message(message, bot, connection, reaction_threshold, post_due_date,
+        await utils.validate_message(message, bot, reaction_threshold, post_due_date,
                                      target_channel_id, ignore_bot_messages, hide_hof_post_below_threshold, require_image_or_video)
     except Exception as e:
         if "Unknown Message" in str(e) or "object has no attribute" in str(e):
             return
-        if hall_of_fame_message_repo.find_hall_of_fame_message(connection, message.guild_id, message.channel_id, message.message_id):
+        async with database.connection() as connection:
+            db_message = await hall_of_fame_message_repo.find_hall_of_fame_message(connection, message.guild_id, message.channel_id, message.message_id)
+        if db_message:
             await utils.logging(bot, f"Error in reaction event: {e}", message.guild_id, validate_for_duplicates=True)
             return
 
@@ -94,17 +98,16 @@ async def on_message(message, target_channel_id, allow_messages_in_hof_channel):
     await msg.delete()
 
 
-async def guild_join(server, connection, bot, custom_channel: discord.TextChannel = None):
+async def guild_join(server, bot, custom_channel: discord.TextChannel = None):
     """
     Event handler for when the bot is added to a server
     :param server:
-    :param connection:
     :param bot:
     :param custom_channel: Optional custom channel ID for the Hall of Fame channel
     :return:
     """
     try:
-        return await utils.create_database_context(bot, server, connection, custom_channel)
+        return await utils.create_database_context(bot, server, custom_channel)
     except Exception as e:
         await utils.logging(bot, f"Failed to create database context for server {server.name}: {e}", server.id)
         await utils.send_message_to_highest_prio_channel(bot, server,
@@ -118,79 +121,112 @@ async def guild_remove(server, connection):
     :param connection:
     :return:
     """
-    utils.delete_database_context(server.id, connection)
+    await utils.delete_database_context(server.id, connection)
 
 
-async def daily_task(bot, connection, server_classes, dev_testing):
+async def daily_task(bot, server_classes, dev_testing, concurrency: int = 8):
     """
-    Daily task to check for updating the leaderboard
+    Daily task to update the leaderboards, user stats and check the Hall of Fame channel permissions. The per-guild
+    work runs for up to `concurrency` guilds at a time; the work of a single guild stays sequential, since its
+    leaderboard edits share the rate limit bucket of the Hall of Fame channel, and discord.py waits on the bucket
+    and global rate limits for every request it sends.
     :param bot:
-    :param connection:
     :param server_classes:
     :param dev_testing:
+    :param concurrency: The maximum number of guilds processed at the same time
     :return:
     """
     await utils.logging(bot, f"Starting daily task for {len(server_classes)} servers")
+    started_at = time.monotonic()
 
-    bot_guild_ids = [guild.id for guild in bot.guilds]
-    for server_class in list(server_classes.values()):
-        if server_class.guild_id not in bot_guild_ids or not server_config_repo.get_parameter_value(connection, server_class.guild_id, "leaderboard_setup"):
-            continue
-        try:
-            await utils.update_leaderboard(connection, bot, server_class)
-        except Exception as e:
-            await utils.logging(bot, f"Error updating leaderboard for server {server_class.guild_id}: {e}")
+    bot_guild_ids = {guild.id for guild in bot.guilds}
+    semaphore = asyncio.Semaphore(concurrency)
+    guild_durations = {}
+
+    async def run_guild(server_class):
+        async with semaphore:
+            guild_started_at = time.monotonic()
+            await daily_guild_task(bot, server_class)
+            guild_durations[server_class.guild_id] = time.monotonic() - guild_started_at
+
+    await asyncio.gather(*(run_guild(server_class) for server_class in list(server_classes.values())
+                           if server_class.guild_id in bot_guild_ids))
 
     await utils.logging(bot, f"Checking for db entries that are not in the guilds")
     for server in server_classes.values():
         if dev_testing:
             continue
-        if int(server.guild_id) not in [guild.id for guild in bot.guilds]:
+        if int(server.guild_id) not in bot_guild_ids:
             await utils.logging(bot, f"Could not find server {server.guild_id} in bot guilds")
     await utils.logging(bot, f"Checked {len(server_classes)} servers for daily task")
-    await update_user_database(bot, connection)
-    await check_write_permissions_to_hall_of_fame_channel(bot, server_classes)
+    await update_user_database(bot)
 
+    duration_histogram = Histogram(bounds=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+    for duration in guild_durations.values():
+        duration_histogram.observe(duration)
+    guild_duration_stats = ", ".join(f"{key}={value}" for key, value in duration_histogram.stats().items())
+    slowest_guilds = ", ".join(f"{guild_id}={duration:.1f}s" for guild_id, duration
+                               in sorted(guild_durations.items(), key=lambda item: item[1], reverse=True)[:5])
+    await utils.logging(bot, f"Daily task took {time.monotonic() - started_at:.1f}s for {len(guild_durations)} guilds "
+                             f"with concurrency {concurrency}\nGuild durations: {guild_duration_stats}\n"
+                             f"Slowest guilds: {slowest_guilds}", log_level=log_type.SYSTEM)
 
-async def check_write_permissions_to_hall_of_fame_channel(bot: discord.Client, server_classes):
+
+async def daily_guild_task(bot: discord.Client, server_class):
     """
-    Check if the bot has write permissions to the Hall of Fame channel for each server
+    The daily work of a single guild, errors are logged so they do not stop the other guilds
     :param bot: The bot client
-    :param server_classes: The server classes
+    :param server_class: The server class of the guild
     :return: None
     """
-    for server_class in list(server_classes.values()):
-        guild = bot.get_guild(server_class.guild_id)
-        if not guild:
-            continue
-        channel = guild.get_channel(server_class.hall_of_fame_channel_id)
-        if not channel:
-            await utils.logging(bot, f"Could not find Hall of Fame channel for server {guild.name}", guild.id)
-            # await utils.send_message_to_highest_prio_channel(bot, guild, messages.FAILED_TO_FIND_HOF_CHANNEL)
-            continue
-        missing_permissions = []
-        if not channel.permissions_for(guild.me).view_channel:
-            missing_permissions.append("View Channel")
-        if not channel.permissions_for(guild.me).send_messages:
-            missing_permissions.append("Send Messages")
-        if not channel.permissions_for(guild.me).read_message_history:
-            missing_permissions.append("Read Message History")
-        if not missing_permissions:
-            continue
-        channel_ref = f"<#{channel.id}>"
-        await utils.send_message_to_highest_prio_channel(bot, guild, messages.MISSING_HOF_CHANNEL_PERMISSIONS.format(
-                        missing_permissions=", ".join(missing_permissions), channel=channel_ref))
+    if server_class.leaderboard_setup:
+        try:
+            await utils.update_leaderboard(bot, server_class)
+        except Exception as e:
+            await utils.logging(bot, f"Error updating leaderboard for server {server_class.guild_id}: {e}")
+    try:
+        await check_write_permissions_to_hall_of_fame_channel(bot, server_class)
+    except Exception as e:
+        await utils.logging(bot, f"Error checking Hall of Fame channel permissions for server {server_class.guild_id}: {e}")
+
+
+async def check_write_permissions_to_hall_of_fame_channel(bot: discord.Client, server_class):
+    """
+    Check if the bot has write permissions to the Hall of Fame channel of a server
+    :param bot: The bot client
+    :param server_class: The server class
+    :return: None
+    """
+    guild = bot.get_guild(server_class.guild_id)
+    if not guild:
+        return
+    channel = guild.get_channel(server_class.hall_of_fame_channel_id)
+    if not channel:
+        await utils.logging(bot, f"Could not find Hall of Fame channel for server {guild.name}", guild.id)
+        # await utils.send_message_to_highest_prio_channel(bot, guild, messages.FAILED_TO_FIND_HOF_CHANNEL)
+        return
+    missing_permissions = []
+    if not channel.permissions_for(guild.me).view_channel:
+        missing_permissions.append("View Channel")
+    if not channel.permissions_for(guild.me).send_messages:
+        missing_permissions.append("Send Messages")
+    if not channel.permissions_for(guild.me).read_message_history:
+        missing_permissions.append("Read Message History")
+    if not missing_permissions:
+        return
+    channel_ref = f"<#{channel.id}>"
+    await utils.send_message_to_highest_prio_channel(bot, guild, messages.MISSING_HOF_CHANNEL_PERMISSIONS.format(
+                    missing_permissions=", ".join(missing_permissions), channel=channel_ref))
 
 
-async def update_user_database(bot: discord.Client, connection):
+async def update_user_database(bot: discord.Client):
     """
     Update the user database with the latest information
     :param bot: The bot client
-    :param connection: The database connection
     :return: None
     """
     try:
-        await utils.update_user_database(bot, connection)
+        await utils.update_user_database(bot)
         await utils.logging(bot, "User database updated successfully")
     except Exception as e:
         await utils.logging(bot, f"Failed to update user database: {e}")
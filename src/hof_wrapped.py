@@ -1,9 +1,12 @@
 import discord as discord
 import message_reactions
+from classes.reaction_store import MessageReactionState
+from classes.server_config_cache import ServerConfigCache
 from discord.ext import commands
 import datetime
 from repositories import hof_wrapped_repo, hall_of_fame_message_repo, server_config_repo, hof_wrapped_guild_status_repo
-import psycopg2
+import database
+import migrate
 import os
 from dotenv import load_dotenv
 import json
@@ -11,10 +14,6 @@ from constants import version
 from enums import command_refs
 
 load_dotenv()
-POSTGRES_HOST = os.getenv('POSTGRES_HOST')
-POSTGRES_DB = os.getenv('POSTGRES_DB')
-POSTGRES_USER = os.getenv('POSTGRES_USER')
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
 
 users = {}
 total_hall_of_fame_posts = 0
@@ -45,8 +44,8 @@ class User:
             return "No Hall of Fame posts yet. Participate to get featured!"
 
 
-def initialize_users(connection, guild_id: int):
-    for user_id in hall_of_fame_message_repo.find_members_for_guild(connection, guild_id):
+async def initialize_users(connection, guild_id: int):
+    for user_id in await hall_of_fame_message_repo.find_members_for_guild(connection, guild_id):
         users[user_id] = User(user_id)
 
 
@@ -56,7 +55,7 @@ async def process_message_reactions(message: discord.Message, connection):
     user_author = users[message.author.id]
     users_reacted = []
 
-    highest_reaction_count = await message_reactions.reaction_count(message, connection)
+    highest_reaction_count = message_reactions.reaction_count(await MessageReactionState.from_message(message))
     user_author.hallOfFameMessagePosts += 1
     total_hall_of_fame_posts += 1
 
@@ -101,7 +100,7 @@ async def process_message_reactions(message: discord.Message, connection):
 
 
 async def process_hof_messages_from_db(guild: discord.Guild, connection):
-    messages = hall_of_fame_message_repo.get_all_hall_of_fame_messages_for_guild(connection, guild.id)
+    messages = await hall_of_fame_message_repo.get_all_hall_of_fame_messages_for_guild(connection, guild.id)
     print("rows fetched from DB:", len(messages))
 
     for message in messages:
@@ -284,12 +283,10 @@ def get_user_rank(rankings: dict, user: User):
     return user_ranks
 
 
-def save_user_wrapped_to_db(guild_id, user, year):
-    connection = psycopg2.connect(host=POSTGRES_HOST, database=POSTGRES_DB, user=POSTGRES_USER, password=POSTGRES_PASSWORD)
-    cursor = connection.cursor()
+async def save_user_wrapped_to_db(connection, guild_id, user, year):
     # Ensure rankings is not None
     user_ranks = get_user_rank(rankings, user) if rankings is not None else {}
-    hof_wrapped_repo.insert_hof_wrapped(
+    await hof_wrapped_repo.insert_hof_wrapped(
         connection,
         guild_id=guild_id,
         user_id=user.id,
@@ -305,9 +302,6 @@ def save_user_wrapped_to_db(guild_id, user, year):
         users_fans=json.dumps(user.usersFans),
         user_ranks=json.dumps(user_ranks)
     )
-    connection.commit()
-    cursor.close()
-    connection.close()
 
 
 async def main(guild_id: int, bot: commands.Bot, get_reaction_threshold: int, connection):
@@ -318,13 +312,14 @@ async def main(guild_id: int, bot: commands.Bot, get_reaction_threshold: int, co
     print(f"Hall Of Fame Wrapped {version.WRAPPED_YEAR} is being prepared... 🎁")
     guild = bot.get_guild(guild_id)
 
-    initialize_users(connection, guild_id)
+    await ServerConfigCache().reload(connection, guild_id)
+    await initialize_users(connection, guild_id)
     await process_hof_messages_from_db(guild, connection)
 
     rankings = rank_stats(users)
 
     for user in users.values():
-        save_user_wrapped_to_db(guild.id, user, version.WRAPPED_YEAR)
+        await save_user_wrapped_to_db(connection, guild.id, user, version.WRAPPED_YEAR)
 
 def create_server_embed(guild, users):
     user_list = list(users)
@@ -441,11 +436,11 @@ async def post_server_wrapped_embed(guild, connection):
         print(f"Guild with ID {guild} not found.")
         return
 
-    hof_wrapped_data = hof_wrapped_repo.get_all_hof_wrapped_for_guild(connection, guild.id, version.WRAPPED_YEAR)
+    hof_wrapped_data = await hof_wrapped_repo.get_all_hof_wrapped_for_guild(connection, guild.id, version.WRAPPED_YEAR)
     embed = create_server_embed(guild, hof_wrapped_data)
 
     # hall of fame channel
-    hall_of_fame_channel_id = server_config_repo.get_parameter_value(connection, guild.id, "hall_of_fame_channel_id")
+    hall_of_fame_channel_id = await server_config_repo.get_parameter_value(connection, guild.id, "hall_of_fame_channel_id")
     post_channel = guild.get_channel(hall_of_fame_channel_id)
 
     if post_channel is None or not isinstance(post_channel, discord.TextChannel) or not post_channel.permissions_for(guild.me).send_messages:
@@ -472,13 +467,12 @@ if __name__ == "__main__":
         print(f'Logged in as {bot.user} (ID: {bot.user.id})')
         print('------')
 
-        connection = psycopg2.connect(host=POSTGRES_HOST, database=POSTGRES_DB, user=POSTGRES_USER, password=POSTGRES_PASSWORD)
-        hof_wrapped_repo.create_hof_wrapped_table(connection)
-        hof_wrapped_guild_status_repo.create_hof_wrapped_progress_table(connection)
+        connection = await database.connect()
+        await migrate.verify_schema(connection)
 
         for guild in bot.guilds:
-            message_count = hall_of_fame_message_repo.count_messages_for_guild(connection, guild.id)
-            hof_wrapped_guild_status_repo.create_progress_entry(connection, guild.id, version.WRAPPED_YEAR, message_count)
+            message_count = await hall_of_fame_message_repo.count_messages_for_guild(connection, guild.id)
+            await hof_wrapped_guild_status_repo.create_progress_entry(connection, guild.id, version.WRAPPED_YEAR, message_count)
 
         for guild in bot.guilds:
             # completion timer
@@ -488,21 +482,21 @@ if __name__ == "__main__":
             rankings = None
 
             print(f"Processing guild: {guild.name} (ID: {guild.id})")
-            if hof_wrapped_guild_status_repo.is_hof_wrapped_processed(connection, guild.id, version.WRAPPED_YEAR):
+            if await hof_wrapped_guild_status_repo.is_hof_wrapped_processed(connection, guild.id, version.WRAPPED_YEAR):
                 print(f"Hall Of Fame Wrapped already processed for guild {guild.id}, skipping...")
                 continue
             guild_id = guild.id
-            reaction_threshold = server_config_repo.get_parameter_value(connection, guild_id, "reaction_threshold")
+            reaction_threshold = await server_config_repo.get_parameter_value(connection, guild_id, "reaction_threshold")
 
             await main(guild_id, bot, reaction_threshold, connection)
             completion_time = datetime.datetime.now() - start_time
             print(f"Completed Hall Of Fame Wrapped for guild {guild.name} (ID: {guild.id}) in {completion_time.total_seconds()} seconds.")
 
-            if hall_of_fame_message_repo.count_messages_for_guild(connection, guild.id) > 0:
+            if await hall_of_fame_message_repo.count_messages_for_guild(connection, guild.id) > 0:
                 await post_server_wrapped_embed(guild, connection)
 
-            hof_wrapped_guild_status_repo.mark_hof_wrapped_as_processed(connection, guild.id, version.WRAPPED_YEAR, completion_time.total_seconds())
-        connection.close()
+            await hof_wrapped_guild_status_repo.mark_hof_wrapped_as_processed(connection, guild.id, version.WRAPPED_YEAR, completion_time.total_seconds())
+        await connection.close()
         await bot.close()
 
     print("Logging in the bot...")
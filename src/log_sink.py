@@ -0,0 +1,88 @@
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from datetime import timezone
+from enums import log_type
+
+LOG_FILE = os.getenv('LOG_FILE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "bot.jsonl")
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+# Fraction of the log messages of each type written to the sink, high-volume types are sampled
+SAMPLE_RATES = {
+    log_type.CRITICAL: 1.0,
+    log_type.SYSTEM: 1.0,
+    log_type.ERROR: 1.0,
+    log_type.COMMAND: 0.1,
+}
+
+_logger = logging.getLogger("hall_of_fame.sink")
+_logger.setLevel(logging.INFO)
+_logger.propagate = False
+_listener: logging.handlers.QueueListener | None = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            "time": datetime.datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "type": record.log_type,
+            "message": record.getMessage(),
+            "server_id": record.server_id,
+            "value": record.new_value,
+            "sample_rate": record.sample_rate,
+        }, default=str, ensure_ascii=False)
+
+
+def start(path: str = LOG_FILE, max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT):
+    """
+    Start writing the sink to a size-rotated JSON-lines file. Records are handed to a queue and written by the
+    listener thread, so logging never blocks the event loop on file I/O.
+    :param path: The path of the log file
+    :param max_bytes: The size at which the file is rotated
+    :param backup_count: The number of rotated files kept
+    :return: None
+    """
+    global _listener
+    if _listener is not None:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(JsonLinesFormatter())
+    records = queue.SimpleQueue()
+    _logger.addHandler(logging.handlers.QueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, file_handler)
+    _listener.start()
+
+
+def stop():
+    """
+    Write the records still queued and stop the listener thread
+    :return: None
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+    _listener = None
+
+
+def write(level: str, message, server_id=None, new_value=None):
+    """
+    Write a log message to the sink, subject to the sample rate of its log type
+    :param level: The log type of the message
+    :param message: The log message
+    :param server_id: The ID of the server
+    :param new_value: The new value of the server configuration
+    :return: None
+    """
+    sample_rate = SAMPLE_RATES.get(level, 1.0)
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    _logger.info("%s", message, extra={"log_type": level, "server_id": server_id, "new_value": new_value,
+                                       "sample_rate": sample_rate})
@@ -10,19 +10,31 @@ import utils
 from constants import version
 from enums import command_refs, log_type, calculation_method_type
 from classes.bot_stats import BotStats
+from classes.emoji_whitelist import emoji_key
+from classes.reaction_admission import ReactionAdmission
+from classes.reaction_count_buffer import ReactionCountBuffer
+from classes.embed_hashes import EmbedHashes
+from classes.edit_scheduler import EditScheduler
+from classes.daily_post_counter import DailyPostCounter
+from classes.post_rate_limiter import PostRateLimiter
+from classes.log_shipper import LogShipper
+from classes.message_cache import MessageCache
+from classes.reaction_scheduler import ReactionScheduler
+from classes.reaction_store import ReactionStore
+from classes.server_config_cache import ServerConfigCache
 from api_services import topgg_api, discordbotlist_api
 import os
 from translations import messages
-import psycopg2
-from psycopg2 import pool
+import database
+import log_sink
+import migrate
 from repositories import (
     server_config_repo,
     hall_of_fame_message_repo,
     server_user_repo,
     hof_wrapped_repo,
-    hof_wrapped_guild_status_repo,
     guild_lifecycle_event_repo,
-    guild_monthly_snapshot_repo,
+    message_reactor_repo,
 )
 import hof_wrapped
 from contextlib import asynccontextmanager
@@ -31,34 +43,17 @@ import asyncio
 
 load_dotenv()
 dev_test = os.getenv('DEV_TEST') == "True"
-if dev_test:
-    TOKEN = os.getenv('DEV_KEY')
-    connection_pool = psycopg2.pool.SimpleConnectionPool(
-        minconn=1,
-        maxconn=10,
-        host=os.getenv('POSTGRES_HOST_LOCAL'),
-        database=os.getenv('POSTGRES_DB_LOCAL'),
-        user=os.getenv('POSTGRES_USER'),
-        password=os.getenv('POSTGRES_PASSWORD'))
-else:
-    TOKEN = os.getenv('KEY')
-    connection_pool = psycopg2.pool.SimpleConnectionPool(
-        minconn=1,
-        maxconn=10,
-        host=os.getenv('POSTGRES_HOST'),
-        database=os.getenv('POSTGRES_DB'),
-        user=os.getenv('POSTGRES_USER'),
-        password=os.getenv('POSTGRES_PASSWORD'))
+TOKEN = os.getenv('DEV_KEY') if dev_test else os.getenv('KEY')
 topgg_api_key = os.getenv('TOPGG_API_KEY')
+daily_task_concurrency = int(os.getenv('DAILY_TASK_CONCURRENCY', 8))
 
-messages_processing = []
 daily_command_cooldowns = {}
 
 intents = discord.Intents.default()
 intents.message_content = True
 bot = discord_commands.Bot(command_prefix="/", intents=intents)
 tree = bot.tree
-server_classes = {}
+server_classes = ServerConfigCache()
 bot_stats = BotStats()
 
 month_emoji = "<:month_most_hof_messages:1380272332609683517>" if not dev_test else "<:month_most_hof_messages:1380272983368532160>"
@@ -69,33 +64,35 @@ def bot_is_loaded():
     return bot_loaded
 
 @asynccontextmanager
-async def get_db_connection(connection_pool):
-    conn = connection_pool.getconn()
+async def get_db_connection():
     try:
-        try:
+        async with database.connection() as conn:
             yield conn
-            conn.commit()
-        except Exception as e:
-            await utils.logging(bot, f"Database error: {e}", log_level=log_type.CRITICAL)
-            raise
-    finally:
-        connection_pool.putconn(conn)
+    except Exception as e:
+        await utils.logging(bot, f"Database error: {e}", log_level=log_type.CRITICAL)
+        raise
 
 @bot.event
 async def on_ready():
-    global server_classes
     global bot_loaded
 
+    # on_ready follows every new gateway session, reaction and edit events missed since the last one are not replayed
+    reaction_store.reset()
+    message_cache.clear()
     try:
         version.DATE = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         await events.bot_login(bot, tree)
         await utils.logging(bot, f"Logged in as {bot.user}", log_level=log_type.SYSTEM, validate_for_duplicates=False)
 
         try:
-            async with get_db_connection(connection_pool) as connection:
-                setup_databases(connection)
-                server_classes = server_config_repo.get_server_classes(connection)
-                new_server_classes_dict = await events.check_for_new_server_classes(bot, connection)
+            async with get_db_connection() as connection:
+                await migrate.verify_schema(connection)
+                await server_classes.reload(connection)
+                reaction_admission.load_hall_of_fame_message_ids(await hall_of_fame_message_repo.get_hall_of_fame_message_ids_by_guild(connection))
+                daily_post_counter.load(await hall_of_fame_message_repo.get_message_counts_today_by_guild(connection))
+                await message_reactor_repo.delete_inactive_reactor_sets(connection)
+                reaction_store.load_persisted(await message_reactor_repo.get_active_reactor_sets(connection))
+            new_server_classes_dict = await events.check_for_new_server_classes(bot, server_classes)
         except Exception as e:
             await utils.logging(bot, f"Error setting up databases or loading server classes: {e}", log_level=log_type.CRITICAL)
             return
@@ -109,6 +106,7 @@ async def on_ready():
 
         await events.post_wrapped()
         daily_task.start()
+        flush_reaction_counts.start()
 
         # Ensure commands are registered
         await tree.sync()
@@ -120,78 +118,134 @@ async def on_ready():
 async def daily_task():
     await utils.logging(bot, "Running daily task")
     try:
-        async with get_db_connection(connection_pool) as connection:
-            await events.daily_task(bot, connection, server_classes, dev_test)
+        await events.daily_task(bot, server_classes, dev_test, daily_task_concurrency)
 
-            # Run snapshot work in thread executor to avoid blocking the event loop
-            await asyncio.to_thread(monthly_guild_snapshot.run_monthly_snapshot, connection, bot.guilds)
+        async with get_db_connection() as connection:
+            await monthly_guild_snapshot.run_monthly_snapshot(connection, bot.guilds)
 
         await utils.logging(bot, f"Daily task completed")
     except Exception as e:
         await utils.logging(bot, f"Error in daily_task: {e}")
 
+    await log_runtime_stats()
     daily_command_cooldowns.clear()
     total_server_members = sum(server.member_count for server in bot.guilds)
     await bot.change_presence(activity=discord.CustomActivity(name=f'🏆 Hall of Fame - {total_server_members} users', type=5))
     await post_api_bot_stats()
 
-def setup_databases(connection):
-    print("Setting up databases...")
-    print("Creating server config table...")
-    server_config_repo.create_server_config_table(connection)
-    print("Creating hall of fame message table...")
-    hall_of_fame_message_repo.create_hall_of_fame_message_table(connection)
-    print("Creating server user table...")
-    server_user_repo.create_server_user_table(connection)
-    print("Creating hof wrapped table...")
-    hof_wrapped_repo.create_hof_wrapped_table(connection)
-    print("Creating hof wrapped guild status table...")
-    hof_wrapped_guild_status_repo.create_hof_wrapped_progress_table(connection)
-    print("Creating guild lifecycle event table...")
-    guild_lifecycle_event_repo.create_guild_lifecycle_event_table(connection)
-    print("Creating guild monthly snapshot table...")
-    guild_monthly_snapshot_repo.create_guild_monthly_snapshot_table(connection)
+@tasks.loop(seconds=5)
+async def flush_reaction_counts():
+    try:
+        await utils.flush_reaction_counts()
+    except Exception as e:
+        await utils.logging(bot, f"Error flushing reaction counts: {e}", log_level=log_type.CRITICAL)
+    try:
+        await utils.flush_reactor_sets()
+    except Exception as e:
+        await utils.logging(bot, f"Error flushing reactor sets: {e}", log_level=log_type.CRITICAL)
 
-@bot.event
-async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
-    if payload.guild_id not in server_classes or payload.member is not None and payload.member.bot:
+async def log_runtime_stats():
+    """
+    Log the counters of the in-memory reaction pipeline
+    """
+    scheduler_stats = ", ".join(f"{key}={value}" for key, value in reaction_scheduler.stats().items())
+    await utils.logging(bot, f"Reaction scheduler: {scheduler_stats}", log_level=log_type.SYSTEM)
+    store_stats = ", ".join(f"{key}={value}" for key, value in reaction_store.stats().items())
+    await utils.logging(bot, f"Reaction store: {store_stats}", log_level=log_type.SYSTEM)
+    admission_stats = ", ".join(f"{key}={value}" for key, value in reaction_admission.stats().items())
+    await utils.logging(bot, f"Reaction admission: {admission_stats}", log_level=log_type.SYSTEM)
+    count_buffer_stats = ", ".join(f"{key}={value}" for key, value in reaction_count_buffer.stats().items())
+    await utils.logging(bot, f"Reaction count buffer: {count_buffer_stats}", log_level=log_type.SYSTEM)
+    embed_hash_stats = ", ".join(f"{key}={value}" for key, value in embed_hashes.stats().items())
+    await utils.logging(bot, f"Hall of Fame post edits: {embed_hash_stats}", log_level=log_type.SYSTEM)
+    edit_scheduler_stats = ", ".join(f"{key}={value}" for key, value in edit_scheduler.stats().items())
+    await utils.logging(bot, f"Edit scheduler: {edit_scheduler_stats}", log_level=log_type.SYSTEM)
+    post_rate_limiter_stats = ", ".join(f"{key}={value}" for key, value in post_rate_limiter.stats().items())
+    queue_depths = ", ".join(f"{guild_id}={depth}" for guild_id, depth in post_rate_limiter.queue_depths().items())
+    await utils.logging(bot, f"Post rate limiter: {post_rate_limiter_stats}\nQueued posts per guild: {queue_depths or 'none'}",
+                        log_level=log_type.SYSTEM)
+    log_shipper_stats = ", ".join(f"{key}={value}" for key, value in log_shipper.stats().items())
+    await utils.logging(bot, f"Log shipper: {log_shipper_stats}", log_level=log_type.SYSTEM)
+    message_cache_stats = ", ".join(f"{key}={value}" for key, value in message_cache.stats().items())
+    await utils.logging(bot, f"Message cache: {message_cache_stats}", log_level=log_type.SYSTEM)
+    hold_time_stats = ", ".join(f"{key}={value}" for key, value in database.hold_times.stats().items())
+    await utils.logging(bot, f"Connection hold times: {hold_time_stats}", log_level=log_type.SYSTEM)
+
+async def evaluate_reaction_event(payload: discord.RawReactionActionEvent):
+    """
+    Evaluate the latest reaction state of a message, called by the reaction scheduler once a burst has settled
+    :param payload: The latest raw reaction event for the message
+    :return: None
+    """
+    if payload.guild_id not in server_classes:
         return
     try:
         server_class = server_classes[payload.guild_id]
-
-        if payload.message_id not in messages_processing:
-            messages_processing.append(payload.message_id)
-            async with get_db_connection(connection_pool) as connection:
-                await events.on_raw_reaction(payload, bot, connection, server_class.reaction_threshold,
-                                             server_class.post_due_date, server_class.hall_of_fame_channel_id,
-                                             server_class.ignore_bot_messages, server_class.hide_hof_post_below_threshold,
-                                             server_class.require_image_or_video)
-            messages_processing.remove(payload.message_id)
+        await events.on_raw_reaction(payload, bot, server_class.reaction_threshold,
+                                     server_class.post_due_date, server_class.hall_of_fame_channel_id,
+                                     server_class.ignore_bot_messages, server_class.hide_hof_post_below_threshold,
+                                     server_class.require_image_or_video)
     except Exception as e:
-        await utils.logging(bot, f"Error in on_raw_reaction_add: {e}", payload.guild_id, validate_for_duplicates=True)
-        if payload.message_id in messages_processing:
-            messages_processing.remove(payload.message_id)
+        await utils.logging(bot, f"Error in reaction evaluation: {e}", payload.guild_id, validate_for_duplicates=True)
+
+reaction_scheduler = ReactionScheduler(evaluate_reaction_event)
+reaction_store = ReactionStore()
+reaction_admission = ReactionAdmission()
+reaction_count_buffer = ReactionCountBuffer()
+embed_hashes = EmbedHashes()
+edit_scheduler = EditScheduler()
+daily_post_counter = DailyPostCounter()
+edit_scheduler.min_interval = float(os.getenv('HOF_EDIT_INTERVAL', 5))
+post_rate_limiter = PostRateLimiter()
+post_rate_limiter.burst = int(os.getenv('HOF_POST_BURST', 10))
+post_rate_limiter.refill_per_hour = float(os.getenv('HOF_POST_REFILL_PER_HOUR', 20))
+# Queued posts are released as the bucket refills, a guild could otherwise never post again
+if post_rate_limiter.burst < 1 or post_rate_limiter.refill_per_hour <= 0:
+    raise ValueError("HOF_POST_BURST must be at least 1 and HOF_POST_REFILL_PER_HOUR above zero")
+log_shipper = LogShipper()
+message_cache = MessageCache()
+message_cache.max_messages = int(os.getenv('MESSAGE_CACHE_SIZE', 5000))
+message_cache.ttl = float(os.getenv('MESSAGE_CACHE_TTL', 300))
+
+@bot.event
+async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
+    if payload.guild_id not in server_classes:
+        return
+    reaction_store.apply_event(payload)
+    if payload.member is not None and payload.member.bot:
+        return
+    if not reaction_admission.admit(payload):
+        return
+    reaction_scheduler.schedule(payload)
 
 
 @bot.event
 async def on_raw_reaction_remove(payload: discord.RawReactionActionEvent):
-    if payload.guild_id not in server_classes or payload.member is not None and payload.member.bot:
+    if payload.guild_id not in server_classes:
         return
-    try:
-        server_class = server_classes[payload.guild_id]
+    reaction_store.apply_event(payload)
+    if not reaction_admission.admit(payload):
+        return
+    reaction_scheduler.schedule(payload)
 
-        if payload.message_id not in messages_processing:
-            messages_processing.append(payload.message_id)
-            async with get_db_connection(connection_pool) as connection:
-                await events.on_raw_reaction(payload, bot, connection, server_class.reaction_threshold,
-                                             server_class.post_due_date, server_class.hall_of_fame_channel_id,
-                                             server_class.ignore_bot_messages, server_class.hide_hof_post_below_threshold,
-                                             server_class.require_image_or_video)
-            messages_processing.remove(payload.message_id)
-    except Exception as e:
-        await utils.logging(bot, f"Error in on_raw_reaction_remove: {e}", payload.guild_id, validate_for_duplicates=True)
-        if payload.message_id in messages_processing:
-            messages_processing.remove(payload.message_id)
+@bot.event
+async def on_raw_reaction_clear(payload: discord.RawReactionClearEvent):
+    reaction_store.clear(payload.message_id)
+
+@bot.event
+async def on_raw_reaction_clear_emoji(payload: discord.RawReactionClearEmojiEvent):
+    reaction_store.clear(payload.message_id, str(payload.emoji))
+
+@bot.event
+async def on_raw_message_edit(payload: discord.RawMessageUpdateEvent):
+    message_cache.invalidate(payload.channel_id, payload.message_id)
+    reaction_store.forget(payload.message_id)
+
+@bot.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    message_cache.invalidate(payload.channel_id, payload.message_id)
+    reaction_store.forget(payload.message_id, deleted=True)
+    reaction_admission.remove_hall_of_fame_message(payload.guild_id, payload.message_id)
 
 @bot.event
 async def on_message(message: discord.Message):
@@ -219,10 +273,11 @@ async def on_guild_join(server):
     await utils.post_server_perms(bot, server)
 
     try:
-        async with get_db_connection(connection_pool) as connection:
-            server_config_repo.insert_server_config(connection, server.id)
-            new_server_class = await events.guild_join(server, connection, bot)
-            guild_lifecycle_event_repo.insert_guild_lifecycle_event(
+        async with get_db_connection() as connection:
+            await server_config_repo.insert_server_config(connection, server.id)
+        new_server_class = await events.guild_join(server, bot)
+        async with get_db_connection() as connection:
+            await guild_lifecycle_event_repo.insert_guild_lifecycle_event(
                 connection, server.id, "JOIN", datetime.now(timezone.utc)
             )
     except Exception as e:
@@ -240,13 +295,14 @@ async def on_guild_remove(server):
     if server_classes is None or server.id not in server_classes:
         return
     await utils.logging(bot, f"Left server {server.name}", server.id, log_level=log_type.SYSTEM)
-    async with get_db_connection(connection_pool) as connection:
+    async with get_db_connection() as connection:
         await events.guild_remove(server, connection)
-        guild_lifecycle_event_repo.insert_guild_lifecycle_event(
+        await guild_lifecycle_event_repo.insert_guild_lifecycle_event(
             connection, server.id, "LEAVE", datetime.now(timezone.utc)
         )
     if server.id in server_classes:
         del server_classes[server.id]
+    reaction_admission.forget_guild(server.id)
     await post_api_bot_stats()
 
 @tree.command(name="help", description="List of commands")
@@ -264,9 +320,7 @@ async def configure_bot(interaction: discord.Interaction, reaction_threshold: in
         return
     reaction_threshold = reaction_threshold if reaction_threshold > 0 else 1
 
-    async with get_db_connection(connection_pool) as connection:
-        await commands.set_reaction_threshold(interaction, reaction_threshold, connection)
-    server_classes[interaction.guild_id].reaction_threshold = reaction_threshold
+    await commands.set_reaction_threshold(interaction, reaction_threshold)
     await utils.logging(bot, f"Reaction threshold configure command used by {interaction.user.name} in {interaction.guild.name}",
                         interaction.guild.id, reaction_threshold, log_level=log_type.COMMAND)
 
@@ -281,9 +335,8 @@ async def include_author_own_reaction_in_threshold(interaction: discord.Interact
 
     if not await check_if_user_has_manage_server_permission(interaction):
         return
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "include_author_in_reaction_calculation", include, connection)
-    server_classes[interaction.guild_id].include_author_in_reaction_calculation = include
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "include_author_in_reaction_calculation", include)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(messages.AUTHOR_REACTION_INCLUDED.format(include=include))
     await utils.logging(bot, f"Include author's own reaction in threshold command used by {interaction.user.name} in {interaction.guild.name}",
@@ -297,9 +350,8 @@ async def allow_messages_in_hof_channel(interaction: discord.Interaction, allow:
     if not await check_if_user_has_manage_server_permission(interaction):
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "allow_messages_in_hof_channel", allow, connection)
-    server_classes[interaction.guild_id].allow_messages_in_hof_channel = allow
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "allow_messages_in_hof_channel", allow)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(messages.ALLOW_POST_IN_HOF.format(allow=allow))
     await utils.logging(bot, f"Allow messages in Hall of Fame channel command used by {interaction.user.name} in {interaction.guild.name}",
@@ -313,9 +365,8 @@ async def require_image_or_video(interaction: discord.Interaction, require: bool
     if not await check_if_user_has_manage_server_permission(interaction):
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "require_image_or_video", require, connection)
-    server_classes[interaction.guild_id].require_image_or_video = require
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "require_image_or_video", require)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(f"Require image or video set to {require}")
     await utils.logging(bot, f"Require image or video command used by {interaction.user.name} in {interaction.guild.name}",
@@ -347,9 +398,8 @@ async def custom_emoji_check_logic(interaction: discord.Interaction, config_opti
     if config_option.value == "whitelisted_emojis":
         custom_emoji_check = True
 
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "custom_emoji_check_logic", custom_emoji_check, connection)
-    server_classes[interaction.guild_id].custom_emoji_check_logic = custom_emoji_check
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "custom_emoji_check_logic", custom_emoji_check)
 
     response = f"Custom emoji check logic set to {config_option.name}"
     if config_option.value == "whitelisted_emojis":
@@ -378,18 +428,17 @@ async def whitelist_emoji(interaction: discord.Interaction, emoji: str):
         await interaction.response.send_message(messages.INVALID_EMOJI_FORMAT)
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        whitelist = server_config_repo.get_parameter_value(connection, interaction.guild_id, "whitelisted_emojis")
+    whitelist = list(server_class.whitelisted_emojis or [])
 
-        if emoji not in whitelist:
-            whitelist.append(emoji)
-            server_config_repo.update_server_config_param(interaction.guild_id, "whitelisted_emojis", whitelist, connection)
-            server_class.whitelisted_emojis = whitelist
-            # noinspection PyUnresolvedReferences
-            await interaction.response.send_message(messages.WHITELIST_ADDED.format(emoji=emoji))
-        else:
-            # noinspection PyUnresolvedReferences
-            await interaction.response.send_message(messages.WHITELIST_ALREADY_EXISTS.format(emoji=emoji))
+    if emoji_key(emoji) not in server_class.whitelisted_emoji_keys:
+        whitelist.append(emoji)
+        async with get_db_connection() as connection:
+            await server_classes.update_parameter(connection, interaction.guild_id, "whitelisted_emojis", whitelist)
+        # noinspection PyUnresolvedReferences
+        await interaction.response.send_message(messages.WHITELIST_ADDED.format(emoji=emoji))
+    else:
+        # noinspection PyUnresolvedReferences
+        await interaction.response.send_message(messages.WHITELIST_ALREADY_EXISTS.format(emoji=emoji))
     await utils.logging(bot, f"Whitelist emoji command used by {interaction.user.name} in {interaction.guild.name}",
                         interaction.guild.id, emoji, log_level=log_type.COMMAND)
 
@@ -410,18 +459,17 @@ async def unwhitelist_emoji(interaction: discord.Interaction, emoji: str):
         await interaction.response.send_message(messages.CUSTOM_EMOJI_CHECK_DISABLED)
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        whitelist = server_config_repo.get_parameter_value(connection, interaction.guild_id, "whitelisted_emojis")
+    whitelist = list(server_class.whitelisted_emojis or [])
 
-        if emoji in whitelist:
-            whitelist.remove(emoji)
-            server_config_repo.update_server_config_param(interaction.guild_id, "whitelisted_emojis", whitelist, connection)
-            server_class.whitelisted_emojis = whitelist
-            # noinspection PyUnresolvedReferences
-            await interaction.response.send_message(messages.WHITELIST_REMOVED.format(emoji=emoji))
-        else:
-            # noinspection PyUnresolvedReferences
-            await interaction.response.send_message(messages.WHITELIST_NOT_FOUND.format(emoji=emoji))
+    if emoji_key(emoji) in server_class.whitelisted_emoji_keys:
+        whitelist = [whitelisted for whitelisted in whitelist if emoji_key(str(whitelisted)) != emoji_key(emoji)]
+        async with get_db_connection() as connection:
+            await server_classes.update_parameter(connection, interaction.guild_id, "whitelisted_emojis", whitelist)
+        # noinspection PyUnresolvedReferences
+        await interaction.response.send_message(messages.WHITELIST_REMOVED.format(emoji=emoji))
+    else:
+        # noinspection PyUnresolvedReferences
+        await interaction.response.send_message(messages.WHITELIST_NOT_FOUND.format(emoji=emoji))
     await utils.logging(bot, f"Unwhitelist emoji command used by {interaction.user.name} in {interaction.guild.name}",
                         interaction.guild.id, emoji, log_level=log_type.COMMAND)
 
@@ -439,9 +487,8 @@ async def clear_whitelist(interaction: discord.Interaction):
         await interaction.response.send_message(messages.CUSTOM_EMOJI_CHECK_DISABLED)
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "whitelisted_emojis", [], connection)
-    server_class.whitelisted_emojis = []
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "whitelisted_emojis", [])
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(messages.WHITELIST_CLEARED)
     await utils.logging(bot, f"Clear whitelist command used by {interaction.user.name} in {interaction.guild.name}",
@@ -482,9 +529,8 @@ async def set_post_due_date(interaction: discord.Interaction, post_due_date: int
     if not await check_if_user_has_manage_server_permission(interaction):
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "post_due_date", post_due_date, connection)
-    server_classes[interaction.guild_id].post_due_date = post_due_date
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "post_due_date", post_due_date)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(messages.POST_DUE_DATE_SET.format(post_due_date=post_due_date))
     await utils.logging(bot, f"Set post due date command used by {interaction.user.name} in {interaction.guild.name}",
@@ -505,9 +551,8 @@ async def ignore_bot_messages(interaction: discord.Interaction, should_ignore_bo
     if not await check_if_user_has_manage_server_permission(interaction):
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "ignore_bot_messages", should_ignore_bot_messages, connection)
-    server_classes[interaction.guild_id].ignore_bot_messages = should_ignore_bot_messages
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "ignore_bot_messages", should_ignore_bot_messages)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(messages.IGNORE_BOT_MESSAGES.format(should_ignore_bot_messages=should_ignore_bot_messages))
     await utils.logging(bot, f"Ignore bot messages command used by {interaction.user.name} in {interaction.guild.name}",
@@ -528,9 +573,8 @@ async def calculation_method(interaction: discord.Interaction, method: app_comma
     if not await check_if_user_has_manage_server_permission(interaction):
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "reaction_count_calculation_method", method.value, connection)
-    server_classes[interaction.guild_id].reaction_count_calculation_method = method.value
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "reaction_count_calculation_method", method.value)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(f"Reaction count calculation method set to {method.name}")
     await utils.logging(bot, f"Calculation method command used by {interaction.user.name} in {interaction.guild.name}",
@@ -550,9 +594,8 @@ async def hide_hall_of_fame_posts_when_they_are_below_threshold(interaction: dis
     if not await check_if_user_has_manage_server_permission(interaction):
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        server_config_repo.update_server_config_param(interaction.guild_id, "hide_hof_post_below_threshold", hide, connection)
-    server_classes[interaction.guild_id].hide_hof_post_below_threshold = hide
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "hide_hof_post_below_threshold", hide)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(f"Hide hall of fame posts when they are below the threshold set to {hide}")
     await utils.logging(bot, f"Hide hall of fame posts command used by {interaction.user.name} in {interaction.guild.name}",
@@ -570,8 +613,8 @@ async def user_server_profile(interaction: discord.Interaction, specific_user: d
         return
 
     user = specific_user or interaction.user
-    async with get_db_connection(connection_pool) as connection:
-        user_stats = server_user_repo.get_server_user(connection, user.id, interaction.guild_id)
+    async with get_db_connection() as connection:
+        user_stats = await server_user_repo.get_server_user(connection, user.id, interaction.guild_id)
 
     if user_stats is None:
         # noinspection PyUnresolvedReferences
@@ -580,8 +623,7 @@ async def user_server_profile(interaction: discord.Interaction, specific_user: d
                             interaction.guild.id, str(user.id), log_level=log_type.COMMAND)
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        await commands.user_server_profile(interaction, user, user_stats, connection, month_emoji, all_time_emoji)
+    await commands.user_server_profile(interaction, user, user_stats, month_emoji, all_time_emoji)
     await utils.logging(bot, f"Get user server profile command used by {interaction.user.name} in {interaction.guild.name}",
                         interaction.guild.id, str(user.id), log_level=log_type.COMMAND)
 
@@ -600,23 +642,22 @@ async def leaderboard(interaction: discord.Interaction):
         await interaction.response.send_message(messages.ERROR_SERVER_NOT_SETUP)
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        if interaction.user.id in daily_command_cooldowns and "leaderboard" in daily_command_cooldowns[interaction.user.id]:
-            # noinspection PyUnresolvedReferences
-            await interaction.response.send_message(messages.COMMAND_ON_COOLDOWN)
-            await utils.logging(bot, f"Leaderboard command on cooldown for {interaction.user.name} in {interaction.guild.name}",
-                                interaction.guild.id, log_level=log_type.COMMAND)
-            return
+    if interaction.user.id in daily_command_cooldowns and "leaderboard" in daily_command_cooldowns[interaction.user.id]:
+        # noinspection PyUnresolvedReferences
+        await interaction.response.send_message(messages.COMMAND_ON_COOLDOWN)
+        await utils.logging(bot, f"Leaderboard command on cooldown for {interaction.user.name} in {interaction.guild.name}",
+                            interaction.guild.id, log_level=log_type.COMMAND)
+        return
 
-        if interaction.user.id not in daily_command_cooldowns:
-            daily_command_cooldowns[interaction.user.id] = []
-        daily_command_cooldowns[interaction.user.id].append("leaderboard")
+    if interaction.user.id not in daily_command_cooldowns:
+        daily_command_cooldowns[interaction.user.id] = []
+    daily_command_cooldowns[interaction.user.id].append("leaderboard")
 
-        try:
-            await commands.server_leaderboard(interaction, connection, month_emoji, all_time_emoji)
-        except Exception as e:
-            await utils.logging(bot, f"Error in leaderboard command: {e}", interaction.guild_id)
-            return
+    try:
+        await commands.server_leaderboard(interaction, month_emoji, all_time_emoji)
+    except Exception as e:
+        await utils.logging(bot, f"Error in leaderboard command: {e}", interaction.guild_id)
+        return
 
     await utils.logging(bot, f"Leaderboard command used by {interaction.user.name} in {interaction.guild.name}",
                         interaction.guild.id, log_level=log_type.COMMAND)
@@ -649,17 +690,16 @@ async def set_hall_of_fame_channel(interaction: discord.Interaction, channel: di
                                  interaction.guild.id, str(channel.id), log_level=log_type.COMMAND)
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        if interaction.guild_id not in server_classes or server_classes[interaction.guild_id] is None or server_config_repo.check_if_guild_exists(connection, interaction.guild_id) is False:
-            new_server_class = await events.guild_join(interaction.guild, connection, bot, channel)
-            if new_server_class is None:
-                return
-            server_classes[interaction.guild_id] = new_server_class
-        else:
-            server_class = server_classes[interaction.guild_id]
-            server_class.hall_of_fame_channel_id = channel.id
+    async with get_db_connection() as connection:
+        guild_exists = await server_config_repo.check_if_guild_exists(connection, interaction.guild_id)
+    if interaction.guild_id not in server_classes or server_classes[interaction.guild_id] is None or guild_exists is False:
+        new_server_class = await events.guild_join(interaction.guild, bot, channel)
+        if new_server_class is None:
+            return
+        server_classes[interaction.guild_id] = new_server_class
 
-        server_config_repo.update_server_config_param(interaction.guild_id, "hall_of_fame_channel_id", channel.id, connection)
+    async with get_db_connection() as connection:
+        await server_classes.update_parameter(connection, interaction.guild_id, "hall_of_fame_channel_id", channel.id)
 
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(f"Hall of Fame channel set to {channel.mention}")
@@ -676,8 +716,8 @@ async def hof_wrapped_command(interaction: discord.Interaction):
         await interaction.response.send_message("Server is not set up for Hall of Fame yet.")
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        user_wrapped = hof_wrapped_repo.get_hof_wrapped(connection, interaction.guild_id, interaction.user.id, version.WRAPPED_YEAR)
+    async with get_db_connection() as connection:
+        user_wrapped = await hof_wrapped_repo.get_hof_wrapped(connection, interaction.guild_id, interaction.user.id, version.WRAPPED_YEAR)
     if user_wrapped is None:
         # noinspection PyUnresolvedReferences
         await interaction.response.send_message(f"No Hall of Fame Wrapped data available for you in {version.WRAPPED_YEAR}. Participate more in Hall of Fame to get your wrapped next year!")
@@ -702,12 +742,12 @@ async def server_hof_wrapped_command(interaction: discord.Interaction):
         await interaction.response.send_message("Server is not set up for Hall of Fame yet.")
         return
 
-    async with get_db_connection(connection_pool) as connection:
-        if not hof_wrapped_repo.check_if_guild_wrapped_data_exists(connection, interaction.guild_id, version.WRAPPED_YEAR):
-            # noinspection PyUnresolvedReferences
-            await interaction.response.send_message(f"No Hall of Fame Wrapped data available for {version.WRAPPED_YEAR}. The bot will start collecting data for next year's wrapped!")
-            return
-        all_users_wrapped = hof_wrapped_repo.get_all_hof_wrapped_for_guild(connection, interaction.guild_id,  version.WRAPPED_YEAR)
+    async with get_db_connection() as connection:
+        all_users_wrapped = await hof_wrapped_repo.get_all_hof_wrapped_for_guild(connection, interaction.guild_id,  version.WRAPPED_YEAR)
+    if not all_users_wrapped:
+        # noinspection PyUnresolvedReferences
+        await interaction.response.send_message(f"No Hall of Fame Wrapped data available for {version.WRAPPED_YEAR}. The bot will start collecting data for next year's wrapped!")
+        return
     embed = hof_wrapped.create_server_embed(interaction.guild, all_users_wrapped)
     # noinspection PyUnresolvedReferences
     await interaction.response.send_message(embed=embed)
@@ -751,13 +791,47 @@ async def post_api_bot_stats():
     except Exception as e:
         await utils.logging(bot, f"Failed to post bot stats to discordbotlist.com: {e}")
 
+async def start_bot():
+    """
+    Open the connection pool in the event loop of the bot and keep it open for as long as the bot runs
+    """
+    log_sink.start()
+    database.pool = database.create_pool(dev_test)
+    async with database.pool:
+        try:
+            async with bot:
+                try:
+                    await bot.start(TOKEN)
+                finally:
+                    # Deliver the queued log lines while the HTTP session of the bot is still open
+                    try:
+                        await log_shipper.stop(bot)
+                    except Exception as e:
+                        print(f"[ERROR] Failed to flush the queued log lines: {e}")
+        finally:
+            # Write the buffered reaction counts and changed reactor sets before the pool closes. A flush cancelled
+            # part way puts its batch back into the buffer, so wait for the loop to finish before the final flush.
+            flush_reaction_counts.cancel()
+            if flush_reaction_counts.get_task():
+                await asyncio.gather(flush_reaction_counts.get_task(), return_exceptions=True)
+            try:
+                await utils.flush_reaction_counts()
+            except Exception as e:
+                print(f"[ERROR] Failed to flush {len(reaction_count_buffer.pending_counts)} buffered reaction counts: {e}")
+            try:
+                await utils.flush_reactor_sets()
+            except Exception as e:
+                print(f"[ERROR] Failed to flush {len(reaction_store.unsaved)} changed reactor sets: {e}")
+            log_sink.stop()
+
 if __name__ == "__main__":
     import time
     if TOKEN is None:
         raise ValueError("TOKEN environment variable is not set in the .env file")
+    discord.utils.setup_logging()
     while True:
         try:
-            bot.run(TOKEN)
+            asyncio.run(start_bot())
         except Exception as e:
             print(f"[ERROR] Bot crashed with exception: {e}. Restarting in 5 seconds...")
             import traceback
@@ -765,4 +839,3 @@ if __name__ == "__main__":
             time.sleep(5)
         else:
             break
-    connection_pool.closeall()
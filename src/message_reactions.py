@@ -1,149 +1,236 @@
-import discord as discord
+import discord
 from enums import calculation_method_type
-from repositories import server_config_repo
+from classes.emoji_whitelist import emoji_key
+from classes.reaction_store import MessageReactionState, MessageReactionCounts
+from classes.reaction_snapshot import ReactionSnapshot
+from classes.server_config_cache import ServerConfigCache
+
+def is_counted_emoji(server_config, emoji: str) -> bool:
+    """
+    Returns whether reactions with the emoji count towards the Hall of Fame in the server.
+    :param server_config:
+    :param emoji:
+    :return:
+    """
+    if not server_config.custom_emoji_check_logic or not server_config.whitelisted_emoji_keys:
+        return True
+    return emoji_key(emoji) in server_config.whitelisted_emoji_keys
+
 
 # todo: make this return either a single emoji or null
-def most_reacted_emoji(reactions: list[discord.Reaction], guild_id, connection) -> discord.Reaction.emoji:
+def most_reacted_emoji(state: MessageReactionState, guild_id) -> str:
     """
-    Returns the reaction with the most reactions.
-    :param reactions:
+    Returns the emoji with the most reactions.
+    :param state:
     :param guild_id:
-    :param connection:
     :return:
     """
-    custom_emoji_check_logic = server_config_repo.get_parameter_value(connection, guild_id, "custom_emoji_check_logic")
-    white_listed_emojis = server_config_repo.get_parameter_value(connection, guild_id, "whitelisted_emojis")
-
-    if custom_emoji_check_logic and len(white_listed_emojis) > 0:
-        corrected_reactions = []
-        for reaction in reactions:
-            if str(reaction.emoji) in str(white_listed_emojis):
-                corrected_reactions.append(reaction)
-        reactions = corrected_reactions
+    server_config = ServerConfigCache()[guild_id]
+    reactions = {emoji: user_ids for emoji, user_ids in state.reactions.items() if is_counted_emoji(server_config, emoji)}
 
-    if len(reactions) == 1:
-        return reactions[0].emoji
     if len(reactions) == 0:
         return ""
 
-    largest_num = reactions[0].count    
-    biggest = reactions[0]
+    return max(reactions, key=lambda emoji: len(reactions[emoji]))
 
-    for reaction in reactions[1:]:
-        if reaction.count > largest_num:
-            biggest = reaction
-            largest_num = reaction.count
-    
-    return biggest.emoji
 
-
-async def total_reaction_count(message: discord.Message, guild_id, connection) -> int:
+def total_reaction_count(state: MessageReactionState, guild_id) -> int:
     """
     Returns the total number of reactions, taking into account the custom emoji check logic and whitelisted emojis.
-    :param message:
+    :param state:
     :param guild_id:
-    :param connection:
     :return:
     """
-    custom_emoji_check_logic = server_config_repo.get_parameter_value(connection, guild_id, "custom_emoji_check_logic")
-    whited_listed_emojis = server_config_repo.get_parameter_value(connection, guild_id, "whitelisted_emojis")
-    include_author_in_threshold = server_config_repo.get_parameter_value(connection, guild_id, "include_author_in_reaction_calculation")
-    reactions = message.reactions
-
-    if custom_emoji_check_logic and len(whited_listed_emojis) > 0:
-        corrected_reactions = []
-        for reaction in reactions:
-            if str(reaction.emoji) in str(whited_listed_emojis):
-                corrected_reactions.append(reaction)
-        reactions = corrected_reactions
+    server_config = ServerConfigCache()[guild_id]
+    include_author_in_threshold = server_config.include_author_in_reaction_calculation
+    reactions = {emoji: user_ids for emoji, user_ids in state.reactions.items() if is_counted_emoji(server_config, emoji)}
 
     total_count = 0
-    for reaction in reactions:
-        react_count = reaction.count
-        users_ids = [user.id async for user in reaction.users()]
-        if not include_author_in_threshold and reactions[0].message.author.id in users_ids:
+    for user_ids in reactions.values():
+        if not include_author_in_threshold and state.author_id in user_ids:
             continue
-        total_count += react_count
+        total_count += len(user_ids)
 
     return total_count
 
 
-async def unique_reactor_count(message: discord.Message, connection) -> int:
+def unique_reactor_count(state: MessageReactionState) -> int:
     """
     Returns the number of unique reactors for a message, excluding the author if configured.
-    :param message:
-    :param connection:
+    :param state:
     :return:
     """
-    server_includes_author_in_threshold = server_config_repo.get_parameter_value(connection, message.guild.id, "include_author_in_reaction_calculation")
-    custom_emoji_check_logic = server_config_repo.get_parameter_value(connection, message.guild.id, "custom_emoji_check_logic")
-    whited_listed_emojis = server_config_repo.get_parameter_value(connection, message.guild.id, "whitelisted_emojis")
-    reactions = message.reactions
-
-    if custom_emoji_check_logic and len(whited_listed_emojis) > 0:
-        corrected_reactions = []
-        for reaction in reactions:
-            if str(reaction.emoji) in str(whited_listed_emojis):
-                corrected_reactions.append(reaction)
-        reactions = corrected_reactions
+    server_config = ServerConfigCache()[state.guild_id]
+    server_includes_author_in_threshold = server_config.include_author_in_reaction_calculation
+    reactions = {emoji: user_ids for emoji, user_ids in state.reactions.items() if is_counted_emoji(server_config, emoji)}
 
     unique_users = set()
-    for reaction in reactions:
-        users_ids = [user.id async for user in reaction.users()]
-        if not server_includes_author_in_threshold and message.author.id in users_ids:
-            users_ids.remove(message.author.id)
-        unique_users.update(users_ids)
+    for user_ids in reactions.values():
+        unique_users.update(user_ids)
+    if not server_includes_author_in_threshold:
+        unique_users.discard(state.author_id)
     return len(unique_users)
 
 
-async def most_reacted_emoji_from_message(message: discord.Message, connection) -> int:
+def most_reacted_emoji_from_message(state: MessageReactionState) -> int:
     """
     Returns the most reactions from the highest reacted emoji in a message.
-    :param message:
-    :param connection:
+    :param state:
     :return:
     """
-    server_includes_author_in_threshold = server_config_repo.get_parameter_value(connection, message.guild.id, "include_author_in_reaction_calculation")
-    custom_emoji_check_logic = server_config_repo.get_parameter_value(connection, message.guild.id, "custom_emoji_check_logic")
-    whited_listed_emojis = server_config_repo.get_parameter_value(connection, message.guild.id, "whitelisted_emojis")
-    reactions = message.reactions
+    server_config = ServerConfigCache()[state.guild_id]
+    server_includes_author_in_threshold = server_config.include_author_in_reaction_calculation
+    reactions = {emoji: user_ids for emoji, user_ids in state.reactions.items() if is_counted_emoji(server_config, emoji)}
     max_reaction_count = 0
 
-    if custom_emoji_check_logic and len(whited_listed_emojis) > 0:
-        corrected_reactions = []
-        for reaction in reactions:
-            if str(reaction.emoji) in str(whited_listed_emojis):
-                corrected_reactions.append(reaction)
-        reactions = corrected_reactions
-
-    if len(reactions) == 0:
-        return 0
-
-    for reaction in reactions:
-        react_count = reaction.count
-
-        users_ids = [user.id async for user in reaction.users()]
-        if not server_includes_author_in_threshold:
-            react_count = react_count-1 if message.author.id in users_ids else react_count
+    for user_ids in reactions.values():
+        react_count = len(user_ids)
+        if not server_includes_author_in_threshold and state.author_id in user_ids:
+            react_count -= 1
         max_reaction_count = react_count if react_count > max_reaction_count else max_reaction_count
 
     return max_reaction_count
 
 
-async def reaction_count(message, connection) -> int:
+def reaction_count(state: MessageReactionState) -> int:
     """
     Returns the reaction count of a message based on the server configuration.
-    :param message:
-    :param connection:
+    :param state:
     :return:
     """
-    calculation_method = server_config_repo.get_parameter_value(connection, message.guild.id, "reaction_count_calculation_method")
+    calculation_method = ServerConfigCache()[state.guild_id].reaction_count_calculation_method
 
     if calculation_method == calculation_method_type.TOTAL_REACTIONS:
-        return await total_reaction_count(message, message.guild.id, connection)
+        return total_reaction_count(state, state.guild_id)
     elif calculation_method == calculation_method_type.UNIQUE_USERS:
-        return await unique_reactor_count(message, connection)
+        return unique_reactor_count(state)
     elif calculation_method == calculation_method_type.MOST_REACTIONS_ON_EMOJI:
-        return await most_reacted_emoji_from_message(message, connection)
+        return most_reacted_emoji_from_message(state)
     else:
-        return await most_reacted_emoji_from_message(message, connection)
+        return most_reacted_emoji_from_message(state)
+
+
+def take_snapshot(state: MessageReactionState) -> ReactionSnapshot:
+    """
+    Computes the reaction count, top emoji and per-emoji tallies of a message in one go.
+    :param state:
+    :return:
+    """
+    return ReactionSnapshot(
+        message_id=state.message_id,
+        reaction_count=reaction_count(state),
+        top_emoji=most_reacted_emoji(state, state.guild_id),
+        emoji_counts=tuple((emoji, len(user_ids)) for emoji, user_ids in state.reactions.items())
+    )
+
+
+def threshold_bounds(reaction_counts: MessageReactionCounts) -> tuple[int, int]:
+    """
+    Returns the lowest and highest reaction count the message can have given what is known about its reactors.
+    :param reaction_counts:
+    :return:
+    """
+    server_config = ServerConfigCache()[reaction_counts.guild_id]
+    exclude_author = not server_config.include_author_in_reaction_calculation
+    calculation_method = server_config.reaction_count_calculation_method
+    counts = {emoji: count for emoji, count in reaction_counts.counts.items() if is_counted_emoji(server_config, emoji)}
+
+    if calculation_method == calculation_method_type.TOTAL_REACTIONS:
+        # An emoji the author reacted with does not count at all
+        lowest = sum(count for emoji, count in counts.items()
+                     if not exclude_author or reaction_counts.author_reacted.get(emoji) is False)
+        highest = sum(count for emoji, count in counts.items()
+                      if not exclude_author or reaction_counts.author_reacted.get(emoji) is not True)
+        return lowest, highest
+
+    if calculation_method == calculation_method_type.UNIQUE_USERS:
+        known_users = set()
+        lowest = highest = 0
+        for emoji, count in counts.items():
+            if emoji in reaction_counts.reactors:
+                known_users.update(reaction_counts.reactors[emoji])
+                continue
+            author_reacted = reaction_counts.author_reacted.get(emoji)
+            lowest = max(lowest, count - 1 if exclude_author and author_reacted is not False else count)
+            highest += count - 1 if exclude_author and author_reacted is True else count
+        if exclude_author:
+            known_users.discard(reaction_counts.author_id)
+        return max(lowest, len(known_users)), highest + len(known_users)
+
+    lowest = highest = 0
+    for emoji, count in counts.items():
+        author_reacted = reaction_counts.author_reacted.get(emoji)
+        lowest = max(lowest, count - 1 if exclude_author and author_reacted is not False else count)
+        highest = max(highest, count - 1 if exclude_author and author_reacted is True else count)
+    return lowest, highest
+
+
+async def reaches_threshold(reaction_counts: MessageReactionCounts, threshold: int) -> bool | None:
+    """
+    Returns whether the reaction count of a message reaches the threshold, deciding from the raw counts where
+    possible. Reactors are only paged while the author exclusion or overlapping reactors can still change the
+    outcome, and paging stops as soon as the outcome is settled.
+    :param reaction_counts:
+    :param threshold:
+    :return: True or False, or None if the outcome can only be settled by seeding the full reaction state
+    """
+    server_config = ServerConfigCache()[reaction_counts.guild_id]
+    needs_reactors = server_config.reaction_count_calculation_method == calculation_method_type.UNIQUE_USERS
+    reactions = {str(reaction.emoji): reaction for reaction in reaction_counts.message.reactions}
+
+    while True:
+        lowest, highest = threshold_bounds(reaction_counts)
+        if highest < threshold:
+            return False
+        if lowest >= threshold:
+            return True
+
+        # Page the most reacted emoji that is still unknown, it moves the bounds the most
+        unknown_emojis = [emoji for emoji in reaction_counts.counts
+                          if is_counted_emoji(server_config, emoji) and emoji in reactions
+                          and (emoji not in reaction_counts.reactors if needs_reactors
+                               else emoji not in reaction_counts.author_reacted)]
+        if not unknown_emojis:
+            return None
+        emoji = max(unknown_emojis, key=lambda unknown_emoji: reaction_counts.counts[unknown_emoji])
+        await page_reactors(reaction_counts, reactions[emoji], until_author=not needs_reactors)
+
+
+async def page_reactors(reaction_counts: MessageReactionCounts, reaction: discord.Reaction, until_author: bool):
+    """
+    Pages the reactors of an emoji, recording whether the author reacted and, if paged to the end, the reactors.
+    :param reaction_counts:
+    :param reaction:
+    :param until_author: Stop paging once the author is found
+    :return:
+    """
+    emoji = str(reaction.emoji)
+    user_ids = set()
+    author_found = False
+    reaction_types = [discord.enums.ReactionType.normal]
+    if reaction.burst_count:
+        reaction_types.append(discord.enums.ReactionType.burst)
+    reaction_counts.paging[emoji] = []
+    try:
+        for reaction_type in reaction_types:
+            async for user in reaction.users(type=reaction_type):
+                user_ids.add(user.id)
+                if until_author and user.id == reaction_counts.author_id:
+                    author_found = True
+                    break
+            if author_found:
+                break
+    finally:
+        paged_events = reaction_counts.paging.pop(emoji)
+
+    if emoji not in reaction_counts.counts:
+        return
+    # Reactions applied while paging may or may not be part of the pages, so they are replayed on top
+    for user_id, added in paged_events:
+        if added:
+            user_ids.add(user_id)
+        else:
+            user_ids.discard(user_id)
+    if not author_found:
+        reaction_counts.reactors[emoji] = user_ids
+    reaction_counts.author_reacted[emoji] = reaction_counts.author_id in user_ids
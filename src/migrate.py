@@ -0,0 +1,100 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+import database
+from repositories import schema_migration_repo
+
+MIGRATIONS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+# Migrations starting with this line run outside a transaction, one statement at a time, which is required for
+# statements such as CREATE INDEX CONCURRENTLY. Statements in these files are separated by semicolons and should
+# be idempotent, since a failure part way through leaves the earlier statements applied.
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+
+
+def available_migrations() -> dict[str, str]:
+    """
+    The SQL migrations shipped with the bot, keyed by version in the order they are applied
+    :return: The path of every migration file keyed by its version (the file name without extension)
+    """
+    file_names = sorted(file_name for file_name in os.listdir(MIGRATIONS_FOLDER) if file_name.endswith(".sql"))
+    return {file_name[:-4]: os.path.join(MIGRATIONS_FOLDER, file_name) for file_name in file_names}
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Split a no-transaction migration into its statements
+    :param sql: The content of the migration file
+    :return: The statements without comment lines
+    """
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+async def pending_migrations(connection) -> list[str]:
+    """
+    The versions of the migrations that have not been applied to the database yet
+    :param connection: The database connection
+    :return: The pending versions in the order they should be applied
+    """
+    applied_versions = await schema_migration_repo.get_applied_versions(connection)
+    return [version for version in available_migrations() if version not in applied_versions]
+
+
+async def apply_migrations(connection) -> list[str]:
+    """
+    Apply every pending migration once and record it in the schema_migration ledger. A regular migration and
+    its ledger row are committed in the same transaction.
+    :param connection: A connection that is not in a transaction, it is switched to autocommit while migrating
+    :return: The versions that were applied
+    """
+    autocommit = connection.autocommit
+    await connection.set_autocommit(True)
+    try:
+        await schema_migration_repo.create_schema_migration_table(connection)
+        migrations = available_migrations()
+        applied = []
+        for version in await pending_migrations(connection):
+            with open(migrations[version], encoding="utf-8") as migration_file:
+                sql = migration_file.read()
+
+            print(f"Applying migration {version}...")
+            cursor = connection.cursor()
+            if sql.lstrip().startswith(NO_TRANSACTION_MARKER):
+                for statement in split_statements(sql):
+                    await cursor.execute(statement)
+                await schema_migration_repo.insert_schema_migration(connection, version)
+            else:
+                async with connection.transaction():
+                    await cursor.execute(sql)
+                    await schema_migration_repo.insert_schema_migration(connection, version)
+            await cursor.close()
+            applied.append(version)
+        return applied
+    finally:
+        await connection.set_autocommit(autocommit)
+
+
+async def verify_schema(connection):
+    """
+    Check that every migration shipped with the bot has been applied
+    :param connection: The database connection
+    :return: None
+    :raises RuntimeError: If migrations are pending
+    """
+    pending = await pending_migrations(connection)
+    if pending:
+        raise RuntimeError(f"Database schema is out of date, run migrate.py to apply: {', '.join(pending)}")
+
+
+async def main(dev_test: bool):
+    connection = await database.connect(dev_test)
+    try:
+        applied = await apply_migrations(connection)
+    finally:
+        await connection.close()
+    print(f"Applied {len(applied)} migration(s)" if applied else "Database schema is up to date")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    asyncio.run(main(os.getenv('DEV_TEST') == "True"))
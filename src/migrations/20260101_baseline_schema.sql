@@ -0,0 +1,117 @@
+-- Migration: baseline of the schema that used to be created by main.setup_databases on every login
+--
+-- Every statement is idempotent so the baseline can be recorded on databases that were set up before the
+-- migration ledger existed.
+
+CREATE TABLE IF NOT EXISTS server_configs (
+    guild_id BIGINT PRIMARY KEY,
+    hall_of_fame_channel_id BIGINT,
+    reaction_threshold INT DEFAULT 5,
+    post_due_date INT DEFAULT 30,
+    leaderboard_message_ids TEXT[],
+    sweep_limit INT DEFAULT 100,
+    sweep_limited BOOLEAN DEFAULT TRUE,
+    include_author_in_reaction_calculation BOOLEAN DEFAULT TRUE,
+    allow_messages_in_hof_channel BOOLEAN DEFAULT TRUE,
+    custom_emoji_check_logic BOOLEAN DEFAULT FALSE,
+    whitelisted_emojis TEXT[],
+    joined_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    leaderboard_setup BOOLEAN DEFAULT FALSE,
+    ignore_bot_messages BOOLEAN DEFAULT FALSE,
+    server_member_count INT DEFAULT 0,
+    reaction_count_calculation_method VARCHAR(50) DEFAULT 'most_reactions_on_emoji',
+    hide_hof_post_below_threshold BOOLEAN DEFAULT TRUE,
+    require_image_or_video BOOLEAN DEFAULT FALSE
+);
+ALTER TABLE server_configs ADD COLUMN IF NOT EXISTS require_image_or_video BOOLEAN DEFAULT FALSE;
+
+CREATE TABLE IF NOT EXISTS hall_of_fame_message (
+    message_id BIGINT PRIMARY KEY,
+    channel_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    hall_of_fame_message_id BIGINT,
+    reaction_count INTEGER NOT NULL,
+    author_id BIGINT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    video_link_message_id BIGINT
+);
+
+CREATE TABLE IF NOT EXISTS server_user (
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    monthly_reaction_rank INTEGER,
+    total_message_rank INTEGER,
+    total_reaction_rank INTEGER,
+    this_month_hall_of_fame_messages INTEGER,
+    total_hall_of_fame_messages INTEGER,
+    monthly_message_rank INTEGER,
+    this_month_hall_of_fame_message_reactions INTEGER,
+    total_hall_of_fame_message_reactions INTEGER,
+    PRIMARY KEY (user_id, guild_id)
+);
+
+CREATE TABLE IF NOT EXISTS hof_wrapped (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    year INTEGER NOT NULL,
+    reaction_count INTEGER,
+    hof_message_posts INTEGER,
+    most_used_channels TEXT,
+    most_used_emojis TEXT,
+    most_reacted_post_message_id BIGINT,
+    most_reacted_post_channel_id BIGINT,
+    most_reacted_post_reaction_count INTEGER,
+    fan_of_users TEXT,
+    users_fans TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(guild_id, user_id, year),
+    user_ranks TEXT
+);
+
+CREATE TABLE IF NOT EXISTS hof_wrapped_progress (
+    id SERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    year INTEGER NOT NULL,
+    is_complete BOOLEAN DEFAULT FALSE,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    hall_of_fame_message_count INTEGER DEFAULT 0,
+    duration_seconds FLOAT,
+    UNIQUE(guild_id, year)
+);
+
+CREATE TABLE IF NOT EXISTS guild_lifecycle_event (
+    id BIGSERIAL PRIMARY KEY,
+    guild_id BIGINT NOT NULL,
+    event_type VARCHAR(8) NOT NULL CHECK (event_type IN ('JOIN', 'LEAVE')),
+    occurred_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_guild_lifecycle_event_occurred_at
+    ON guild_lifecycle_event (occurred_at);
+CREATE INDEX IF NOT EXISTS idx_guild_lifecycle_event_guild_occurred
+    ON guild_lifecycle_event (guild_id, occurred_at);
+
+CREATE TABLE IF NOT EXISTS guild_monthly_snapshot (
+    guild_id BIGINT NOT NULL,
+    month_start DATE NOT NULL,
+    member_count INTEGER NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    captured_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (guild_id, month_start)
+);
+-- Early deployments created captured_at without a time zone
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'guild_monthly_snapshot'
+          AND column_name = 'captured_at'
+          AND data_type = 'timestamp without time zone'
+    ) THEN
+        ALTER TABLE guild_monthly_snapshot
+        ALTER COLUMN captured_at TYPE TIMESTAMPTZ
+        USING captured_at AT TIME ZONE 'UTC';
+    END IF;
+END $$;
+CREATE INDEX IF NOT EXISTS idx_guild_monthly_snapshot_month_start
+    ON guild_monthly_snapshot (month_start);
@@ -0,0 +1,22 @@
+-- migrate:no-transaction
+-- Migration: indexes for the guild scoped queries on hall_of_fame_message
+--
+-- Reason: the table only had its primary key on message_id, so every per-guild lookup was a sequential scan
+-- over the messages of all guilds. Built concurrently to keep the bot writing while the indexes are created.
+-- scripts/check_query_plans.py verifies that every query in hall_of_fame_message_repo can use one of them.
+
+-- get_all_hall_of_fame_messages_for_guild, count_messages_for_guild, delete_hall_of_fame_messages_for_guild
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hall_of_fame_message_guild_created
+    ON hall_of_fame_message (guild_id, created_at);
+
+-- find_top_messages_by_reaction_count
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hall_of_fame_message_guild_reactions
+    ON hall_of_fame_message (guild_id, reaction_count DESC);
+
+-- find_members_for_guild
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hall_of_fame_message_guild_author
+    ON hall_of_fame_message (guild_id, author_id);
+
+-- get_monthly_message_counts_by_guild, get_message_counts_today_by_guild
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_hall_of_fame_message_created
+    ON hall_of_fame_message (created_at);
@@ -0,0 +1,37 @@
+-- Migration: per-user daily buckets for the incrementally maintained server_user stats
+--
+-- Reason: server_user was rebuilt from every hall_of_fame_message row once a day. The totals are now updated as
+-- messages are posted and their reaction counts change, and the monthly figures are summed from the buckets of
+-- the last 30 days. A bucket is keyed by the day the Hall of Fame post was created (UTC), so reaction changes on
+-- an older post land in the bucket of that post.
+
+CREATE TABLE IF NOT EXISTS server_user_daily_stat (
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    day DATE NOT NULL,
+    hall_of_fame_messages INTEGER NOT NULL DEFAULT 0,
+    hall_of_fame_message_reactions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, user_id, day)
+);
+
+-- Backfill the buckets and the totals from the existing messages, the daily job fills in the ranks
+INSERT INTO server_user_daily_stat (guild_id, user_id, day, hall_of_fame_messages, hall_of_fame_message_reactions)
+SELECT guild_id, author_id, created_at::date, COUNT(*), SUM(reaction_count)
+FROM hall_of_fame_message
+GROUP BY guild_id, author_id, created_at::date
+ON CONFLICT (guild_id, user_id, day) DO UPDATE SET
+    hall_of_fame_messages = excluded.hall_of_fame_messages,
+    hall_of_fame_message_reactions = excluded.hall_of_fame_message_reactions;
+
+INSERT INTO server_user (user_id, guild_id, total_hall_of_fame_messages, total_hall_of_fame_message_reactions,
+                         this_month_hall_of_fame_messages, this_month_hall_of_fame_message_reactions)
+SELECT user_id, guild_id, SUM(hall_of_fame_messages), SUM(hall_of_fame_message_reactions),
+       COALESCE(SUM(hall_of_fame_messages) FILTER (WHERE day >= CURRENT_DATE - 30), 0),
+       COALESCE(SUM(hall_of_fame_message_reactions) FILTER (WHERE day >= CURRENT_DATE - 30), 0)
+FROM server_user_daily_stat
+GROUP BY guild_id, user_id
+ON CONFLICT (user_id, guild_id) DO UPDATE SET
+    total_hall_of_fame_messages = excluded.total_hall_of_fame_messages,
+    total_hall_of_fame_message_reactions = excluded.total_hall_of_fame_message_reactions,
+    this_month_hall_of_fame_messages = excluded.this_month_hall_of_fame_messages,
+    this_month_hall_of_fame_message_reactions = excluded.this_month_hall_of_fame_message_reactions;
@@ -0,0 +1,16 @@
+-- Migration: rendered state of the Hall of Fame leaderboard slots
+--
+-- Reason: the daily leaderboard refresh edited all 20 leaderboard messages, two or three times each, even when
+-- nothing had changed. The refresh now compares the entry a slot should show with the entry it was last
+-- rendered with and only edits the slots that differ.
+
+CREATE TABLE IF NOT EXISTS leaderboard_slot (
+    guild_id BIGINT NOT NULL,
+    slot INTEGER NOT NULL,
+    leaderboard_message_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    reaction_count INTEGER NOT NULL,
+    top_emoji TEXT NOT NULL,
+    rendered_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (guild_id, slot)
+);
@@ -0,0 +1,9 @@
+-- Migration: rendered embed state of the Hall of Fame posts
+--
+-- Reason: updating the reaction count of a post, hiding it and showing it again each fetched the post from
+-- Discord just to read its embed. The embed a post was rendered with is now stored with the message, together
+-- with whether the post is currently hidden, so the post can be edited without fetching it first. Rows posted
+-- before this migration have no stored embed; it is rendered from the original message on their next update.
+
+ALTER TABLE hall_of_fame_message ADD COLUMN IF NOT EXISTS embed JSONB;
+ALTER TABLE hall_of_fame_message ADD COLUMN IF NOT EXISTS embed_hidden BOOLEAN NOT NULL DEFAULT FALSE;
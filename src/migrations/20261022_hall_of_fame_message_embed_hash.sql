@@ -0,0 +1,6 @@
+-- Migration: hash of the embed each Hall of Fame post was last rendered with
+--
+-- Reason: reaction updates edited the post even when the rendered count and emoji had not changed. The hash of
+-- the last rendered embed lets those edits be skipped; it is kept in memory and stored here for after a restart.
+
+ALTER TABLE hall_of_fame_message ADD COLUMN IF NOT EXISTS embed_hash TEXT;
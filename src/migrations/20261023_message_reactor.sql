@@ -0,0 +1,18 @@
+-- Migration: persisted reactor sets of tracked messages
+--
+-- Reason: seeding a message pages the reactors of every emoji, and after a restart this was repeated from scratch
+-- for every message that received a reaction. The reactor set of every emoji of a tracked message is now written
+-- as gateway events change it, and loaded at startup for messages still within the post due date of their guild
+-- or already in the Hall of Fame. A loaded set is reused when its size matches the reaction count of the emoji,
+-- and paged again otherwise.
+
+CREATE TABLE IF NOT EXISTS message_reactor (
+    guild_id BIGINT NOT NULL,
+    message_id BIGINT NOT NULL,
+    emoji TEXT NOT NULL,
+    user_ids BIGINT[] NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (message_id, emoji)
+);
+
+CREATE INDEX IF NOT EXISTS message_reactor_guild_id_idx ON message_reactor (guild_id);
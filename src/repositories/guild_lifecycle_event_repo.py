@@ -1,50 +1,22 @@
-def create_guild_lifecycle_event_table(connection):
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS guild_lifecycle_event (
-            id BIGSERIAL PRIMARY KEY,
-            guild_id BIGINT NOT NULL,
-            event_type VARCHAR(8) NOT NULL CHECK (event_type IN ('JOIN', 'LEAVE')),
-            occurred_at TIMESTAMPTZ NOT NULL
-        )
-        """
-    )
-    cursor.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_guild_lifecycle_event_occurred_at
-        ON guild_lifecycle_event (occurred_at)
-        """
-    )
-    cursor.execute(
-        """
-        CREATE INDEX IF NOT EXISTS idx_guild_lifecycle_event_guild_occurred
-        ON guild_lifecycle_event (guild_id, occurred_at)
-        """
-    )
-    connection.commit()
-    cursor.close()
-
-
-def insert_guild_lifecycle_event(connection, guild_id, event_type, occurred_at):
+async def insert_guild_lifecycle_event(connection, guild_id, event_type, occurred_at):
     if event_type not in ("JOIN", "LEAVE"):
         raise ValueError(f"Unsupported event_type: {event_type}")
 
     cursor = connection.cursor()
-    cursor.execute(
+    await cursor.execute(
         """
         INSERT INTO guild_lifecycle_event (guild_id, event_type, occurred_at)
         VALUES (%s, %s, %s)
         """,
         (guild_id, event_type, occurred_at),
     )
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
 
-def get_monthly_join_leave_counts(connection, start_month, end_month):
+async def get_monthly_join_leave_counts(connection, start_month, end_month):
     cursor = connection.cursor()
-    cursor.execute(
+    await cursor.execute(
         """
         SELECT
             DATE_TRUNC('month', occurred_at) AS month_start,
@@ -57,17 +29,17 @@ def get_monthly_join_leave_counts(connection, start_month, end_month):
         """,
         (start_month, end_month),
     )
-    rows = cursor.fetchall()
-    cursor.close()
+    rows = await cursor.fetchall()
+    await cursor.close()
     return [
         {"month_start": row[0], "joined_count": row[1], "left_count": row[2]}
         for row in rows
     ]
 
 
-def get_active_servers_as_of(connection, as_of_timestamp):
+async def get_active_servers_as_of(connection, as_of_timestamp):
     cursor = connection.cursor()
-    cursor.execute(
+    await cursor.execute(
         """
         SELECT COUNT(*) FROM (
             SELECT
@@ -93,14 +65,14 @@ def get_active_servers_as_of(connection, as_of_timestamp):
         """,
         (as_of_timestamp,),
     )
-    result = cursor.fetchone()
-    cursor.close()
+    result = await cursor.fetchone()
+    await cursor.close()
     return result[0] if result else 0
 
 
-def get_active_servers_timeseries(connection, start_month, end_month):
+async def get_active_servers_timeseries(connection, start_month, end_month):
     cursor = connection.cursor()
-    cursor.execute(
+    await cursor.execute(
         """
         WITH months AS (
             SELECT generate_series(
@@ -139,6 +111,6 @@ def get_active_servers_timeseries(connection, start_month, end_month):
         """,
         (start_month, end_month),
     )
-    rows = cursor.fetchall()
-    cursor.close()
+    rows = await cursor.fetchall()
+    await cursor.close()
     return [{"month_start": row[0], "active_servers": row[1]} for row in rows]
@@ -1,31 +1,18 @@
-def create_hall_of_fame_message_table(connection):
-    cursor = connection.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS hall_of_fame_message (
-            message_id BIGINT PRIMARY KEY,
-            channel_id BIGINT NOT NULL,
-            guild_id BIGINT NOT NULL,
-            hall_of_fame_message_id BIGINT,
-            reaction_count INTEGER NOT NULL,
-            author_id BIGINT NOT NULL,
-            created_at TIMESTAMP NOT NULL,
-            video_link_message_id BIGINT
-        )
-    """)
-    connection.commit()
-    cursor.close()
-
-def check_if_message_id_exists(cursor, message_id):
-    cursor.execute("SELECT 1 FROM hall_of_fame_message WHERE message_id = %s", (message_id,))
-    return cursor.fetchone() is not None
+from psycopg.types.json import Jsonb
 
-def insert_hall_of_fame_message(connection, message_id, channel_id, guild_id, hall_of_fame_message_id, reaction_count, author_id,
-                                created_at, video_link_message_id=None):
+async def insert_hall_of_fame_message(connection, message_id, channel_id, guild_id, hall_of_fame_message_id, reaction_count, author_id,
+                                      created_at, video_link_message_id=None, embed=None):
+    """
+    Insert or replace the Hall of Fame message. Not committed here, the caller commits it in one transaction with
+    the stat deltas of the author.
+    :return: True if a new row was inserted
+    """
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         INSERT INTO hall_of_fame_message 
-        (message_id, channel_id, guild_id, hall_of_fame_message_id, reaction_count, author_id, created_at, video_link_message_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        (message_id, channel_id, guild_id, hall_of_fame_message_id, reaction_count, author_id, created_at, video_link_message_id,
+         embed, embed_hidden)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, FALSE)
         ON CONFLICT (message_id) DO UPDATE SET
             channel_id=EXCLUDED.channel_id,
             guild_id=EXCLUDED.guild_id,
@@ -33,113 +20,181 @@ def insert_hall_of_fame_message(connection, message_id, channel_id, guild_id, ha
             reaction_count=EXCLUDED.reaction_count,
             author_id=EXCLUDED.author_id,
             created_at=EXCLUDED.created_at,
-            video_link_message_id=EXCLUDED.video_link_message_id
-    """, (message_id, channel_id, guild_id, hall_of_fame_message_id, reaction_count, author_id, created_at, video_link_message_id))
-    connection.commit()
-    cursor.close()
+            video_link_message_id=EXCLUDED.video_link_message_id,
+            embed=EXCLUDED.embed,
+            embed_hidden=EXCLUDED.embed_hidden
+        RETURNING (xmax = 0) AS inserted
+    """, (message_id, channel_id, guild_id, hall_of_fame_message_id, reaction_count, author_id, created_at, video_link_message_id,
+          Jsonb(embed) if embed is not None else None))
+    inserted = (await cursor.fetchone())[0]
+    await cursor.close()
+    return inserted
 
-def delete_hall_of_fame_messages_for_guild(connection, guild_id):
+async def delete_hall_of_fame_messages_for_guild(connection, guild_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         DELETE FROM hall_of_fame_message 
         WHERE guild_id = %s
     """, (guild_id,))
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
-def get_all_hall_of_fame_messages_for_guild(connection, guild_id):
+async def get_all_hall_of_fame_messages_for_guild(connection, guild_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         SELECT * FROM hall_of_fame_message
         WHERE guild_id = %s
     """, (guild_id,))
     columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-    cursor.close()
+    results = [dict(zip(columns, row)) for row in await cursor.fetchall()]
+    await cursor.close()
     return results
 
-def find_hall_of_fame_message(connection, guild_id, channel_id, message_id):
+async def get_hall_of_fame_message_ids_by_guild(connection):
+    """
+    Returns the IDs of the original messages in the Hall of Fame of every configured guild, keyed by guild id
+    """
+    cursor = connection.cursor()
+    await cursor.execute("""
+        SELECT hall_of_fame_message.guild_id, hall_of_fame_message.message_id
+        FROM hall_of_fame_message
+        JOIN server_configs ON server_configs.guild_id = hall_of_fame_message.guild_id
+    """)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    message_ids = {}
+    for guild_id, message_id in rows:
+        message_ids.setdefault(guild_id, set()).add(message_id)
+    return message_ids
+
+async def find_hall_of_fame_message(connection, guild_id, channel_id, message_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         SELECT * FROM hall_of_fame_message 
         WHERE guild_id = %s AND channel_id = %s AND message_id = %s
     """, (guild_id, channel_id, message_id))
-    row = cursor.fetchone()
+    row = await cursor.fetchone()
     columns = [desc[0] for desc in cursor.description]
-    cursor.close()
+    await cursor.close()
     return dict(zip(columns, row)) if row else None
 
-def guild_message_count_today(connection, guild_id):
+async def get_message_counts_today_by_guild(connection):
     cursor = connection.cursor()
-    cursor.execute("""
-            SELECT COUNT(*) FROM hall_of_fame_message 
-            WHERE guild_id = %s 
-            AND created_at >= DATE_TRUNC('day', NOW())
-        """, (guild_id,))
-    result = cursor.fetchone()
-    cursor.close()
-    return result[0] if result else 0
+    await cursor.execute("""
+            SELECT guild_id, COUNT(*) FROM hall_of_fame_message 
+            WHERE created_at >= DATE_TRUNC('day', NOW())
+            GROUP BY guild_id
+        """)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return {row[0]: row[1] for row in rows}
 
-ALLOWED_UPDATE_FIELDS = {
-    "hall_of_fame_message_id",
-    "reaction_count",
-    "video_link_message_id",
-    "author_id",
-    "created_at",
-    "channel_id",
-    "guild_id",
-}
-
-def update_field_for_message(connection, guild_id, channel_id, message_id, field_name, field_value):
-    if field_name not in ALLOWED_UPDATE_FIELDS:
-        raise ValueError(f"Unsupported field_name: {field_name}")
+async def update_embed_state(connection, message_id, embed_hidden, embed=None):
+    """
+    Store the rendered embed of a Hall of Fame post and whether the post is hidden
+    :param connection: The database connection
+    :param message_id: The ID of the original message
+    :param embed_hidden: Whether the embed of the post is currently removed
+    :param embed: The embed as a dict, or None to keep the stored embed
+    :return: None
+    """
+    cursor = connection.cursor()
+    await cursor.execute("""
+        UPDATE hall_of_fame_message
+        SET embed_hidden = %s, embed = COALESCE(%s, embed)
+        WHERE message_id = %s
+    """, (embed_hidden, Jsonb(embed) if embed is not None else None, message_id))
+    await connection.commit()
+    await cursor.close()
 
+async def update_embed_hashes(connection, embed_hashes):
+    """
+    Store the hash of the last rendered embed of Hall of Fame posts in a single statement
+    :param connection: The database connection
+    :param embed_hashes: The embed hash keyed by message id
+    :return: None
+    """
+    # Not committed here, written in the transaction of the reaction count flush
+    if not embed_hashes:
+        return
     cursor = connection.cursor()
-    query = f"""
+    await cursor.execute("""
         UPDATE hall_of_fame_message
-        SET {field_name} = %s
-        WHERE guild_id = %s AND channel_id = %s AND message_id = %s
+        SET embed_hash = new_hash.embed_hash
+        FROM unnest(%s::bigint[], %s::text[]) AS new_hash (message_id, embed_hash)
+        WHERE hall_of_fame_message.message_id = new_hash.message_id
+    """, (list(embed_hashes.keys()), list(embed_hashes.values())))
+    await cursor.close()
+
+async def update_reaction_counts(connection, reaction_counts):
+    """
+    Set the reaction count of Hall of Fame messages in a single statement
+    :param connection: The database connection
+    :param reaction_counts: The new reaction count keyed by message id
+    :return: A list of tuples for the messages whose count changed: (guild_id, author_id, created_at day, reaction_delta)
     """
-    cursor.execute(query, (field_value, guild_id, channel_id, message_id))
-    connection.commit()
-    cursor.close()
+    # Not committed here, the deltas returned must be applied in the same transaction or they are lost on a retry
+    if not reaction_counts:
+        return []
+    cursor = connection.cursor()
+    await cursor.execute("""
+        WITH new_count AS (
+            SELECT * FROM unnest(%s::bigint[], %s::integer[]) AS new_count (message_id, reaction_count)
+        ), previous AS (
+            SELECT hall_of_fame_message.message_id, hall_of_fame_message.reaction_count
+            FROM hall_of_fame_message
+            JOIN new_count ON new_count.message_id = hall_of_fame_message.message_id
+            FOR UPDATE OF hall_of_fame_message
+        )
+        UPDATE hall_of_fame_message
+        SET reaction_count = new_count.reaction_count
+        FROM new_count
+        JOIN previous ON previous.message_id = new_count.message_id
+        WHERE hall_of_fame_message.message_id = new_count.message_id
+          AND hall_of_fame_message.reaction_count <> new_count.reaction_count
+        RETURNING hall_of_fame_message.guild_id, hall_of_fame_message.author_id, hall_of_fame_message.created_at::date,
+                  new_count.reaction_count - previous.reaction_count
+    """, (list(reaction_counts.keys()), list(reaction_counts.values())))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return rows
 
-def find_members_for_guild(connection, guild_id):
+async def find_members_for_guild(connection, guild_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         SELECT DISTINCT author_id FROM hall_of_fame_message 
         WHERE guild_id = %s
     """, (guild_id,))
-    rows = cursor.fetchall()
-    cursor.close()
+    rows = await cursor.fetchall()
+    await cursor.close()
     return [row[0] for row in rows]
 
-def find_top_messages_by_reaction_count(connection, guild_id, limit=10):
+async def find_top_messages_by_reaction_count(connection, guild_id, limit=10):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         SELECT * FROM hall_of_fame_message 
         WHERE guild_id = %s 
         ORDER BY reaction_count DESC 
         LIMIT %s
     """, (guild_id, limit))
-    rows = cursor.fetchall()
+    rows = await cursor.fetchall()
     columns = [desc[0] for desc in cursor.description]
-    cursor.close()
+    await cursor.close()
     return [dict(zip(columns, row)) for row in rows]
 
-def count_messages_for_guild(connection, guild_id):
+async def count_messages_for_guild(connection, guild_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         SELECT COUNT(*) FROM hall_of_fame_message 
         WHERE guild_id = %s
     """, (guild_id,))
-    result = cursor.fetchone()
-    cursor.close()
+    result = await cursor.fetchone()
+    await cursor.close()
     return result[0] if result else 0
 
-def get_monthly_message_counts_by_guild(connection, month_start, month_end):
+async def get_monthly_message_counts_by_guild(connection, month_start, month_end):
     cursor = connection.cursor()
-    cursor.execute(
+    await cursor.execute(
         """
         SELECT guild_id, COUNT(*) AS message_count
         FROM hall_of_fame_message
@@ -149,6 +204,6 @@ def get_monthly_message_counts_by_guild(connection, month_start, month_end):
         """,
         (month_start, month_end),
     )
-    rows = cursor.fetchall()
-    cursor.close()
+    rows = await cursor.fetchall()
+    await cursor.close()
     return [{"guild_id": row[0], "message_count": row[1]} for row in rows]
@@ -0,0 +1,46 @@
+async def get_leaderboard_slots_for_guild(connection, guild_id):
+    """
+    Returns the last rendered entry of every leaderboard slot of the guild keyed by slot number
+    """
+    cursor = connection.cursor()
+    await cursor.execute("""
+        SELECT slot, leaderboard_message_id, message_id, reaction_count, top_emoji
+        FROM leaderboard_slot
+        WHERE guild_id = %s
+    """, (guild_id,))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return {row[0]: (row[1], row[2], row[3], row[4]) for row in rows}
+
+async def upsert_leaderboard_slots(connection, records):
+    """
+    records is a list of tuples: (guild_id, slot, leaderboard_message_id, message_id, reaction_count, top_emoji)
+    """
+    if not records:
+        return
+    cursor = connection.cursor()
+    await cursor.executemany(
+        """
+        INSERT INTO leaderboard_slot
+            (guild_id, slot, leaderboard_message_id, message_id, reaction_count, top_emoji)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (guild_id, slot) DO UPDATE SET
+            leaderboard_message_id = EXCLUDED.leaderboard_message_id,
+            message_id = EXCLUDED.message_id,
+            reaction_count = EXCLUDED.reaction_count,
+            top_emoji = EXCLUDED.top_emoji,
+            rendered_at = NOW()
+        """,
+        records,
+    )
+    await connection.commit()
+    await cursor.close()
+
+async def delete_leaderboard_slots_for_guild(connection, guild_id):
+    cursor = connection.cursor()
+    await cursor.execute("""
+        DELETE FROM leaderboard_slot
+        WHERE guild_id = %s
+    """, (guild_id,))
+    await connection.commit()
+    await cursor.close()
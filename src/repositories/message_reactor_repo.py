@@ -0,0 +1,82 @@
+# The creation time of a message is encoded in its snowflake id, in milliseconds since the Discord epoch
+MESSAGE_CREATED_AT = "to_timestamp(((message_reactor.message_id >> 22) + 1420070400000) / 1000.0)"
+
+async def get_active_reactor_sets(connection):
+    """
+    Returns the reactor sets of messages still within the post due date of their guild or already in the Hall of
+    Fame as a dict of message id to (guild_id, {emoji: user_ids})
+    """
+    cursor = connection.cursor()
+    await cursor.execute(f"""
+        SELECT message_reactor.guild_id, message_reactor.message_id, message_reactor.emoji, message_reactor.user_ids
+        FROM message_reactor
+        JOIN server_configs ON server_configs.guild_id = message_reactor.guild_id
+        WHERE {MESSAGE_CREATED_AT} >= NOW() - make_interval(days => server_configs.post_due_date)
+           OR EXISTS (SELECT 1 FROM hall_of_fame_message WHERE hall_of_fame_message.message_id = message_reactor.message_id)
+    """)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    reactor_sets = {}
+    for guild_id, message_id, emoji, user_ids in rows:
+        reactor_sets.setdefault(message_id, (guild_id, {}))[1][emoji] = user_ids
+    return reactor_sets
+
+async def delete_inactive_reactor_sets(connection):
+    """
+    Deletes the reactor sets of messages past the post due date of their guild that are not in the Hall of Fame
+    """
+    cursor = connection.cursor()
+    await cursor.execute(f"""
+        DELETE FROM message_reactor
+        USING server_configs
+        WHERE server_configs.guild_id = message_reactor.guild_id
+          AND {MESSAGE_CREATED_AT} < NOW() - make_interval(days => server_configs.post_due_date)
+          AND NOT EXISTS (SELECT 1 FROM hall_of_fame_message WHERE hall_of_fame_message.message_id = message_reactor.message_id)
+    """)
+    await connection.commit()
+    await cursor.close()
+
+async def upsert_reactor_sets(connection, records):
+    """
+    records is a list of tuples: (guild_id, message_id, emoji, user_ids)
+    """
+    if not records:
+        return
+    cursor = connection.cursor()
+    await cursor.executemany(
+        """
+        INSERT INTO message_reactor (guild_id, message_id, emoji, user_ids)
+        VALUES (%s, %s, %s, %s::bigint[])
+        ON CONFLICT (message_id, emoji) DO UPDATE SET
+            user_ids = EXCLUDED.user_ids,
+            updated_at = NOW()
+        """,
+        records,
+    )
+    await connection.commit()
+    await cursor.close()
+
+async def delete_reactor_sets(connection, keys):
+    """
+    keys is a list of tuples: (message_id, emoji)
+    """
+    if not keys:
+        return
+    cursor = connection.cursor()
+    await cursor.execute("""
+        DELETE FROM message_reactor
+        USING unnest(%s::bigint[], %s::text[]) AS deleted(message_id, emoji)
+        WHERE message_reactor.message_id = deleted.message_id
+          AND message_reactor.emoji = deleted.emoji
+    """, ([message_id for message_id, _ in keys], [emoji for _, emoji in keys]))
+    await connection.commit()
+    await cursor.close()
+
+async def delete_reactor_sets_for_guild(connection, guild_id):
+    cursor = connection.cursor()
+    await cursor.execute("""
+        DELETE FROM message_reactor
+        WHERE guild_id = %s
+    """, (guild_id,))
+    await connection.commit()
+    await cursor.close()
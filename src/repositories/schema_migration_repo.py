@@ -0,0 +1,23 @@
+async def create_schema_migration_table(connection):
+    cursor = connection.cursor()
+    await cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migration (
+            version TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
+    await connection.commit()
+    await cursor.close()
+
+async def get_applied_versions(connection) -> set[str]:
+    cursor = connection.cursor()
+    await cursor.execute("SELECT version FROM schema_migration")
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return {row[0] for row in rows}
+
+async def insert_schema_migration(connection, version):
+    # Not committed here so the ledger row can be written in the same transaction as the migration itself
+    cursor = connection.cursor()
+    await cursor.execute("INSERT INTO schema_migration (version) VALUES (%s)", (version,))
+    await cursor.close()
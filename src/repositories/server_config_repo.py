@@ -21,48 +21,14 @@ ALLOWED_COLUMNS = {
     "require_image_or_video"
 }
 
-def create_server_config_table(connection):
+async def insert_server_with_parameters(connection, guild_id, hall_of_fame_channel_id, reaction_threshold,
+                                        post_due_date, leaderboard_message_ids, sweep_limit, sweep_limited,
+                                        include_author_in_reaction_calculation, allow_messages_in_hof_channel,
+                                        custom_emoji_check_logic, whitelisted_emojis, joined_date, leaderboard_setup,
+                                        ignore_bot_messages, server_member_count, reaction_count_calculation_method,
+                                        hide_hof_post_below_threshold, require_image_or_video):
     cursor = connection.cursor()
-    cursor.execute("""
-            CREATE TABLE IF NOT EXISTS server_configs (
-                guild_id BIGINT PRIMARY KEY,
-                hall_of_fame_channel_id BIGINT,
-                reaction_threshold INT DEFAULT 5,
-                post_due_date INT DEFAULT 30,
-                leaderboard_message_ids TEXT[],
-                sweep_limit INT DEFAULT 100,
-                sweep_limited BOOLEAN DEFAULT TRUE,
-                include_author_in_reaction_calculation BOOLEAN DEFAULT TRUE,
-                allow_messages_in_hof_channel BOOLEAN DEFAULT TRUE,
-                custom_emoji_check_logic BOOLEAN DEFAULT FALSE,
-                whitelisted_emojis TEXT[],
-                joined_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                leaderboard_setup BOOLEAN DEFAULT FALSE,
-                ignore_bot_messages BOOLEAN DEFAULT FALSE,
-                server_member_count INT DEFAULT 0,
-                reaction_count_calculation_method VARCHAR(50) DEFAULT 'most_reactions_on_emoji',
-                hide_hof_post_below_threshold BOOLEAN DEFAULT TRUE,
-                require_image_or_video BOOLEAN DEFAULT FALSE
-            )
-        """
-    )
-    # Add require_image_or_video column if it doesn't exist
-    try:
-        cursor.execute("ALTER TABLE server_configs ADD COLUMN IF NOT EXISTS require_image_or_video BOOLEAN DEFAULT FALSE")
-    except Exception:
-        connection.rollback()
-
-    connection.commit()
-    cursor.close()
-
-def insert_server_with_parameters(connection, guild_id, hall_of_fame_channel_id, reaction_threshold,
-                                  post_due_date, leaderboard_message_ids, sweep_limit, sweep_limited,
-                                  include_author_in_reaction_calculation, allow_messages_in_hof_channel,
-                                  custom_emoji_check_logic, whitelisted_emojis, joined_date, leaderboard_setup,
-                                  ignore_bot_messages, server_member_count, reaction_count_calculation_method,
-                                  hide_hof_post_below_threshold, require_image_or_video):
-    cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         INSERT INTO server_configs (
             guild_id, hall_of_fame_channel_id, reaction_threshold, post_due_date, leaderboard_message_ids,
             sweep_limit, sweep_limited, include_author_in_reaction_calculation, allow_messages_in_hof_channel,
@@ -78,57 +44,57 @@ def insert_server_with_parameters(connection, guild_id, hall_of_fame_channel_id,
         custom_emoji_check_logic, whitelisted_emojis, joined_date, leaderboard_setup, ignore_bot_messages,
         server_member_count, reaction_count_calculation_method, hide_hof_post_below_threshold, require_image_or_video
     ))
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
-def update_server_config_param(guild_id, param_name, param_value, connection):
+async def update_server_config_param(guild_id, param_name, param_value, connection):
     cursor = connection.cursor()
     if param_name not in ALLOWED_COLUMNS:
         raise ValueError("Invalid column name")
     query = f"UPDATE server_configs SET {param_name} = %s WHERE guild_id = %s"
-    cursor.execute(query, (param_value, guild_id))
-    connection.commit()
-    cursor.close()
+    await cursor.execute(query, (param_value, guild_id))
+    await connection.commit()
+    await cursor.close()
 
-def get_parameter_value(connection, guild_id, param_name):
+async def get_parameter_value(connection, guild_id, param_name):
     cursor = connection.cursor()
     if param_name not in ALLOWED_COLUMNS:
         raise ValueError("Invalid column name")
     query = f"SELECT {param_name} FROM server_configs WHERE guild_id = %s"
-    cursor.execute(query, (guild_id,))
-    result = cursor.fetchone()
-    cursor.close()
+    await cursor.execute(query, (guild_id,))
+    result = await cursor.fetchone()
+    await cursor.close()
     return result[0] if result else None
 
-def insert_server_config(connection, guild_id):
+async def insert_server_config(connection, guild_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         INSERT INTO server_configs (guild_id)
         VALUES (%s)
         ON CONFLICT (guild_id) DO NOTHING;
     """, (guild_id,))
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
-def check_if_guild_exists(connection, guild_id):
+async def check_if_guild_exists(connection, guild_id):
     cursor = connection.cursor()
-    cursor.execute("SELECT 1 FROM server_configs WHERE guild_id = %s", (guild_id,))
-    exists = cursor.fetchone() is not None
-    cursor.close()
+    await cursor.execute("SELECT 1 FROM server_configs WHERE guild_id = %s", (guild_id,))
+    exists = await cursor.fetchone() is not None
+    await cursor.close()
     return exists
 
-def delete_server_config(connection, guild_id):
+async def delete_server_config(connection, guild_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         DELETE FROM server_configs 
         WHERE guild_id = %s
     """, (guild_id,))
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
-def get_server_classes(connection) -> dict[int, ServerClass]:
+async def get_server_classes(connection) -> dict[int, ServerClass]:
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         SELECT hall_of_fame_channel_id, guild_id, reaction_threshold, post_due_date,
                leaderboard_message_ids, sweep_limit, sweep_limited, include_author_in_reaction_calculation,
                allow_messages_in_hof_channel, custom_emoji_check_logic, whitelisted_emojis,
@@ -136,8 +102,8 @@ def get_server_classes(connection) -> dict[int, ServerClass]:
                reaction_count_calculation_method, hide_hof_post_below_threshold, require_image_or_video
         FROM server_configs
     """)
-    rows = cursor.fetchall()
-    cursor.close()
+    rows = await cursor.fetchall()
+    await cursor.close()
 
     classes = {}
     for row in rows:
@@ -190,10 +156,10 @@ def row_to_server_class(row) -> ServerClass:
     )
 
 
-def get_all_server_configs(connection) -> list[ServerClass]:
+async def get_all_server_configs(connection) -> list[ServerClass]:
     cursor = connection.cursor()
     # Select columns in a stable order and keep joined_date available separately if needed.
-    cursor.execute("""
+    await cursor.execute("""
         SELECT guild_id, hall_of_fame_channel_id, reaction_threshold, post_due_date,
                leaderboard_message_ids, sweep_limit, sweep_limited, include_author_in_reaction_calculation,
                allow_messages_in_hof_channel, custom_emoji_check_logic, whitelisted_emojis,
@@ -201,6 +167,22 @@ def get_all_server_configs(connection) -> list[ServerClass]:
                reaction_count_calculation_method, hide_hof_post_below_threshold, require_image_or_video
         FROM server_configs
     """)
-    rows = cursor.fetchall()
-    cursor.close()
+    rows = await cursor.fetchall()
+    await cursor.close()
     return [row_to_server_class(row) for row in rows]
+
+
+async def get_server_class(connection, guild_id) -> ServerClass | None:
+    cursor = connection.cursor()
+    await cursor.execute("""
+        SELECT guild_id, hall_of_fame_channel_id, reaction_threshold, post_due_date,
+               leaderboard_message_ids, sweep_limit, sweep_limited, include_author_in_reaction_calculation,
+               allow_messages_in_hof_channel, custom_emoji_check_logic, whitelisted_emojis,
+               joined_date, leaderboard_setup, ignore_bot_messages, server_member_count,
+               reaction_count_calculation_method, hide_hof_post_below_threshold, require_image_or_video
+        FROM server_configs
+        WHERE guild_id = %s
+    """, (guild_id,))
+    row = await cursor.fetchone()
+    await cursor.close()
+    return row_to_server_class(row) if row else None
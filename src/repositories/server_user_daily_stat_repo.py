@@ -0,0 +1,29 @@
+async def add_daily_stat_deltas(connection, deltas):
+    """
+    deltas is a list of tuples: (guild_id, user_id, day, message_delta, reaction_delta)
+    Not committed here, the caller commits it in one transaction with the totals in server_user
+    """
+    if not deltas:
+        return
+    cursor = connection.cursor()
+    await cursor.executemany(
+        """
+        INSERT INTO server_user_daily_stat
+            (guild_id, user_id, day, hall_of_fame_messages, hall_of_fame_message_reactions)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (guild_id, user_id, day) DO UPDATE SET
+            hall_of_fame_messages = server_user_daily_stat.hall_of_fame_messages + excluded.hall_of_fame_messages,
+            hall_of_fame_message_reactions = server_user_daily_stat.hall_of_fame_message_reactions + excluded.hall_of_fame_message_reactions
+        """,
+        deltas,
+    )
+    await cursor.close()
+
+async def delete_daily_stats_for_guild(connection, guild_id):
+    cursor = connection.cursor()
+    await cursor.execute("""
+        DELETE FROM server_user_daily_stat
+        WHERE guild_id = %s
+    """, (guild_id,))
+    await connection.commit()
+    await cursor.close()
@@ -1,33 +1,9 @@
-def create_server_user_table(connection):
+async def insert_server_user(connection, user_id, guild_id, monthly_reaction_rank,
+                             total_message_rank, total_reaction_rank, this_month_hall_of_fame_messages,
+                             total_hall_of_fame_messages, monthly_message_rank,
+                             this_month_hall_of_fame_message_reactions, total_hall_of_fame_message_reactions):
     cursor = connection.cursor()
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS server_user (
-            user_id BIGINT NOT NULL,
-            guild_id BIGINT NOT NULL,
-            monthly_reaction_rank INTEGER,
-            total_message_rank INTEGER,
-            total_reaction_rank INTEGER,
-            this_month_hall_of_fame_messages INTEGER,
-            total_hall_of_fame_messages INTEGER,
-            monthly_message_rank INTEGER,
-            this_month_hall_of_fame_message_reactions INTEGER,
-            total_hall_of_fame_message_reactions INTEGER,
-            PRIMARY KEY (user_id, guild_id)
-        )
-        """
-    )
-    cursor.execute("ALTER TABLE server_user DROP CONSTRAINT IF EXISTS server_user_pkey CASCADE;")
-    cursor.execute("ALTER TABLE server_user ADD PRIMARY KEY (user_id, guild_id);")
-    connection.commit()
-    cursor.close()
-
-def insert_server_user(connection, user_id, guild_id, monthly_reaction_rank,
-                       total_message_rank, total_reaction_rank, this_month_hall_of_fame_messages,
-                       total_hall_of_fame_messages, monthly_message_rank,
-                       this_month_hall_of_fame_message_reactions, total_hall_of_fame_message_reactions):
-    cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         INSERT INTO server_user 
         (user_id, guild_id, monthly_reaction_rank, total_message_rank, total_reaction_rank,
          this_month_hall_of_fame_messages, total_hall_of_fame_messages, monthly_message_rank,
@@ -36,68 +12,162 @@ def insert_server_user(connection, user_id, guild_id, monthly_reaction_rank,
     """, (user_id, guild_id, monthly_reaction_rank, total_message_rank, total_reaction_rank,
           this_month_hall_of_fame_messages, total_hall_of_fame_messages, monthly_message_rank,
           this_month_hall_of_fame_message_reactions, total_hall_of_fame_message_reactions))
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
-def delete_server_users(connection, guild_id):
+async def delete_server_users(connection, guild_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         DELETE FROM server_user 
         WHERE guild_id = %s
     """, (guild_id,))
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
-def get_server_user(connection, user_id, guild_id):
+async def get_server_user(connection, user_id, guild_id):
     cursor = connection.cursor()
-    cursor.execute("""
+    await cursor.execute("""
         SELECT *
         FROM server_user
         WHERE user_id = %s AND guild_id = %s
     """, (user_id, guild_id))
-    row = cursor.fetchone()
+    row = await cursor.fetchone()
     if row is not None:
         columns = [desc[0] for desc in cursor.description]
         result = dict(zip(columns, row))
     else:
         result = None
-    cursor.close()
+    await cursor.close()
     return result
 
-def update_user_stats(connection, stats, user_id, guild_id):
+async def add_user_stat_deltas(connection, deltas, month_start):
+    """
+    Add message and reaction deltas to the totals of the users, and refresh their monthly figures from the
+    server_user_daily_stat buckets, which must already include the deltas. Not committed here, the caller commits
+    it in one transaction with the buckets and the change that produced the deltas.
+    :param connection: The database connection
+    :param deltas: A list of tuples: (user_id, guild_id, message_delta, reaction_delta)
+    :param month_start: The first day of the rolling monthly window
+    :return: None
+    """
+    if not deltas:
+        return
     cursor = connection.cursor()
-    cursor.execute(
+    await cursor.executemany(
         """
         INSERT INTO server_user (
-            user_id, guild_id, monthly_reaction_rank, total_message_rank, total_reaction_rank,
-            this_month_hall_of_fame_messages, total_hall_of_fame_messages, monthly_message_rank,
-            this_month_hall_of_fame_message_reactions, total_hall_of_fame_message_reactions
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            user_id, guild_id, total_hall_of_fame_messages, total_hall_of_fame_message_reactions,
+            this_month_hall_of_fame_messages, this_month_hall_of_fame_message_reactions
+        )
+        SELECT delta.user_id, delta.guild_id, message_delta, reaction_delta,
+               COALESCE(SUM(daily.hall_of_fame_messages), 0), COALESCE(SUM(daily.hall_of_fame_message_reactions), 0)
+        FROM (VALUES (%s::bigint, %s::bigint, %s::integer, %s::integer)) AS delta (user_id, guild_id, message_delta, reaction_delta)
+        LEFT JOIN server_user_daily_stat daily
+            ON daily.guild_id = delta.guild_id AND daily.user_id = delta.user_id AND daily.day >= %s
+        GROUP BY delta.user_id, delta.guild_id, message_delta, reaction_delta
         ON CONFLICT(user_id, guild_id) DO UPDATE SET
-            total_hall_of_fame_messages = excluded.total_hall_of_fame_messages,
+            total_hall_of_fame_messages = COALESCE(server_user.total_hall_of_fame_messages, 0) + excluded.total_hall_of_fame_messages,
+            total_hall_of_fame_message_reactions = COALESCE(server_user.total_hall_of_fame_message_reactions, 0) + excluded.total_hall_of_fame_message_reactions,
             this_month_hall_of_fame_messages = excluded.this_month_hall_of_fame_messages,
-            total_hall_of_fame_message_reactions = excluded.total_hall_of_fame_message_reactions,
-            this_month_hall_of_fame_message_reactions = excluded.this_month_hall_of_fame_message_reactions,
-            total_message_rank = excluded.total_message_rank,
-            monthly_message_rank = excluded.monthly_message_rank,
-            total_reaction_rank = excluded.total_reaction_rank,
-            monthly_reaction_rank = excluded.monthly_reaction_rank
+            this_month_hall_of_fame_message_reactions = excluded.this_month_hall_of_fame_message_reactions
+        """,
+        [(user_id, guild_id, message_delta, reaction_delta, month_start)
+         for user_id, guild_id, message_delta, reaction_delta in deltas],
+    )
+    await cursor.close()
+
+
+async def reconcile_user_stats(connection, guild_ids):
+    """
+    Rebuild the daily buckets and the totals of every user in the given guilds from their Hall of Fame messages,
+    correcting deltas that were missed, such as posts deleted from the Hall of Fame channel. The monthly figures
+    are left to refresh_user_ranks. Not committed here, the caller commits it in one transaction.
+    :param connection: The database connection
+    :param guild_ids: The guilds to reconcile
+    :return: None
+    """
+    cursor = connection.cursor()
+    await cursor.execute("""
+        DELETE FROM server_user_daily_stat
+        WHERE guild_id = ANY(%s)
+    """, (list(guild_ids),))
+    await cursor.execute("""
+        INSERT INTO server_user_daily_stat (guild_id, user_id, day, hall_of_fame_messages, hall_of_fame_message_reactions)
+        SELECT guild_id, author_id, created_at::date, COUNT(*), SUM(reaction_count)
+        FROM hall_of_fame_message
+        WHERE guild_id = ANY(%s)
+        GROUP BY guild_id, author_id, created_at::date
+    """, (list(guild_ids),))
+    await cursor.execute("""
+        INSERT INTO server_user (user_id, guild_id, total_hall_of_fame_messages, total_hall_of_fame_message_reactions)
+        SELECT user_id, guild_id, SUM(hall_of_fame_messages), SUM(hall_of_fame_message_reactions)
+        FROM server_user_daily_stat
+        WHERE guild_id = ANY(%s)
+        GROUP BY guild_id, user_id
+        ON CONFLICT (user_id, guild_id) DO UPDATE SET
+            total_hall_of_fame_messages = excluded.total_hall_of_fame_messages,
+            total_hall_of_fame_message_reactions = excluded.total_hall_of_fame_message_reactions
+    """, (list(guild_ids),))
+    await cursor.execute("""
+        UPDATE server_user SET total_hall_of_fame_messages = 0, total_hall_of_fame_message_reactions = 0
+        WHERE guild_id = ANY(%s) AND NOT EXISTS (
+            SELECT 1 FROM server_user_daily_stat daily
+            WHERE daily.guild_id = server_user.guild_id AND daily.user_id = server_user.user_id
+        )
+    """, (list(guild_ids),))
+    await cursor.close()
+
+
+async def refresh_user_ranks(connection, guild_ids, month_start):
+    """
+    Roll the monthly figures of every user in the given guilds forward to the current window and assign
+    RANK() per guild for the four stats, tied users share a rank. The totals are kept up to date as messages
+    are posted, so only the users and the daily buckets of the monthly window are read.
+    :param connection: The database connection
+    :param guild_ids: The guilds to refresh
+    :param month_start: The first day of the rolling monthly window
+    :return: None
+    """
+    cursor = connection.cursor()
+    await cursor.execute(
+        """
+        WITH monthly AS (
+            SELECT guild_id, user_id,
+                   SUM(hall_of_fame_messages) AS messages, SUM(hall_of_fame_message_reactions) AS reactions
+            FROM server_user_daily_stat
+            WHERE guild_id = ANY(%s) AND day >= %s
+            GROUP BY guild_id, user_id
+        ), user_stats AS (
+            SELECT server_user.user_id, server_user.guild_id,
+                   COALESCE(server_user.total_hall_of_fame_messages, 0) AS total_messages,
+                   COALESCE(server_user.total_hall_of_fame_message_reactions, 0) AS total_reactions,
+                   COALESCE(monthly.messages, 0) AS monthly_messages,
+                   COALESCE(monthly.reactions, 0) AS monthly_reactions
+            FROM server_user
+            LEFT JOIN monthly ON monthly.guild_id = server_user.guild_id AND monthly.user_id = server_user.user_id
+            WHERE server_user.guild_id = ANY(%s)
+        ), ranked AS (
+            SELECT user_id, guild_id, monthly_messages, monthly_reactions,
+                   RANK() OVER (PARTITION BY guild_id ORDER BY total_messages DESC) AS total_message_rank,
+                   RANK() OVER (PARTITION BY guild_id ORDER BY monthly_messages DESC) AS monthly_message_rank,
+                   RANK() OVER (PARTITION BY guild_id ORDER BY total_reactions DESC) AS total_reaction_rank,
+                   RANK() OVER (PARTITION BY guild_id ORDER BY monthly_reactions DESC) AS monthly_reaction_rank
+            FROM user_stats
+        )
+        UPDATE server_user SET
+            this_month_hall_of_fame_messages = ranked.monthly_messages,
+            this_month_hall_of_fame_message_reactions = ranked.monthly_reactions,
+            total_message_rank = ranked.total_message_rank,
+            monthly_message_rank = ranked.monthly_message_rank,
+            total_reaction_rank = ranked.total_reaction_rank,
+            monthly_reaction_rank = ranked.monthly_reaction_rank
+        FROM ranked
+        WHERE server_user.user_id = ranked.user_id AND server_user.guild_id = ranked.guild_id
         """,
-        (
-            user_id,
-            guild_id,
-            stats["monthly_reaction_rank"],
-            stats["total_message_rank"],
-            stats["total_reaction_rank"],
-            stats["this_month_hall_of_fame_messages"],
-            stats["total_hall_of_fame_messages"],
-            stats["monthly_message_rank"],
-            stats["this_month_hall_of_fame_message_reactions"],
-            stats["total_hall_of_fame_message_reactions"],
-        ),
+        (list(guild_ids), month_start, list(guild_ids)),
     )
-    connection.commit()
-    cursor.close()
+    await connection.commit()
+    await cursor.close()
 
 
 ALLOWED_STAT_FIELDS = {
@@ -112,7 +182,7 @@ ALLOWED_STAT_FIELDS = {
 }
 
 
-def get_top_users_by_stat(connection, guild_id, stat_field, limit=10):
+async def get_top_users_by_stat(connection, guild_id, stat_field, limit=10):
     if stat_field not in ALLOWED_STAT_FIELDS:
         raise ValueError(f"Invalid stat_field: {stat_field}")
     cursor = connection.cursor()
@@ -123,14 +193,14 @@ def get_top_users_by_stat(connection, guild_id, stat_field, limit=10):
         ORDER BY {stat_field} DESC
         LIMIT %s
     """
-    cursor.execute(query, (guild_id, limit))
+    await cursor.execute(query, (guild_id, limit))
     columns = [desc[0] for desc in cursor.description]
-    results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-    cursor.close()
+    results = [dict(zip(columns, row)) for row in await cursor.fetchall()]
+    await cursor.close()
     return results
 
 
-def check_if_user_is_top_of_stat(connection, user_id, guild_id, stat_field):
+async def check_if_user_is_top_of_stat(connection, user_id, guild_id, stat_field):
     """
     Returns True if the given user is currently #1 for the specified stat field within the guild.
     """
@@ -144,7 +214,7 @@ def check_if_user_is_top_of_stat(connection, user_id, guild_id, stat_field):
         ORDER BY {stat_field} DESC
         LIMIT 1
     """
-    cursor.execute(query, (guild_id,))
-    row = cursor.fetchone()
-    cursor.close()
+    await cursor.execute(query, (guild_id,))
+    row = await cursor.fetchone()
+    await cursor.close()
     return row is not None and row[0] == user_id
\ No newline at end of file
@@ -42,6 +42,10 @@ cd "$WORKDIR"
 source "$VENV/bin/activate"
 export $(grep -v '^#' "../.env" | xargs)
 
+# Apply pending database migrations, the bot only verifies the schema version on startup
+echo "[INFO] Applying database migrations..."
+python migrate.py
+
 # Start the bot in foreground (systemd manages it)
 echo "[INFO] Starting bot with auto-retry..."
 while true; do
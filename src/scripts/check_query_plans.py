@@ -0,0 +1,132 @@
+"""
+Query plan regression check for the guild scoped queries of hall_of_fame_message_repo.
+
+Every repository function is called against a connection that runs EXPLAIN in place of the statement, so the SQL
+that is checked is exactly the SQL the bot sends. Sequential scans are disabled for the session, which makes the
+planner use an index whenever one is usable even on a small development database. A function fails the check
+if hall_of_fame_message is still read without an index condition.
+
+Run from the src folder with `python -m scripts.check_query_plans`, it exits with status 1 if a check fails.
+"""
+import asyncio
+import datetime
+import os
+import sys
+from datetime import timezone
+from dotenv import load_dotenv
+import database
+from repositories import hall_of_fame_message_repo
+
+CHECKED_TABLE = "hall_of_fame_message"
+INDEX_SCAN_TYPES = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+class ExplainCursor:
+    """
+    Cursor that explains the statements it is given instead of running them and returns no rows
+    """
+    def __init__(self, cursor, plans: list):
+        self.cursor = cursor
+        self.plans = plans
+        self.description = None
+
+    async def execute(self, query, params=None):
+        await self.cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        self.plans.append((await self.cursor.fetchone())[0][0]["Plan"])
+        self.description = self.cursor.description
+
+    async def fetchone(self):
+        return None
+
+    async def fetchall(self):
+        return []
+
+    async def close(self):
+        await self.cursor.close()
+
+
+class ExplainConnection:
+    """
+    Connection handed to the repository functions, collecting the plan of every statement they execute
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.plans = []
+
+    def cursor(self):
+        return ExplainCursor(self.connection.cursor(), self.plans)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def unindexed_scans(plan: dict) -> list[str]:
+    """
+    Find the scans of the checked table in a plan that do not use an index condition
+    :param plan: The JSON plan node
+    :return: The node types of the offending scans
+    """
+    offending = []
+    # A bitmap heap scan reads the rows found by its bitmap index scan children, which are checked themselves
+    if plan["Node Type"] != "Bitmap Heap Scan" and (plan.get("Relation Name") == CHECKED_TABLE
+                                                     or plan.get("Index Name", "").startswith(CHECKED_TABLE)):
+        if plan["Node Type"] not in INDEX_SCAN_TYPES or "Index Cond" not in plan:
+            offending.append(plan["Node Type"])
+    for child in plan.get("Plans", []):
+        offending.extend(unindexed_scans(child))
+    return offending
+
+
+def index_names(plan: dict) -> list[str]:
+    """
+    The indexes used anywhere in a plan
+    :param plan: The JSON plan node
+    :return: The index names
+    """
+    names = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        names.extend(index_names(child))
+    return names
+
+
+async def main() -> bool:
+    month_end = datetime.datetime.now(timezone.utc)
+    month_start = month_end - datetime.timedelta(days=30)
+    checks = {
+        "delete_hall_of_fame_messages_for_guild": lambda connection: hall_of_fame_message_repo.delete_hall_of_fame_messages_for_guild(connection, 0),
+        "get_all_hall_of_fame_messages_for_guild": lambda connection: hall_of_fame_message_repo.get_all_hall_of_fame_messages_for_guild(connection, 0),
+        "find_hall_of_fame_message": lambda connection: hall_of_fame_message_repo.find_hall_of_fame_message(connection, 0, 0, 0),
+        "get_message_counts_today_by_guild": lambda connection: hall_of_fame_message_repo.get_message_counts_today_by_guild(connection),
+        "update_reaction_counts": lambda connection: hall_of_fame_message_repo.update_reaction_counts(connection, {0: 0}),
+        "find_members_for_guild": lambda connection: hall_of_fame_message_repo.find_members_for_guild(connection, 0),
+        "find_top_messages_by_reaction_count": lambda connection: hall_of_fame_message_repo.find_top_messages_by_reaction_count(connection, 0, 20),
+        "count_messages_for_guild": lambda connection: hall_of_fame_message_repo.count_messages_for_guild(connection, 0),
+        "get_monthly_message_counts_by_guild": lambda connection: hall_of_fame_message_repo.get_monthly_message_counts_by_guild(connection, month_start, month_end),
+    }
+
+    connection = await database.connect(os.getenv('DEV_TEST') == "True")
+    passed = True
+    try:
+        await connection.execute("SET enable_seqscan = off")
+        for function_name, check in checks.items():
+            explain_connection = ExplainConnection(connection)
+            await check(explain_connection)
+            offending = [node for plan in explain_connection.plans for node in unindexed_scans(plan)]
+            indexes = [name for plan in explain_connection.plans for name in index_names(plan)]
+            if offending:
+                passed = False
+                print(f"FAIL {function_name}: {', '.join(offending)} on {CHECKED_TABLE}")
+            else:
+                print(f"ok   {function_name}: {', '.join(indexes)}")
+    finally:
+        await connection.rollback()
+        await connection.close()
+    return passed
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -10,12 +10,12 @@ def month_bounds_utc(reference_dt=None):
         next_month_start = datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
     return month_start.date(), month_start, next_month_start
 
-def run_monthly_snapshot(connection, guilds, reference_dt=None):
+async def run_monthly_snapshot(connection, guilds, reference_dt=None):
     month_start_date, month_start_dt, next_month_start_dt = month_bounds_utc(reference_dt)
     captured_at = reference_dt or datetime.now(timezone.utc)
 
     # single query for all message counts
-    message_counts_data = hall_of_fame_message_repo.get_monthly_message_counts_by_guild(
+    message_counts_data = await hall_of_fame_message_repo.get_monthly_message_counts_by_guild(
         connection,
         month_start_dt,
         next_month_start_dt,
@@ -36,7 +36,7 @@ def run_monthly_snapshot(connection, guilds, reference_dt=None):
             captured_at,
         ))
 
-    guild_monthly_snapshot_repo.upsert_guild_monthly_snapshots_batch(
+    await guild_monthly_snapshot_repo.upsert_guild_monthly_snapshots_batch(
         connection,
         records
     )
@@ -3,7 +3,9 @@ from dotenv import load_dotenv
 import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime, timezone
-import psycopg2
+import asyncio
+import psycopg
+import database
 from repositories import (
     server_config_repo,
     hall_of_fame_message_repo,
@@ -16,33 +18,33 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, os.pardir))
 
 load_dotenv('../.env')
-connection = psycopg2.connect(host=os.getenv('POSTGRES_HOST'),
-                              database=os.getenv('POSTGRES_DB'),
-                              user=os.getenv('POSTGRES_USER'),
-                              password=os.getenv('POSTGRES_PASSWORD'))
+# Opened by main() before the graphs are exported
+connection = None
 
 server_graph_folder = os.path.join(PROJECT_ROOT, 'graphs')
 show_plots = False
 
 server_stats = []
 
-for config in server_config_repo.get_all_server_configs(connection):
-    if config:
-        message_count = hall_of_fame_message_repo.count_messages_for_guild(connection, config.guild_id)
-        joined_date = server_config_repo.get_parameter_value(connection, config.guild_id, "joined_date")
-        server_stats.append({
-            'server': config,
-            'guild_id': config.guild_id,
-            'reaction_threshold': config.reaction_threshold,
-            'include_author_in_reaction_calculation': config.include_author_in_reaction_calculation,
-            'allow_messages_in_hof_channel': config.allow_messages_in_hof_channel,
-            'message_count': message_count,
-            'server_member_count': config.server_member_count,
-            'joined_date': joined_date
-        })
-
-
-def fetch_time_series(connection, table_name: str, value_column: str):
+
+async def load_server_stats():
+    for config in await server_config_repo.get_all_server_configs(connection):
+        if config:
+            message_count = await hall_of_fame_message_repo.count_messages_for_guild(connection, config.guild_id)
+            joined_date = await server_config_repo.get_parameter_value(connection, config.guild_id, "joined_date")
+            server_stats.append({
+                'server': config,
+                'guild_id': config.guild_id,
+                'reaction_threshold': config.reaction_threshold,
+                'include_author_in_reaction_calculation': config.include_author_in_reaction_calculation,
+                'allow_messages_in_hof_channel': config.allow_messages_in_hof_channel,
+                'message_count': message_count,
+                'server_member_count': config.server_member_count,
+                'joined_date': joined_date
+            })
+
+
+async def fetch_time_series(connection, table_name: str, value_column: str):
     """Fetch (timestamp,value) from a Postgres bot-stats style table.
 
     This script used to read from MongoDB `bot_stats.*` collections. In Postgres we expect
@@ -51,17 +53,17 @@ def fetch_time_series(connection, table_name: str, value_column: str):
     """
     cursor = connection.cursor()
     try:
-        cursor.execute(
+        await cursor.execute(
             f"SELECT timestamp, {value_column} FROM {table_name} ORDER BY timestamp ASC"
         )
-        rows = cursor.fetchall()
+        rows = await cursor.fetchall()
         return [(row[0], row[1]) for row in rows]
-    except psycopg2.Error:
+    except psycopg.Error:
         # Missing table/column etc. Keep the script usable for installations that don't track bot stats.
-        connection.rollback()
+        await connection.rollback()
         return []
     finally:
-        cursor.close()
+        await cursor.close()
 
 
 # Update the plot function to include server_member_count
@@ -109,7 +111,7 @@ def create_plot_where_msg_count_greater_than_zero():
     create_plot('server_stats_msg_count_gt_zero.png', filtered_stats)
 
 
-def create_bot_stats_plot():
+async def create_bot_stats_plot():
     """Export total messages over time.
 
     Source priority:
@@ -118,7 +120,7 @@ def create_bot_stats_plot():
 
     This ensures the graph is *always* exported and reflects Postgres data.
     """
-    series = fetch_time_series(connection, 'bot_stats_total_messages', 'total_messages')
+    series = await fetch_time_series(connection, 'bot_stats_total_messages', 'total_messages')
 
     if series:
         timestamps = [ts for ts, _ in series]
@@ -128,7 +130,7 @@ def create_bot_stats_plot():
         # Build a cumulative time series from hall_of_fame_message.
         cursor = connection.cursor()
         try:
-            cursor.execute(
+            await cursor.execute(
                 """
                 SELECT date_trunc('day', created_at) AS day, COUNT(*)
                 FROM hall_of_fame_message
@@ -137,9 +139,9 @@ def create_bot_stats_plot():
                 ORDER BY day ASC
                 """
             )
-            rows = cursor.fetchall()
+            rows = await cursor.fetchall()
         finally:
-            cursor.close()
+            await cursor.close()
 
         if not rows:
             print("Skipping bot_total_messages.png (no hall_of_fame_message rows found)")
@@ -177,12 +179,12 @@ def create_bot_stats_plot():
         print(f"WARNING: savefig returned but file not found: {out_path}")
 
 
-def create_plot_server_count_and_total_members():
+async def create_plot_server_count_and_total_members():
     # Expected tables:
     # - bot_stats_server_count(timestamp TIMESTAMP, server_count INT)
     # - bot_stats_total_users(timestamp TIMESTAMP, total_users BIGINT)
-    server_series = fetch_time_series(connection, 'bot_stats_server_count', 'server_count')
-    users_series = fetch_time_series(connection, 'bot_stats_total_users', 'total_users')
+    server_series = await fetch_time_series(connection, 'bot_stats_server_count', 'server_count')
+    users_series = await fetch_time_series(connection, 'bot_stats_total_users', 'total_users')
     if not server_series or not users_series:
         return
 
@@ -294,19 +296,19 @@ def create_histogram_messages_per_day():
         plt.show()
 
 
-def create_histogram_of_messages_per_month():
+async def create_histogram_of_messages_per_month():
     # Uses hall_of_fame_message.created_at in Postgres
     cursor = connection.cursor()
     try:
         # Filter out epoch/placeholder timestamps (common when legacy data used 1970-01-01).
-        cursor.execute(
+        await cursor.execute(
             """
             SELECT MIN(created_at), MAX(created_at)
             FROM hall_of_fame_message
             WHERE created_at >= TIMESTAMP '2000-01-01'
             """
         )
-        row = cursor.fetchone()
+        row = await cursor.fetchone()
         if not row or not row[0] or not row[1]:
             return
         start_date = row[0].replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -317,7 +319,7 @@ def create_histogram_of_messages_per_month():
         while current <= end_max:
             # next month
             next_month = datetime(current.year + (current.month // 12), ((current.month % 12) + 1), 1)
-            cursor.execute(
+            await cursor.execute(
                 """
                 SELECT COUNT(*) AS message_count,
                        COUNT(DISTINCT guild_id) AS server_count
@@ -327,13 +329,13 @@ def create_histogram_of_messages_per_month():
                 """,
                 (current, next_month),
             )
-            count, server_count = cursor.fetchone()
+            count, server_count = await cursor.fetchone()
             month_str = current.strftime("%Y-%m")
             messages_per_month[month_str] = {'count': count or 0, 'server_count': server_count or 0}
             current = next_month
 
     finally:
-        cursor.close()
+        await cursor.close()
 
     if not messages_per_month:
         return
@@ -397,9 +399,9 @@ def get_month_window(reference_dt=None):
     return month_start, next_month_start
 
 
-def create_monthly_members_per_server_plot(reference_dt=None):
+async def create_monthly_members_per_server_plot(reference_dt=None):
     month_start, _ = get_month_window(reference_dt)
-    rows = guild_monthly_snapshot_repo.get_monthly_members_per_server(connection, month_start.date())
+    rows = await guild_monthly_snapshot_repo.get_monthly_members_per_server(connection, month_start.date())
     if not rows:
         return
 
@@ -422,9 +424,9 @@ def create_monthly_members_per_server_plot(reference_dt=None):
         plt.show()
 
 
-def create_monthly_messages_per_server_plot(reference_dt=None):
+async def create_monthly_messages_per_server_plot(reference_dt=None):
     month_start, _ = get_month_window(reference_dt)
-    rows = guild_monthly_snapshot_repo.get_monthly_messages_per_server(connection, month_start.date())
+    rows = await guild_monthly_snapshot_repo.get_monthly_messages_per_server(connection, month_start.date())
     if not rows:
         return
 
@@ -447,9 +449,9 @@ def create_monthly_messages_per_server_plot(reference_dt=None):
         plt.show()
 
 
-def create_monthly_messages_per_1k_members_plot(reference_dt=None):
+async def create_monthly_messages_per_1k_members_plot(reference_dt=None):
     month_start, _ = get_month_window(reference_dt)
-    rows = guild_monthly_snapshot_repo.get_monthly_messages_vs_members(connection, month_start.date())
+    rows = await guild_monthly_snapshot_repo.get_monthly_messages_vs_members(connection, month_start.date())
     if not rows:
         return
 
@@ -472,9 +474,9 @@ def create_monthly_messages_per_1k_members_plot(reference_dt=None):
         plt.show()
 
 
-def create_monthly_messages_vs_members_scatter(reference_dt=None):
+async def create_monthly_messages_vs_members_scatter(reference_dt=None):
     month_start, _ = get_month_window(reference_dt)
-    rows = guild_monthly_snapshot_repo.get_monthly_messages_vs_members(connection, month_start.date())
+    rows = await guild_monthly_snapshot_repo.get_monthly_messages_vs_members(connection, month_start.date())
     if not rows:
         return
 
@@ -493,8 +495,8 @@ def create_monthly_messages_vs_members_scatter(reference_dt=None):
         plt.show()
 
 
-def create_joins_leaves_per_month_plot():
-    rows = guild_lifecycle_event_repo.get_monthly_join_leave_counts(
+async def create_joins_leaves_per_month_plot():
+    rows = await guild_lifecycle_event_repo.get_monthly_join_leave_counts(
         connection,
         datetime(2000, 1, 1, tzinfo=timezone.utc),
         datetime.now(timezone.utc),
@@ -529,8 +531,8 @@ def create_joins_leaves_per_month_plot():
         plt.show()
 
 
-def create_active_servers_over_time_plot():
-    rows = guild_lifecycle_event_repo.get_active_servers_timeseries(
+async def create_active_servers_over_time_plot():
+    rows = await guild_lifecycle_event_repo.get_active_servers_timeseries(
         connection,
         datetime(2000, 1, 1, tzinfo=timezone.utc),
         datetime.now(timezone.utc),
@@ -553,27 +555,37 @@ def create_active_servers_over_time_plot():
         plt.show()
 
 
+async def main():
+    global connection, folder_path
+    connection = await database.connect()
+    try:
+        await load_server_stats()
+        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if not os.path.exists(server_graph_folder):
+            os.makedirs(server_graph_folder)
+        folder_path = os.path.join(server_graph_folder, timestamp_str)
+        if not os.path.exists(folder_path):
+            os.makedirs(folder_path)
+
+        print(f"Exporting graphs to: {os.path.abspath(folder_path)}")
+
+        await create_histogram_of_messages_per_month()
+        create_average_messages_per_day_compared_to_member_count()
+        create_histogram_messages_per_day()
+        await create_plot_server_count_and_total_members()
+        await create_bot_stats_plot()
+        create_bubble_chart()
+        create_plot('server_stats_all.png')
+        create_plot_where_msg_count_greater_than_zero()
+        await create_joins_leaves_per_month_plot()
+        await create_active_servers_over_time_plot()
+        await create_monthly_members_per_server_plot()
+        await create_monthly_messages_per_server_plot()
+        await create_monthly_messages_vs_members_scatter()
+        await create_monthly_messages_per_1k_members_plot()
+    finally:
+        await connection.close()
+
+
 if __name__ == "__main__":
-    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-    if not os.path.exists(server_graph_folder):
-        os.makedirs(server_graph_folder)
-    folder_path = os.path.join(server_graph_folder, timestamp_str)
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
-
-    print(f"Exporting graphs to: {os.path.abspath(folder_path)}")
-
-    create_histogram_of_messages_per_month()
-    create_average_messages_per_day_compared_to_member_count()
-    create_histogram_messages_per_day()
-    create_plot_server_count_and_total_members()
-    create_bot_stats_plot()
-    create_bubble_chart()
-    create_plot('server_stats_all.png')
-    create_plot_where_msg_count_greater_than_zero()
-    create_joins_leaves_per_month_plot()
-    create_active_servers_over_time_plot()
-    create_monthly_members_per_server_plot()
-    create_monthly_messages_per_server_plot()
-    create_monthly_messages_vs_members_scatter()
-    create_monthly_messages_per_1k_members_plot()
+    asyncio.run(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The bot imports its modules relative to src, as when it is run from there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+from classes.server_class import Server
+from classes.server_config_cache import ServerConfigCache
+from enums import calculation_method_type
+
+GUILD_ID = 1
+CHANNEL_ID = 10
+AUTHOR_ID = 100
+
+
+def server_config(reaction_count_calculation_method=calculation_method_type.MOST_REACTIONS_ON_EMOJI,
+                  include_author_in_reaction_calculation=True, custom_emoji_check_logic=False,
+                  whitelisted_emojis=None) -> Server:
+    """
+    Register and return the config of the test guild
+    """
+    server = Server(hall_of_fame_channel_id=99, guild_id=GUILD_ID, reaction_threshold=3, post_due_date=28,
+                    sweep_limit=1000, sweep_limited=False,
+                    include_author_in_reaction_calculation=include_author_in_reaction_calculation,
+                    allow_messages_in_hof_channel=False, custom_emoji_check_logic=custom_emoji_check_logic,
+                    whitelisted_emojis=whitelisted_emojis or [], leaderboard_setup=False, ignore_bot_messages=True,
+                    reaction_count_calculation_method=reaction_count_calculation_method,
+                    hide_hof_post_below_threshold=True, leaderboard_message_ids=[], server_member_count=10,
+                    require_image_or_video=False)
+    ServerConfigCache()[GUILD_ID] = server
+    return server
+
+
+class FakeReaction:
+    """
+    A reaction with the count seen when its message was fetched. Paging reads `current_user_ids`, so it sees
+    reactions made after the fetch like the Discord API does.
+    """
+    def __init__(self, emoji: str, user_ids: list[int], current_user_ids=None, during_paging=None):
+        self.emoji = emoji
+        self.count = len(user_ids)
+        self.burst_count = 0
+        self.paged_users = 0
+        self.current_user_ids = current_user_ids or (lambda: user_ids)
+        self.during_paging = during_paging
+
+    def users(self, type=None):
+        async def page():
+            if self.during_paging is not None:
+                self.during_paging()
+            for user_id in list(self.current_user_ids()):
+                self.paged_users += 1
+                yield SimpleNamespace(id=user_id)
+        return page()
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, reactions: dict[str, list[int]], author_id: int = AUTHOR_ID, channel=None):
+        self.id = message_id
+        self.guild = SimpleNamespace(id=GUILD_ID)
+        self.author = SimpleNamespace(id=author_id, bot=False)
+        self.channel = channel or SimpleNamespace(id=CHANNEL_ID)
+        self.reactions = [FakeReaction(emoji, user_ids) for emoji, user_ids in reactions.items()]
+        self.content = ""
+        self.reference = None
+
+
+class FakeChannel:
+    """
+    A channel whose messages are rebuilt from `reactions` on every fetch, with hooks to run code once while a
+    fetch or the paging of reactors is in flight
+    """
+    def __init__(self, reactions: dict[int, dict[str, list[int]]]):
+        self.id = CHANNEL_ID
+        self.reactions = reactions
+        self.fetches = 0
+        self.during_fetch = None
+        self.during_paging = None
+
+    def _run_once(self, hook_name: str):
+        hook = getattr(self, hook_name)
+        if hook is not None:
+            setattr(self, hook_name, None)
+            hook()
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        self.fetches += 1
+        message = FakeMessage(message_id, self.reactions[message_id], channel=self)
+        for reaction in message.reactions:
+            reaction.current_user_ids = lambda emoji=reaction.emoji: self.reactions[message_id].get(emoji, [])
+            reaction.during_paging = lambda: self._run_once("during_paging")
+        self._run_once("during_fetch")
+        await asyncio.sleep(0)
+        return message
+
+
+def reaction_event(message_id: int, emoji: str, user_id: int, added: bool):
+    return SimpleNamespace(guild_id=GUILD_ID, channel_id=CHANNEL_ID, message_id=message_id, emoji=emoji,
+                           user_id=user_id, event_type="REACTION_ADD" if added else "REACTION_REMOVE", member=None)
+
+
+def reset_singletons(*classes):
+    for cls in classes:
+        cls._instance = None
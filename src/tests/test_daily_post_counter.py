@@ -0,0 +1,28 @@
+import datetime
+import unittest
+from classes.daily_post_counter import DailyPostCounter
+
+
+class DailyPostCounterTest(unittest.TestCase):
+    def setUp(self):
+        DailyPostCounter._instance = None
+        self.counter = DailyPostCounter()
+
+    def test_counts_posts_per_guild(self):
+        self.counter.load({1: 2})
+        self.counter.increment(1)
+        self.counter.increment(2)
+        self.assertEqual((self.counter.count(1), self.counter.count(2), self.counter.count(3)), (3, 1, 0))
+
+    def test_counts_and_warnings_reset_on_a_new_day(self):
+        self.counter.increment(1)
+        self.counter.mark_warning_sent(1)
+        self.counter.day -= datetime.timedelta(days=1)
+        self.assertEqual(self.counter.count(1), 0)
+        self.assertFalse(self.counter.warning_sent(1))
+        self.assertEqual(self.counter.day, datetime.datetime.now(datetime.timezone.utc).date())
+
+    def test_load_replaces_the_counts_of_the_day(self):
+        self.counter.increment(1)
+        self.counter.load({2: 4})
+        self.assertEqual((self.counter.count(1), self.counter.count(2)), (0, 4))
@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+from classes.edit_scheduler import EditScheduler
+
+
+class EditSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        EditScheduler._instance = None
+        self.scheduler = EditScheduler()
+        self.scheduler.min_interval = 0.01
+        self.sent = []
+
+    def edit(self, label: str):
+        async def send_edit():
+            self.sent.append(label)
+        return send_edit
+
+    async def settle(self):
+        while self.scheduler.tasks:
+            await asyncio.gather(*self.scheduler.tasks.values())
+
+    async def test_edits_scheduled_within_an_interval_collapse_into_the_latest(self):
+        self.scheduler.schedule(1, self.edit("first"))
+        await asyncio.sleep(0)
+        for label in ("second", "third", "fourth"):
+            self.scheduler.schedule(1, self.edit(label))
+        await self.settle()
+        self.assertEqual(self.sent, ["first", "fourth"])
+        self.assertEqual(self.scheduler.coalesced_edits, 2)
+
+    async def test_discarded_edits_are_not_sent(self):
+        self.scheduler.schedule(1, self.edit("stale"))
+        self.scheduler.discard(1)
+        await self.settle()
+        self.assertEqual(self.sent, [])
+        self.assertEqual(self.scheduler.discarded_edits, 1)
+
+    async def test_edits_wait_for_new_posts(self):
+        async with self.scheduler.new_post():
+            self.scheduler.schedule(1, self.edit("edit"))
+            await asyncio.sleep(0.02)
+            self.assertEqual(self.sent, [])
+        await self.settle()
+        self.assertEqual(self.sent, ["edit"])
+        self.assertEqual(self.scheduler.edits_deferred_for_posts, 1)
+
+    async def test_failed_edits_are_counted(self):
+        async def failing_edit():
+            raise RuntimeError("rate limited")
+
+        self.scheduler.schedule(1, failing_edit)
+        await self.settle()
+        self.assertEqual(self.scheduler.failed_edits, 1)
+        self.assertEqual(self.scheduler.tasks, {})
@@ -0,0 +1,25 @@
+import unittest
+from classes.embed_hashes import EmbedHashes
+from tests.fakes import reset_singletons
+
+
+class EmbedHashesTest(unittest.TestCase):
+    def setUp(self):
+        reset_singletons(EmbedHashes)
+        self.embed_hashes = EmbedHashes()
+
+    def test_skips_edits_rendering_the_same_embed(self):
+        self.assertFalse(self.embed_hashes.is_unchanged(1, "a", None))
+        self.embed_hashes.record(1, "a")
+        self.assertTrue(self.embed_hashes.is_unchanged(1, "a", "stale"))
+        self.assertFalse(self.embed_hashes.is_unchanged(1, "b", "b"))
+
+    def test_evicted_posts_fall_back_to_the_unsaved_then_the_stored_hash(self):
+        self.embed_hashes.max_posts = 1
+        self.embed_hashes.record(1, "a")
+        self.embed_hashes.record(2, "b")
+        self.assertEqual(list(self.embed_hashes.hashes), [2])
+        self.assertTrue(self.embed_hashes.is_unchanged(1, "a", "stale"))
+        self.embed_hashes.take_unsaved()
+        self.assertTrue(self.embed_hashes.is_unchanged(1, "a", "a"))
+        self.assertFalse(self.embed_hashes.is_unchanged(1, "a", "stale"))
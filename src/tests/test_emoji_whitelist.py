@@ -0,0 +1,20 @@
+import unittest
+from classes.emoji_whitelist import emoji_key, compile_whitelist
+
+
+class EmojiKeyTest(unittest.TestCase):
+    def test_custom_emoji_is_keyed_by_id(self):
+        self.assertEqual(emoji_key("<:pog:123>"), "123")
+        self.assertEqual(emoji_key("<a:pog_animated:123>"), "123")
+        self.assertEqual(emoji_key(" <:renamed:123> "), "123")
+
+    def test_unicode_emoji_drops_variation_selectors(self):
+        self.assertEqual(emoji_key("❤️"), "❤")
+        self.assertEqual(emoji_key("😂"), "😂")
+
+    def test_malformed_custom_emoji_is_kept_as_text(self):
+        self.assertEqual(emoji_key("<:pog:>"), "<:pog:>")
+
+    def test_compile_whitelist(self):
+        self.assertEqual(compile_whitelist(["<:pog:123>", "❤️", "❤"]), frozenset({"123", "❤"}))
+        self.assertEqual(compile_whitelist(None), frozenset())
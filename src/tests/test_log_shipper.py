@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from classes.log_shipper import LogShipper
+from tests.fakes import reset_singletons
+
+
+class FakeLogChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message: str):
+        await asyncio.sleep(0)
+        self.sent.append(message)
+
+
+class LogShipperTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_singletons(LogShipper)
+        self.shipper = LogShipper()
+        self.channel = FakeLogChannel()
+        guild = SimpleNamespace(get_channel=lambda channel_id: self.channel)
+        self.bot = SimpleNamespace(get_guild=lambda guild_id: guild)
+
+    async def test_stop_sends_the_queued_lines_once(self):
+        self.shipper.enqueue(self.bot, 1, "first")
+        self.shipper.enqueue(self.bot, 1, "second")
+        await self.shipper.stop(self.bot)
+        self.assertEqual(self.channel.sent, ["```diff\nfirst\nsecond\n```"])
+        self.assertIsNone(self.shipper.task)
+
+    async def test_stop_waits_for_a_flush_in_progress(self):
+        self.shipper.interval = 0
+        self.shipper.enqueue(self.bot, 1, "first")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.shipper.enqueue(self.bot, 1, "second")
+        await self.shipper.stop(self.bot)
+        self.assertEqual("".join(self.channel.sent).count("first"), 1)
+        self.assertEqual("".join(self.channel.sent).count("second"), 1)
+
+    async def test_duplicate_lines_are_dropped(self):
+        self.shipper.enqueue(self.bot, 1, "line", dedupe_key="line")
+        self.shipper.enqueue(self.bot, 1, "line", dedupe_key="line")
+        await self.shipper.stop(self.bot)
+        self.assertEqual(self.channel.sent, ["```diff\nline\n```"])
+        self.assertEqual(self.shipper.deduplicated, 1)
@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+from classes.message_cache import MessageCache
+from tests.fakes import CHANNEL_ID, FakeChannel, reset_singletons
+
+
+class MessageCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_singletons(MessageCache)
+        self.cache = MessageCache()
+        self.channel = FakeChannel({1: {"👍": [1]}, 2: {}, 3: {}})
+
+    async def test_fetches_once_while_cached(self):
+        first = await self.cache.fetch(self.channel, 1)
+        self.assertIs(await self.cache.fetch(self.channel, 1), first)
+        self.assertEqual(self.channel.fetches, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    async def test_entries_expire_after_the_ttl(self):
+        with mock.patch("classes.message_cache.time.monotonic", return_value=1000.0):
+            await self.cache.fetch(self.channel, 1)
+        with mock.patch("classes.message_cache.time.monotonic", return_value=1000.0 + self.cache.ttl):
+            self.assertIsNone(self.cache.get(CHANNEL_ID, 1))
+        self.assertEqual(self.cache.expired, 1)
+        self.assertEqual(len(self.cache.messages), 0)
+
+    async def test_evicts_the_least_recently_used_message(self):
+        self.cache.max_messages = 2
+        await self.cache.fetch(self.channel, 1)
+        await self.cache.fetch(self.channel, 2)
+        self.cache.get(CHANNEL_ID, 1)
+        await self.cache.fetch(self.channel, 3)
+        self.assertEqual(list(self.cache.messages), [(CHANNEL_ID, 1), (CHANNEL_ID, 3)])
+
+    async def test_invalidated_messages_are_fetched_again(self):
+        await self.cache.fetch(self.channel, 1)
+        self.cache.invalidate(CHANNEL_ID, 1)
+        await self.cache.fetch(self.channel, 1)
+        self.assertEqual(self.channel.fetches, 2)
+        self.assertEqual(self.cache.invalidations, 1)
+
+    async def test_refresh_fetches_current_reactions(self):
+        await self.cache.fetch(self.channel, 1)
+        self.channel.reactions[1] = {"👍": [1, 2]}
+        message = await self.cache.refresh(self.channel, 1)
+        self.assertEqual(message.reactions[0].count, 2)
+        self.assertIs(await self.cache.fetch(self.channel, 1), message)
+        self.assertEqual(self.channel.fetches, 2)
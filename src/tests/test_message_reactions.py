@@ -0,0 +1,65 @@
+import unittest
+from classes.reaction_store import MessageReactionCounts
+from classes.server_config_cache import ServerConfigCache
+from enums import calculation_method_type
+from message_reactions import threshold_bounds, reaches_threshold
+from tests.fakes import AUTHOR_ID, FakeMessage, server_config, reset_singletons
+
+
+class ThresholdTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_singletons(ServerConfigCache)
+
+    def counts(self, reactions):
+        message = FakeMessage(1, reactions)
+        return message, MessageReactionCounts(message)
+
+    def test_bounds_are_exact_when_the_author_is_included(self):
+        server_config(calculation_method_type.TOTAL_REACTIONS, include_author_in_reaction_calculation=True)
+        _, reaction_counts = self.counts({"👍": [1, 2, AUTHOR_ID], "😂": [3]})
+        self.assertEqual(threshold_bounds(reaction_counts), (4, 4))
+
+    def test_total_bounds_leave_out_emojis_the_author_may_have_reacted_with(self):
+        server_config(calculation_method_type.TOTAL_REACTIONS, include_author_in_reaction_calculation=False)
+        _, reaction_counts = self.counts({"👍": [1, 2, AUTHOR_ID], "😂": [3]})
+        self.assertEqual(threshold_bounds(reaction_counts), (0, 4))
+        reaction_counts.author_reacted = {"👍": True, "😂": False}
+        self.assertEqual(threshold_bounds(reaction_counts), (1, 1))
+
+    def test_most_reactions_bounds_allow_for_one_author_reaction(self):
+        server_config(calculation_method_type.MOST_REACTIONS_ON_EMOJI, include_author_in_reaction_calculation=False)
+        _, reaction_counts = self.counts({"👍": [1, 2, 3], "😂": [4]})
+        self.assertEqual(threshold_bounds(reaction_counts), (2, 3))
+
+    def test_unique_users_bounds_use_known_reactors(self):
+        server_config(calculation_method_type.UNIQUE_USERS, include_author_in_reaction_calculation=True)
+        _, reaction_counts = self.counts({"👍": [1, 2], "😂": [1, 2]})
+        self.assertEqual(threshold_bounds(reaction_counts), (2, 4))
+        reaction_counts.reactors = {"👍": {1, 2}, "😂": {1, 2}}
+        self.assertEqual(threshold_bounds(reaction_counts), (2, 2))
+
+    async def test_settled_by_raw_counts_without_paging(self):
+        server_config(calculation_method_type.MOST_REACTIONS_ON_EMOJI, include_author_in_reaction_calculation=False)
+        message, reaction_counts = self.counts({"👍": [1, 2, 3, 4], "😂": [5]})
+        self.assertTrue(await reaches_threshold(reaction_counts, 3))
+        self.assertFalse(await reaches_threshold(reaction_counts, 5))
+        self.assertEqual(sum(reaction.paged_users for reaction in message.reactions), 0)
+
+    async def test_pages_until_the_author_is_found(self):
+        server_config(calculation_method_type.MOST_REACTIONS_ON_EMOJI, include_author_in_reaction_calculation=False)
+        message, reaction_counts = self.counts({"👍": [AUTHOR_ID, 1, 2, 3], "😂": [5]})
+        self.assertFalse(await reaches_threshold(reaction_counts, 4))
+        self.assertEqual(message.reactions[0].paged_users, 1)
+        self.assertEqual(message.reactions[1].paged_users, 0)
+
+    async def test_unique_users_pages_overlapping_reactors(self):
+        server_config(calculation_method_type.UNIQUE_USERS, include_author_in_reaction_calculation=False)
+        _, reaction_counts = self.counts({"👍": [1, 2, 3], "😂": [1, 2, 3]})
+        self.assertFalse(await reaches_threshold(reaction_counts, 4))
+        _, reaction_counts = self.counts({"👍": [1, 2, 3], "😂": [4, 5, 6]})
+        self.assertTrue(await reaches_threshold(reaction_counts, 4))
+
+    async def test_ignores_emojis_outside_the_whitelist(self):
+        server_config(calculation_method_type.TOTAL_REACTIONS, custom_emoji_check_logic=True, whitelisted_emojis=["👍"])
+        _, reaction_counts = self.counts({"👍": [1, 2], "😂": [3, 4, 5]})
+        self.assertFalse(await reaches_threshold(reaction_counts, 3))
@@ -0,0 +1,41 @@
+import asyncio
+import unittest
+from classes.post_rate_limiter import PostRateLimiter
+from tests.fakes import GUILD_ID, reset_singletons
+
+
+class PostRateLimiterTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        reset_singletons(PostRateLimiter)
+        self.limiter = PostRateLimiter()
+        self.limiter.burst = 1
+        # One token every 10 milliseconds
+        self.limiter.refill_per_hour = 360000.0
+        self.posted = []
+
+    def post(self, label: str):
+        async def make_post():
+            self.posted.append(label)
+        return make_post
+
+    async def settle(self):
+        while self.limiter.tasks:
+            await asyncio.gather(*self.limiter.tasks.values())
+
+    async def test_posts_over_budget_are_released_oldest_first(self):
+        await self.limiter.submit(GUILD_ID, 1, 1, self.post("first"))
+        await self.limiter.submit(GUILD_ID, 3, 3, self.post("third"))
+        await self.limiter.submit(GUILD_ID, 2, 2, self.post("second"))
+        self.assertEqual(self.posted, ["first"])
+        await self.settle()
+        self.assertEqual(self.posted, ["first", "second", "third"])
+
+    async def test_queued_posts_are_replaced_and_withdrawn(self):
+        await self.limiter.submit(GUILD_ID, 1, 1, self.post("first"))
+        await self.limiter.submit(GUILD_ID, 2, 2, self.post("stale"))
+        await self.limiter.submit(GUILD_ID, 2, 2, self.post("latest"))
+        await self.limiter.submit(GUILD_ID, 3, 3, self.post("withdrawn"))
+        self.limiter.withdraw(GUILD_ID, 3)
+        await self.settle()
+        self.assertEqual(self.posted, ["first", "latest"])
+        self.assertEqual((self.limiter.replaced, self.limiter.withdrawn), (1, 1))
@@ -0,0 +1,80 @@
+import datetime
+import unittest
+from datetime import timezone
+from types import SimpleNamespace
+import discord
+from classes.reaction_admission import ReactionAdmission
+from classes.server_class import Server
+from classes.server_config_cache import ServerConfigCache
+from enums import calculation_method_type
+
+GUILD_ID = 1
+CHANNEL_ID = 10
+HALL_OF_FAME_CHANNEL_ID = 99
+POST_DUE_DATE = 28
+
+
+def message_id_from_days_ago(days: int) -> int:
+    return discord.utils.time_snowflake(datetime.datetime.now(timezone.utc) - datetime.timedelta(days=days))
+
+
+def reaction_event(message_id: int, emoji: str, channel_id: int = CHANNEL_ID):
+    return SimpleNamespace(guild_id=GUILD_ID, channel_id=channel_id, message_id=message_id, emoji=emoji, user_id=1)
+
+
+class ReactionAdmissionTest(unittest.TestCase):
+    def setUp(self):
+        ReactionAdmission._instance = None
+        ServerConfigCache._instance = None
+        ServerConfigCache()[GUILD_ID] = Server(
+            hall_of_fame_channel_id=HALL_OF_FAME_CHANNEL_ID, guild_id=GUILD_ID, reaction_threshold=3,
+            post_due_date=POST_DUE_DATE, sweep_limit=1000, sweep_limited=False,
+            include_author_in_reaction_calculation=True, allow_messages_in_hof_channel=False,
+            custom_emoji_check_logic=True, whitelisted_emojis=["👍"], leaderboard_setup=False,
+            ignore_bot_messages=True, reaction_count_calculation_method=calculation_method_type.MOST_REACTIONS_ON_EMOJI,
+            hide_hof_post_below_threshold=True, leaderboard_message_ids=[], server_member_count=10,
+            require_image_or_video=False)
+        self.admission = ReactionAdmission()
+        self.recent_message_id = message_id_from_days_ago(1)
+
+    def test_admits_a_whitelisted_reaction_on_a_recent_message(self):
+        self.assertTrue(self.admission.admit(reaction_event(self.recent_message_id, "👍")))
+        self.assertEqual(self.admission.admitted, 1)
+
+    def test_rejects_reactions_in_the_hall_of_fame_channel(self):
+        payload = reaction_event(self.recent_message_id, "👍", channel_id=HALL_OF_FAME_CHANNEL_ID)
+        self.assertEqual(self.admission.rejection_reason(payload), "hall_of_fame_channel")
+
+    def test_rejects_emojis_that_are_not_whitelisted(self):
+        self.assertEqual(self.admission.rejection_reason(reaction_event(self.recent_message_id, "😂")),
+                         "emoji_not_whitelisted")
+
+    def test_rejects_messages_past_the_due_date_unless_posted(self):
+        old_message_id = message_id_from_days_ago(POST_DUE_DATE + 2)
+        payload = reaction_event(old_message_id, "👍")
+        self.assertEqual(self.admission.rejection_reason(payload), "past_due_date")
+        self.admission.add_hall_of_fame_message(GUILD_ID, old_message_id)
+        self.assertIsNone(self.admission.rejection_reason(payload))
+
+    def test_rejects_guilds_that_reached_the_daily_cap(self):
+        self.admission.mark_daily_cap_reached(GUILD_ID)
+        self.assertFalse(self.admission.admit(reaction_event(self.recent_message_id, "👍")))
+        self.assertEqual(self.admission.rejections["daily_cap_reached"], 1)
+
+    def test_posted_messages_are_exempt_from_the_daily_cap(self):
+        self.admission.add_hall_of_fame_message(GUILD_ID, self.recent_message_id)
+        self.admission.mark_daily_cap_reached(GUILD_ID)
+        self.assertIsNone(self.admission.rejection_reason(reaction_event(self.recent_message_id, "👍")))
+
+    def test_posted_messages_are_only_exempt_in_their_own_guild(self):
+        old_message_id = message_id_from_days_ago(POST_DUE_DATE + 2)
+        self.admission.load_hall_of_fame_message_ids({GUILD_ID + 1: {old_message_id}})
+        self.assertEqual(self.admission.rejection_reason(reaction_event(old_message_id, "👍")), "past_due_date")
+
+    def test_deleted_messages_and_removed_guilds_are_pruned(self):
+        self.admission.load_hall_of_fame_message_ids({GUILD_ID: {1, 2}, GUILD_ID + 1: {3}})
+        self.admission.mark_daily_cap_reached(GUILD_ID + 1)
+        self.admission.remove_hall_of_fame_message(GUILD_ID, 1)
+        self.admission.forget_guild(GUILD_ID + 1)
+        self.assertEqual(self.admission.hall_of_fame_message_ids, {GUILD_ID: {2}})
+        self.assertNotIn(GUILD_ID + 1, self.admission.daily_cap_reached)
@@ -0,0 +1,30 @@
+import unittest
+from classes.reaction_count_buffer import ReactionCountBuffer
+
+
+class ReactionCountBufferTest(unittest.TestCase):
+    def setUp(self):
+        ReactionCountBuffer._instance = None
+        self.buffer = ReactionCountBuffer()
+
+    def test_keeps_the_latest_count_per_message(self):
+        self.buffer.set(1, 5)
+        self.buffer.set(1, 6)
+        self.buffer.set(2, 3)
+        self.assertEqual(self.buffer.take(), {1: 6, 2: 3})
+        self.assertEqual(self.buffer.superseded_updates, 1)
+        self.assertEqual(self.buffer.take(), {})
+
+    def test_restore_keeps_counts_buffered_since_the_take(self):
+        self.buffer.set(1, 5)
+        self.buffer.set(2, 3)
+        batch = self.buffer.take()
+        self.buffer.set(1, 7)
+        self.buffer.restore(batch)
+        self.assertEqual(self.buffer.take(), {1: 7, 2: 3})
+        self.assertEqual(self.buffer.failed_flushes, 1)
+
+    def test_mark_flushed(self):
+        self.buffer.set(1, 5)
+        self.buffer.mark_flushed(self.buffer.take())
+        self.assertEqual((self.buffer.flushes, self.buffer.flushed_updates), (1, 1))
@@ -0,0 +1,41 @@
+import asyncio
+import unittest
+from classes.reaction_scheduler import ReactionScheduler
+from tests.fakes import reaction_event
+
+
+class ReactionSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.evaluated = []
+
+        async def evaluate(payload):
+            self.evaluated.append((payload.message_id, payload.user_id))
+
+        self.scheduler = ReactionScheduler(evaluate, quiet_window=0.01, max_delay=0.05, max_pending=2)
+
+    async def settle(self):
+        while self.scheduler.tasks:
+            await asyncio.gather(*self.scheduler.tasks.values())
+
+    async def test_a_burst_is_evaluated_once_with_its_latest_payload(self):
+        for user_id in range(5):
+            self.scheduler.schedule(reaction_event(1, "👍", user_id, True))
+        await self.settle()
+        self.assertEqual(self.evaluated, [(1, 4)])
+        self.assertEqual(self.scheduler.coalesced_events, 4)
+
+    async def test_messages_over_the_limit_are_deferred_not_dropped(self):
+        for message_id in range(1, 5):
+            self.scheduler.schedule(reaction_event(message_id, "👍", 1, True))
+        self.scheduler.schedule(reaction_event(3, "👍", 2, True))
+        self.assertEqual(list(self.scheduler.deferred_payloads), [3, 4])
+        await self.settle()
+        self.assertEqual(sorted(self.evaluated), [(1, 1), (2, 1), (3, 2), (4, 1)])
+        self.assertEqual(self.scheduler.deferred_events, 2)
+
+    async def test_deferred_messages_are_not_dropped_under_a_burst(self):
+        for message_id in range(1, 21):
+            self.scheduler.schedule(reaction_event(message_id, "👍", 1, True))
+        self.assertEqual(len(self.scheduler.deferred_payloads), 18)
+        await self.settle()
+        self.assertEqual(sorted(message_id for message_id, _ in self.evaluated), list(range(1, 21)))
@@ -0,0 +1,145 @@
+import asyncio
+import unittest
+from classes.message_cache import MessageCache
+from classes.reaction_store import ReactionStore, MessageReactionCounts, MessageReactionState
+from classes.server_config_cache import ServerConfigCache
+from tests.fakes import FakeChannel, reaction_event, server_config, reset_singletons
+
+
+class GetOrCountTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_singletons(ReactionStore, MessageCache, ServerConfigCache)
+        server_config()
+        self.store = ReactionStore()
+
+    async def test_counts_without_paging(self):
+        channel = FakeChannel({1: {"👍": [1, 2]}})
+        reaction_counts = await self.store.get_or_count(channel, 1)
+        self.assertIsInstance(reaction_counts, MessageReactionCounts)
+        self.assertEqual(reaction_counts.counts, {"👍": 2})
+        self.assertIs(await self.store.get_or_count(channel, 1), reaction_counts)
+        self.assertEqual(channel.fetches, 1)
+
+    async def test_replays_additions_that_raced_the_fetch(self):
+        channel = FakeChannel({1: {"👍": [1, 2]}})
+        channel.during_fetch = lambda: self.store.apply_event(reaction_event(1, "👍", 3, True))
+        reaction_counts = await self.store.get_or_count(channel, 1)
+        # The addition may be missing from the fetch, so it is replayed and can only overcount
+        self.assertEqual(reaction_counts.counts, {"👍": 3})
+
+    async def test_seeds_when_a_removal_raced_the_fetch(self):
+        reactions = {1: {"👍": [1, 2, 3]}}
+        channel = FakeChannel(reactions)
+
+        def remove_reaction():
+            reactions[1] = {"👍": [1, 2]}
+            self.store.apply_event(reaction_event(1, "👍", 3, False))
+
+        channel.during_fetch = remove_reaction
+        state = await self.store.get_or_count(channel, 1)
+        self.assertIsInstance(state, MessageReactionState)
+        self.assertEqual(set(state.reactions["👍"]), {1, 2})
+
+    async def test_applies_later_events_to_the_counts(self):
+        channel = FakeChannel({1: {"👍": [1, 2]}})
+        reaction_counts = await self.store.get_or_count(channel, 1)
+        self.store.apply_event(reaction_event(1, "👍", 2, False))
+        self.store.apply_event(reaction_event(1, "😂", 4, True))
+        self.assertEqual(reaction_counts.counts, {"👍": 1, "😂": 1})
+        self.assertEqual(reaction_counts.reactors, {"😂": {4}})
+
+
+class SeedTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_singletons(ReactionStore, MessageCache, ServerConfigCache)
+        server_config()
+        self.store = ReactionStore()
+
+    async def test_concurrent_callers_share_one_seed(self):
+        channel = FakeChannel({1: {"👍": [1, 2]}})
+        first, second = await asyncio.gather(self.store.get_or_seed(channel, 1), self.store.get_or_seed(channel, 1))
+        self.assertIs(first, second)
+        self.assertEqual(channel.fetches, 1)
+        self.assertEqual(self.store.locks, {})
+
+    async def test_events_during_paging_are_replayed(self):
+        channel = FakeChannel({1: {"👍": [1, 2], "😂": [4]}})
+
+        def add_reaction_to_paged_emoji():
+            # Paging of 👍 has started and misses the new reactor
+            self.store.apply_event(reaction_event(1, "👍", 3, True))
+
+        channel.during_paging = add_reaction_to_paged_emoji
+        state = await self.store.get_or_seed(channel, 1)
+        self.assertEqual(set(state.reactions["👍"]), {1, 2, 3})
+
+    async def test_reset_drops_tracked_messages(self):
+        channel = FakeChannel({1: {"👍": [1, 2]}, 2: {"👍": [1]}})
+        await self.store.get_or_seed(channel, 1)
+        await self.store.get_or_count(channel, 2)
+        self.store.reset()
+        self.assertIsNone(self.store.get(1))
+        self.assertEqual(len(self.store.counted), 0)
+
+    async def test_seed_finished_after_a_reset_is_not_stored(self):
+        channel = FakeChannel({1: {"👍": [1, 2]}})
+        channel.during_paging = self.store.reset
+        state = await self.store.get_or_seed(channel, 1)
+        self.assertEqual(set(state.reactions["👍"]), {1, 2})
+        self.assertIsNone(self.store.get(1))
+
+
+class ParkedReactorSetTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        reset_singletons(ReactionStore, MessageCache, ServerConfigCache)
+        server_config()
+        self.store = ReactionStore()
+
+    async def test_loaded_sets_matching_the_count_are_reused(self):
+        self.store.load_persisted({1: (1, {"👍": [1, 2], "😂": [5]})})
+        # A reaction added while the bot was offline leaves the loaded 😂 set short
+        channel = FakeChannel({1: {"👍": [1, 2], "😂": [5, 6]}})
+        state = await self.store.get_or_seed(channel, 1)
+        self.assertEqual(set(state.reactions["😂"]), {5, 6})
+        self.assertEqual((self.store.reused_reactor_sets, self.store.paged_reactor_sets), (1, 1))
+        self.assertEqual(set(self.store.take_unsaved()), {(1, "😂")})
+
+    async def test_loaded_sets_settle_counts_without_paging(self):
+        self.store.load_persisted({1: (1, {"👍": [1, 2]})})
+        reaction_counts = await self.store.get_or_count(FakeChannel({1: {"👍": [1, 2]}}), 1)
+        self.assertEqual(reaction_counts.reactors, {"👍": {1, 2}})
+
+    async def test_sets_of_edited_messages_are_reused(self):
+        channel = FakeChannel({1: {"👍": [1, 2]}})
+        await self.store.get_or_seed(channel, 1)
+        self.store.forget(1)
+        self.store.apply_event(reaction_event(1, "👍", 3, True))
+        channel.reactions[1] = {"👍": [1, 2, 3]}
+        state = await self.store.get_or_seed(channel, 1)
+        self.assertEqual(set(state.reactions["👍"]), {1, 2, 3})
+        self.assertEqual(self.store.reused_reactor_sets, 1)
+
+    async def test_reset_parks_the_tracked_sets(self):
+        channel = FakeChannel({1: {"👍": [1, 2]}})
+        await self.store.get_or_seed(channel, 1)
+        self.store.reset()
+        self.assertIn(1, self.store.parked)
+        channel.reactions[1] = {"👍": [1, 2, 3]}
+        state = await self.store.get_or_seed(channel, 1)
+        self.assertEqual(set(state.reactions["👍"]), {1, 2, 3})
+        self.assertEqual(self.store.reused_reactor_sets, 0)
+
+    async def test_evicted_states_are_parked_and_kept_current(self):
+        self.store.max_messages = 1
+        channel = FakeChannel({1: {"👍": [1, 2]}, 2: {"👍": [1]}})
+        await self.store.get_or_seed(channel, 1)
+        await self.store.get_or_seed(channel, 2)
+        self.assertIsNone(self.store.get(1))
+        self.store.take_unsaved()
+        self.store.apply_event(reaction_event(1, "👍", 3, True))
+        self.assertEqual(set(self.store.take_unsaved()[(1, "👍")][1]), {1, 2, 3})
+
+    async def test_parked_sets_are_bounded(self):
+        self.store.max_messages = 2
+        self.store.load_persisted({message_id: (1, {"👍": [1]}) for message_id in range(5)})
+        self.assertEqual(list(self.store.parked), [3, 4])
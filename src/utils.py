@@ -3,15 +3,35 @@ import discord
 import datetime
 from datetime import timezone
 import asyncio
-from message_reactions import most_reacted_emoji, reaction_count
+import database
+import log_sink
+from message_reactions import take_snapshot, reaches_threshold
 from classes import server_class
+from classes.reaction_admission import ReactionAdmission
+from classes.reaction_count_buffer import ReactionCountBuffer
+from classes.embed_hashes import EmbedHashes
+from classes.edit_scheduler import EditScheduler
+from classes.daily_post_counter import DailyPostCounter
+from classes.post_rate_limiter import PostRateLimiter
+from classes.log_shipper import LogShipper
+from classes.reaction_store import ReactionStore, MessageReactionState, MessageReactionCounts
+from classes.message_cache import MessageCache
+from classes.reaction_snapshot import ReactionSnapshot
 from enums import command_refs, log_type, calculation_method_type
-from repositories import server_config_repo, hall_of_fame_message_repo, server_user_repo, hof_wrapped_repo
+from repositories import (
+    server_config_repo,
+    hall_of_fame_message_repo,
+    server_user_repo,
+    hof_wrapped_repo,
+    server_user_daily_stat_repo,
+    leaderboard_slot_repo,
+    message_reactor_repo,
+)
 
 daily_post_limit = 100
 
 
-async def validate_message(discord_message: discord.RawReactionActionEvent, bot: discord.Client, connection,
+async def validate_message(discord_message: discord.RawReactionActionEvent, bot: discord.Client,
                            reaction_threshold: int, post_due_date: int, target_channel_id: int,
                            ignore_bot_messages: bool, hide_hof_post_below_threshold: bool,
                            require_image_or_video: bool = False):
@@ -19,7 +39,6 @@ async def validate_message(discord_message: discord.RawReactionActionEvent, bot:
     Check if the message is valid for posting based on the reaction count, date and origin of the message
     :param discord_message: The message to validate
     :param bot: The Discord bot
-    :param connection: The database connection
     :param reaction_threshold: The minimum number of reactions for a message to be posted in the Hall of Fame
     :param post_due_date: The number of days after which a message is no longer eligible for the Hall of Fame
     :param target_channel_id: The ID of the Hall of Fame channel
@@ -37,8 +56,10 @@ async def validate_message(discord_message: discord.RawReactionActionEvent, bot:
         await logging(bot, f"Bot does not have read message permissions in channel {channel.id} of guild {channel.guild.id}", channel.guild.id)
         return
 
-    discord_message = await channel.fetch_message(message_id)
-    db_message = hall_of_fame_message_repo.find_hall_of_fame_message(connection, guild_id, channel_id, message_id)
+    reaction_state = await ReactionStore().get_or_count(channel, message_id)
+    discord_message = reaction_state.message
+    async with database.connection() as connection:
+        db_message = await hall_of_fame_message_repo.find_hall_of_fame_message(connection, guild_id, channel_id, message_id)
 
     # Checks if the post is older than the due date and has not been added to the database
     if (datetime.datetime.now(timezone.utc) - discord_message.created_at).days > post_due_date and not db_message:
@@ -69,8 +90,14 @@ async def validate_message(discord_message: discord.RawReactionActionEvent, bot:
 
     target_channel = bot.get_channel(target_channel_id)
 
-    if hall_of_fame_message_repo.guild_message_count_today(connection, guild_id) > daily_post_limit:
+    daily_post_counter = DailyPostCounter()
+    if daily_post_counter.count(guild_id) > daily_post_limit:
+        ReactionAdmission().mark_daily_cap_reached(guild_id)
+        if daily_post_counter.warning_sent(guild_id):
+            return
+        daily_post_counter.mark_warning_sent(guild_id)
         await logging(bot, f"Guild {guild_id} has exceeded the daily limit for hall of fame posts.", discord_message.guild.id, log_level=log_type.CRITICAL, validate_for_duplicates=True)
+        # The warning flag does not survive a restart, so check the channel once before warning again
         existing_messages = [message async for message in target_channel.history(limit=30)]
         for existing_message in existing_messages:
             if existing_message.author.id == bot.user.id and "has hit the daily limit of" in existing_message.content:
@@ -82,43 +109,90 @@ async def validate_message(discord_message: discord.RawReactionActionEvent, bot:
         )
         return
 
+    # Settles the threshold from the raw counts first, the reactors are only paged when they can change the outcome
+    if isinstance(reaction_state, MessageReactionCounts):
+        if not db_message and await reaches_threshold(reaction_state, reaction_threshold) is False:
+            PostRateLimiter().withdraw(guild_id, message_id)
+            return
+        reaction_state = await ReactionStore().seed(await MessageCache().refresh(channel, message_id))
+        discord_message = reaction_state.message
+
     # Gets the adjusted reaction count corrected for not accounting the author
-    corrected_reactions = await reaction_count(discord_message, connection)
-    if corrected_reactions < reaction_threshold:
-        if hide_hof_post_below_threshold and db_message:
+    reaction_snapshot = take_snapshot(reaction_state)
+    if reaction_snapshot.reaction_count < reaction_threshold:
+        PostRateLimiter().withdraw(guild_id, message_id)
+        if hide_hof_post_below_threshold and db_message and not db_message.get("embed_hidden"):
             await remove_embed(db_message, bot, target_channel_id)
             if "video_link_message_id" in db_message and discord_message.attachments:
                 video_link_message = db_message["video_link_message_id"]
                 if video_link_message is not None:
-                    video_link_message = await target_channel.fetch_message(int(video_link_message))
-                    await video_link_message.edit(content="** **", embed=None)
+                    await target_channel.get_partial_message(int(video_link_message)).edit(content="** **", embed=None)
         return
 
     if db_message:
-        message_to_update = await bot.get_channel(target_channel_id).fetch_message(db_message["hall_of_fame_message_id"])
-        if len(message_to_update.embeds) > 0:
-            hall_of_fame_message_repo.update_field_for_message(connection, guild_id, channel_id, message_id,"reaction_count", await reaction_count(discord_message, connection))
-            await update_reaction_counter(db_message, bot, target_channel_id, reaction_threshold, connection, discord_message)
+        if not db_message.get("embed_hidden"):
+            ReactionCountBuffer().set(message_id, reaction_snapshot.reaction_count)
+            await update_reaction_counter(db_message, bot, target_channel_id, discord_message, reaction_snapshot)
             return
         else:
-            await message_to_update.edit(embed=await create_embed(discord_message, reaction_threshold, connection))
+            await update_reaction_counter(db_message, bot, target_channel_id, discord_message, reaction_snapshot)
             if "video_link_message_id" in db_message and discord_message.attachments:
                 message_attachment = discord_message.attachments[0]
-                video_link_message = await target_channel.fetch_message(db_message["video_link_message_id"])
+                video_link_message = target_channel.get_partial_message(int(db_message["video_link_message_id"]))
                 await video_link_message.edit(content=message_attachment.url, embed=None)
             return
-    await post_hall_of_fame_message(discord_message, bot, connection, target_channel_id, reaction_threshold)
+
+    async def post():
+        # The daily limit may have been reached, or the message deleted or fallen below the threshold, while the
+        # post was queued. The reaction state is kept current by the gateway events, so it is checked again.
+        if DailyPostCounter().count(guild_id) > daily_post_limit:
+            return
+        try:
+            current_state = await ReactionStore().get_or_seed(channel, message_id)
+        except discord.NotFound:
+            return
+        current_snapshot = take_snapshot(current_state)
+        if current_snapshot.reaction_count < reaction_threshold:
+            return
+        await post_hall_of_fame_message(current_state.message, current_snapshot, bot, target_channel_id)
+
+    await PostRateLimiter().submit(guild_id, message_id, discord_message.created_at, post)
+
+
+def render_stored_embed(embed_state: dict, reaction_snapshot: ReactionSnapshot) -> discord.Embed:
+    """
+    Rebuild the embed a Hall of Fame post was rendered with, showing the current reaction figures
+    :param embed_state: The stored embed of the post
+    :param reaction_snapshot: The reaction figures of the message
+    :return: The embed for the post
+    """
+    embed = discord.Embed.from_dict(embed_state)
+    reactions_field_value = format_reactions_field_value(reaction_snapshot.reaction_count, reaction_snapshot.top_emoji)
+
+    for i, field in enumerate(embed.fields):
+        field_name = (field.name or "").strip()
+        if field_name == "Reactions" or field_name.endswith("Reactions"):
+            embed.set_field_at(
+                index=i,
+                name="Reactions",
+                value=reactions_field_value,
+                inline=True
+            )
+            break
+    return embed
 
 
-async def update_reaction_counter(db_message, bot: discord.Client, target_channel_id: int, reaction_threshold: int, connection, discord_message: discord.Message):
+async def update_reaction_counter(db_message, bot: discord.Client, target_channel_id: int, discord_message: discord.Message,
+                                  reaction_snapshot: ReactionSnapshot):
     """
-    Update the reaction counter of a message in the Hall of Fame
+    Update the reaction counter of a message in the Hall of Fame, showing the embed again if it was removed. The
+    post is edited from its stored embed without fetching it; posts without a stored embed are rendered from the
+    original message once and stored.
     :param db_message:
     :param bot:
     :param target_channel_id:
-    :param reaction_threshold:
-    :param connection:
     :param discord_message:
+    :param reaction_snapshot: The reaction figures of the message
     :return:
     """
     if not db_message["hall_of_fame_message_id"]:
@@ -126,30 +200,47 @@ async def update_reaction_counter(db_message, bot: discord.Client, target_channe
     hall_of_fame_message_id = db_message["hall_of_fame_message_id"]
 
     target_channel = bot.get_channel(target_channel_id)
-    hall_of_fame_message = await target_channel.fetch_message(hall_of_fame_message_id)
+    hall_of_fame_message = target_channel.get_partial_message(int(hall_of_fame_message_id))
 
-    if not hall_of_fame_message.embeds:
-        # Post the message in the Hall of Fame channel if it was removed
-        await hall_of_fame_message.edit(embed=await create_embed(discord_message, reaction_threshold, connection))
-        return
+    message_id = int(db_message["message_id"])
+    embed_hashes = EmbedHashes()
 
-    embed = hall_of_fame_message.embeds[0]
-    corrected_reactions = await reaction_count(discord_message, connection)
-    top_reaction = most_reacted_emoji(discord_message.reactions, discord_message.guild.id, connection)
-    reactions_field_value = f"{corrected_reactions} {top_reaction}".strip()
+    if db_message.get("embed") and not db_message.get("embed_hidden"):
+        embed = render_stored_embed(db_message["embed"], reaction_snapshot)
+        embed_hash = embed_hashes.compute(embed)
+        if embed_hashes.is_unchanged(message_id, embed_hash, db_message.get("embed_hash")):
+            # The post already shows this render, so an edit still waiting to be sent is stale
+            EditScheduler().discard(hall_of_fame_message.id)
+            return
 
-    for i, field in enumerate(embed.fields):
-        field_name = (field.name or "").strip()
-        if field_name == "Reactions" or field_name.endswith("Reactions"):
-            embed.set_field_at(
-                index=i,
-                name="Reactions",
-                value=reactions_field_value,
-                inline=True
-            )
-            break
+        async def send_edit():
+            # Recorded before sending, so renders arriving while the edit is in flight compare against it
+            embed_hashes.record(message_id, embed_hash)
+            try:
+                await hall_of_fame_message.edit(embed=embed)
+            except Exception:
+                embed_hashes.forget(message_id)
+                raise
 
+        # Counter refreshes of a post are coalesced and rate limited per post
+        EditScheduler().schedule(hall_of_fame_message.id, send_edit)
+        return
+
+    # Showing a hidden post again is sent right away and replaces a pending counter refresh
+    EditScheduler().discard(hall_of_fame_message.id)
+    if db_message.get("embed"):
+        embed = render_stored_embed(db_message["embed"], reaction_snapshot)
+        await hall_of_fame_message.edit(embed=embed)
+        embed_hashes.record(message_id, embed_hashes.compute(embed))
+        async with database.connection() as connection:
+            await hall_of_fame_message_repo.update_embed_state(connection, message_id, False)
+        return
+
+    embed = await create_embed(discord_message, reaction_snapshot)
     await hall_of_fame_message.edit(embed=embed)
+    embed_hashes.record(message_id, embed_hashes.compute(embed))
+    async with database.connection() as connection:
+        await hall_of_fame_message_repo.update_embed_state(connection, message_id, False, embed.to_dict())
 
 
 async def remove_embed(message, bot: discord.Client, target_channel_id: int):
@@ -164,14 +255,16 @@ async def remove_embed(message, bot: discord.Client, target_channel_id: int):
         return
     hall_of_fame_message_id = message["hall_of_fame_message_id"]
     target_channel = bot.get_channel(target_channel_id)
-    hall_of_fame_message = await target_channel.fetch_message(hall_of_fame_message_id)
-    await hall_of_fame_message.edit(content="** **", embed=None)
+    EditScheduler().discard(int(hall_of_fame_message_id))
+    await target_channel.get_partial_message(int(hall_of_fame_message_id)).edit(content="** **", embed=None)
+    if "message_id" in message:
+        async with database.connection() as connection:
+            await hall_of_fame_message_repo.update_embed_state(connection, int(message["message_id"]), True)
 
 
-async def update_leaderboard(connection, bot: discord.Client, server_config: server_class.Server):
+async def update_leaderboard(bot: discord.Client, server_config: server_class.Server):
     """
     Update the leaderboard of the Hall of Fame channel with the top 20 most reacted messages
-    :param connection:
     :param bot:
     :param server_config:
     :return:
@@ -184,29 +277,50 @@ async def update_leaderboard(connection, bot: discord.Client, server_config: ser
     if not hall_of_fame_channel:
         return
 
-    server_messages = hall_of_fame_message_repo.find_top_messages_by_reaction_count(connection, int(server_config.guild_id), limit=30)
+    guild_id = int(server_config.guild_id)
+    async with database.connection() as connection:
+        server_messages = await hall_of_fame_message_repo.find_top_messages_by_reaction_count(connection, guild_id, limit=30)
+        rendered_slots = await leaderboard_slot_repo.get_leaderboard_slots_for_guild(connection, guild_id)
     most_reacted_messages = list(server_messages)
 
     # Update the reaction count of the top 30 most reacted messages
+    reaction_states = {}
+    reaction_snapshots = {}
     for i in range(min(len(most_reacted_messages), 30)):
         message = most_reacted_messages[i]
         channel = bot.get_channel(int(message["channel_id"]))
         if not channel:
             continue
-        message = await channel.fetch_message(int(message["message_id"]))
-        hall_of_fame_message_repo.update_field_for_message(connection, int(server_config.guild_id), message.channel.id, message.id,
-                                                          "reaction_count", await reaction_count(message, connection))
+        reaction_state = await ReactionStore().get_or_seed(channel, int(message["message_id"]))
+        reaction_states[reaction_state.message_id] = reaction_state
+        reaction_snapshots[reaction_state.message_id] = take_snapshot(reaction_state)
 
-    # Update the top 20 messages in the leaderboard
-    for i in range(min(20, len(most_reacted_messages), len(msg_id_array))):
-        hall_of_fame_message = await hall_of_fame_channel.fetch_message(int(msg_id_array[i]))
-        original_channel = bot.get_channel(int(most_reacted_messages[i]["channel_id"]))
-        original_message = await original_channel.fetch_message(int(most_reacted_messages[i]["message_id"]))
+    for message_id, reaction_snapshot in reaction_snapshots.items():
+        ReactionCountBuffer().set(message_id, reaction_snapshot.reaction_count)
+
+    # Update the top 20 messages in the leaderboard, editing only the slots whose entry changed since the last render
+    rendered_records = []
+    try:
+        for i in range(min(20, len(most_reacted_messages), len(msg_id_array))):
+            reaction_state = reaction_states.get(int(most_reacted_messages[i]["message_id"]))
+            if not reaction_state:
+                continue
+            reaction_snapshot = reaction_snapshots[reaction_state.message_id]
+            slot_entry = (int(msg_id_array[i]), reaction_state.message_id, reaction_snapshot.reaction_count, reaction_snapshot.top_emoji)
+            if rendered_slots.get(i) == slot_entry:
+                continue
 
-        await hall_of_fame_message.edit(embed=await create_embed(original_message, server_config.reaction_threshold, connection))
-        await hall_of_fame_message.edit(content=f"**HallOfFame#{i+1}**")
-        if original_message.attachments:
-            await hall_of_fame_message.edit(content=f"**HallOfFame#{i+1}**\n{original_message.attachments[0].url}")
+            original_message = reaction_state.message
+            content = f"**HallOfFame#{i+1}**"
+            if original_message.attachments:
+                content += f"\n{original_message.attachments[0].url}"
+            hall_of_fame_message = hall_of_fame_channel.get_partial_message(int(msg_id_array[i]))
+            await hall_of_fame_message.edit(content=content, embed=await create_embed(original_message, reaction_snapshot))
+            rendered_records.append((guild_id, i, *slot_entry))
+    finally:
+        # Record the slots rendered before a failure as well, so the next refresh does not edit them again
+        async with database.connection() as connection:
+            await leaderboard_slot_repo.upsert_leaderboard_slots(connection, rendered_records)
 
 
 # Todo: Disabled, if re-enable needs to be refactored for the new database structure
@@ -254,17 +368,20 @@ async def check_all_server_messages(guild_id: int, sweep_limit, sweep_limited: b
                         continue  # Ignore messages from bots
                     if (datetime.datetime.now(timezone.utc) - message.created_at).days > post_due_date and sweep_limit is not None:
                         break  # If the message is older than the due date, no need to check further
-                    message_reactions = await reaction_count(message, collection)
+                    if await reaches_threshold(MessageReactionCounts(message), reaction_threshold-3) is False:
+                        continue  # Settled from the raw counts without paging the reactors
+                    reaction_snapshot = take_snapshot(await MessageReactionState.from_message(message))
+                    message_reactions = reaction_snapshot.reaction_count
 
                     if message_reactions >= reaction_threshold:
                         db_msg = collection.find_one({"message_id": int(message.id)})
                         if db_msg:
-                            await update_reaction_counter(db_msg, bot, target_channel_id, reaction_threshold, collection, message)
+                            await update_reaction_counter(db_msg, bot, target_channel_id, message, reaction_snapshot)
                             if sweep_limited:
                                 break  # if message is already in the database, no need to check further
                             else:
                                 continue  # if a total channel sweep is needed
-                        messages_to_post.append(message)
+                        messages_to_post.append((message, reaction_snapshot))
                     elif message_reactions >= reaction_threshold-3:
                         db_msg = collection.find_one({"message_id": int(message.id)})
                         if db_msg:
@@ -274,42 +391,53 @@ async def check_all_server_messages(guild_id: int, sweep_limit, sweep_limited: b
         except Exception as e:
             await logging(bot, f"An error occurred: {e}", guild_id)
 
-    messages_to_post.sort(key=lambda msg: msg.created_at)
-    for message in messages_to_post:
-        await post_hall_of_fame_message(message, bot, collection, target_channel_id, reaction_threshold)
+    messages_to_post.sort(key=lambda msg: msg[0].created_at)
+    for message, reaction_snapshot in messages_to_post:
+        await post_hall_of_fame_message(message, reaction_snapshot, bot, target_channel_id)
 
 
-async def post_hall_of_fame_message(message: discord.Message, bot: discord.Client, connection, target_channel_id: int,
-                                    reaction_threshold: int):
+async def post_hall_of_fame_message(message: discord.Message, reaction_snapshot: ReactionSnapshot, bot: discord.Client,
+                                    target_channel_id: int):
     """
     Post a message in the Hall of Fame channel
     :param message:
+    :param reaction_snapshot: The reaction figures of the message
     :param bot:
-    :param connection:
     :param target_channel_id:
-    :param reaction_threshold:
     :return:
     """
     target_channel = bot.get_channel(target_channel_id)
     video_link = check_video_extension(message)
     video_message = None
 
-    if video_link:
-        video_message = await target_channel.send(video_link)
-
-    embed = await create_embed(message, reaction_threshold, connection)
-    hall_of_fame_message = await target_channel.send(embed=embed)
+    embed = await create_embed(message, reaction_snapshot)
+    async with EditScheduler().new_post():
+        if video_link:
+            video_message = await target_channel.send(video_link)
+        hall_of_fame_message = await target_channel.send(embed=embed)
 
     try:
-        hall_of_fame_message_repo.insert_hall_of_fame_message(connection,
-                                                              int(message.id),
-                                                              int(message.channel.id),
-                                                              int(message.guild.id),
-                                                              int(hall_of_fame_message.id),
-                                                              int(await reaction_count(message, connection)),
-                                                              int(message.author.id),
-                                                              datetime.datetime.now(timezone.utc),
-                                                              int(video_message.id) if video_link else None)
+        created_at = datetime.datetime.now(timezone.utc)
+        # The row and the stats of the author are committed together, so a failure leaves neither behind when the
+        # post is deleted below
+        async with database.connection() as connection, connection.transaction():
+            inserted = await hall_of_fame_message_repo.insert_hall_of_fame_message(connection,
+                                                                                   int(message.id),
+                                                                                   int(message.channel.id),
+                                                                                   int(message.guild.id),
+                                                                                   int(hall_of_fame_message.id),
+                                                                                   int(reaction_snapshot.reaction_count),
+                                                                                   int(message.author.id),
+                                                                                   created_at,
+                                                                                   int(video_message.id) if video_link else None,
+                                                                                   embed.to_dict())
+            if inserted:
+                await apply_user_stat_deltas(connection, [(int(message.guild.id), int(message.author.id), created_at.date(),
+                                                           1, int(reaction_snapshot.reaction_count))])
+        ReactionAdmission().add_hall_of_fame_message(message.guild.id, message.id)
+        if inserted:
+            DailyPostCounter().increment(message.guild.id)
+        EmbedHashes().record(message.id, EmbedHashes.compute(embed))
     except Exception as e:
         await hall_of_fame_message.delete()
         if video_message:
@@ -340,35 +468,33 @@ def format_reactions_field_value(count: int, top_reaction) -> str:
     return f"{count} {emoji}" if emoji else f"{count} reactions"
 
 
-async def create_embed(message: discord.Message, reaction_threshold: int, connection) -> discord.Embed:
+async def create_embed(message: discord.Message, reaction_snapshot: ReactionSnapshot) -> discord.Embed:
     """
     Create an embed for a message in the Hall of Fame channel
     :param message: The message to create an embed for
-    :param reaction_threshold: The minimum number of reactions for a message to be posted in the Hall of Fame
-    :param connection: MySQL connection
+    :param reaction_snapshot: The reaction figures of the message
     :return: The embed for the message
     """
-    # handle 1024 character limit on embed description
-    message.content = message.content[:1021] + "..." if len(message.content) > 1024 else message.content
+    # handle 1024 character limit on embed description, the messages may be cached so they are left untouched
+    content = message.content[:1021] + "..." if len(message.content) > 1024 else message.content
     reference_message = None
+    reference_content = None
     if message.reference:
-        reference_message = await message.channel.fetch_message(message.reference.message_id)
-        reference_message.content = reference_message.content[:1021] + "..." if len(reference_message.content) > 1024 else reference_message.content
-    corrected_reactions = await reaction_count(message, connection)
-    top_reaction = most_reacted_emoji(message.reactions, message.guild.id, connection)
-    reactions_field_value = format_reactions_field_value(corrected_reactions, top_reaction)
+        reference_message = await MessageCache().fetch(message.channel, message.reference.message_id)
+        reference_content = reference_message.content[:1021] + "..." if len(reference_message.content) > 1024 else reference_message.content
+    reactions_field_value = format_reactions_field_value(reaction_snapshot.reaction_count, reaction_snapshot.top_emoji)
 
     # Check if the message is a sticker and has a reference
     if message.reference and message.stickers:
         sticker = message.stickers[0]
         embed = discord.Embed(
-            description=message.content,
+            description=content,
             color=discord.Color.gold()
         )
         embed.set_image(url=sticker.url)
         embed.set_author(name=message.author.name, icon_url=message.author.avatar.url if message.author.avatar else None)
 
-        embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_message.content, inline=False)
+        embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_content, inline=False)
 
         embed.add_field(name="Reactions", value=reactions_field_value, inline=True)
         embed.add_field(name="Jump to Message", value=message.jump_url, inline=False)
@@ -380,7 +506,7 @@ async def create_embed(message: discord.Message, reaction_threshold: int, connec
     elif message.stickers:
         sticker = message.stickers[0]
         embed = discord.Embed(
-            description=message.content,
+            description=content,
             color=discord.Color.gold()
         )
         embed.set_image(url=sticker.url)
@@ -401,18 +527,18 @@ async def create_embed(message: discord.Message, reaction_threshold: int, connec
         if reference_message.attachments:
 
             # Author of the original message
-            embed.add_field(name=f"{message.author.name}'s reply:", value=message.content, inline=False)
+            embed.add_field(name=f"{message.author.name}'s reply:", value=content, inline=False)
 
             # Replied message
-            embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_message.content, inline=False)
+            embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_content, inline=False)
             embed.add_field(name="Reactions", value=reactions_field_value, inline=True)
             embed.add_field(name="Jump to Message", value=message.jump_url, inline=False)
             embed.set_image(url=reference_message.attachments[0].url)
         else:
             # Author of the replied message
-            embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_message.content, inline=False)
+            embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_content, inline=False)
             # Author of the original message
-            embed.add_field(name=f"{message.author.name}'s reply:", value=message.content, inline=False)
+            embed.add_field(name=f"{message.author.name}'s reply:", value=content, inline=False)
 
             embed.add_field(name="Reactions", value=reactions_field_value, inline=True)
             embed.add_field(name="Jump to Message", value=message.jump_url, inline=False)
@@ -428,10 +554,10 @@ async def create_embed(message: discord.Message, reaction_threshold: int, connec
         embed.set_author(name=message.author.name, icon_url=message.author.avatar.url if message.author.avatar else None)
 
         # Original message
-        embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_message.content, inline=False)
+        embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_content, inline=False)
 
         # Reply message
-        embed.add_field(name=f"{message.author.name}'s reply:", value=message.content, inline=False)
+        embed.add_field(name=f"{message.author.name}'s reply:", value=content, inline=False)
         embed.add_field(name="Reactions", value=reactions_field_value, inline=True)
         embed.add_field(name="Jump to Message", value=message.jump_url, inline=False)
         
@@ -448,10 +574,10 @@ async def create_embed(message: discord.Message, reaction_threshold: int, connec
         )
 
         # Original message
-        embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_message.content, inline=False)
+        embed.add_field(name=f"{reference_message.author.name}'s message:", value=reference_content, inline=False)
 
         # Reply message
-        embed.add_field(name=f"{message.author.name}'s reply:", value=message.content, inline=False)
+        embed.add_field(name=f"{message.author.name}'s reply:", value=content, inline=False)
         attachment = message.attachments[0]
         embed.add_field(name="Attachment", value=f"{attachment.url}", inline=False)
 
@@ -462,7 +588,7 @@ async def create_embed(message: discord.Message, reaction_threshold: int, connec
         return embed
     else:
         embed = discord.Embed(
-            description=message.content,
+            description=content,
             color=discord.Color.gold()
         )
 
@@ -507,12 +633,11 @@ def check_video_extension(message):
     return None
 
 
-async def create_database_context(bot, server, connection, custom_channel=None) -> server_class.Server:
+async def create_database_context(bot, server, custom_channel=None) -> server_class.Server:
     """
     Create a database context for the server
     :param bot: The Discord bot
     :param server: The server object
-    :param connection: MySQL connection
     :param custom_channel: Optional custom channel for the Hall of Fame channel
     :return: The database context
     """
@@ -529,9 +654,12 @@ async def create_database_context(bot, server, connection, custom_channel=None)
         7
     )
 
-    if server_config_repo.check_if_guild_exists(connection, server.id):
+    async with database.connection() as connection:
+        guild_exists = await server_config_repo.check_if_guild_exists(connection, server.id)
+        if guild_exists:
+            await server_config_repo.delete_server_config(connection, server.id)
+    if guild_exists:
         await logging(bot, f"Server {server.name} already exists in the SQL database, dropping it to recreate", server.id)
-        server_config_repo.delete_server_config(connection, server.id)
 
     hall_of_fame_channel = custom_channel or await server.create_text_channel("hall-of-fame")
 
@@ -545,11 +673,12 @@ async def create_database_context(bot, server, connection, custom_channel=None)
 
     leader_board_messages = []
 
-    server_config_repo.insert_server_with_parameters(connection, server.id, hall_of_fame_channel.id,
-                                                reaction_threshold_default, 1000, leader_board_messages,
-                                                1000, False, True, False, False,
-                                                [], datetime.datetime.now(timezone.utc), False, False,
-                                                server_member_count, calculation_method_type.MOST_REACTIONS_ON_EMOJI, True, False)
+    async with database.connection() as connection:
+        await server_config_repo.insert_server_with_parameters(connection, server.id, hall_of_fame_channel.id,
+                                                               reaction_threshold_default, 1000, leader_board_messages,
+                                                               1000, False, True, False, False,
+                                                               [], datetime.datetime.now(timezone.utc), False, False,
+                                                               server_member_count, calculation_method_type.MOST_REACTIONS_ON_EMOJI, True, False)
 
     await hall_of_fame_channel.send(
         f"🎉 **Welcome to the Hall of Fame!** 🎉\n"
@@ -587,17 +716,20 @@ async def create_database_context(bot, server, connection, custom_channel=None)
     return new_server_class
 
 
-def delete_database_context(server_id: int, connection):
+async def delete_database_context(server_id: int, connection):
     """
     Delete the database context for the server
     :param server_id: The ID of the server
     :param connection: MySQL connection
     :return: None
     """
-    hall_of_fame_message_repo.delete_hall_of_fame_messages_for_guild(connection, server_id)
-    server_user_repo.delete_server_users(connection, server_id)
-    server_config_repo.delete_server_config(connection, server_id)
-    hof_wrapped_repo.delete_hof_wrapped_for_guild(connection, server_id)
+    await hall_of_fame_message_repo.delete_hall_of_fame_messages_for_guild(connection, server_id)
+    await server_user_repo.delete_server_users(connection, server_id)
+    await server_user_daily_stat_repo.delete_daily_stats_for_guild(connection, server_id)
+    await leaderboard_slot_repo.delete_leaderboard_slots_for_guild(connection, server_id)
+    await message_reactor_repo.delete_reactor_sets_for_guild(connection, server_id)
+    await server_config_repo.delete_server_config(connection, server_id)
+    await hof_wrapped_repo.delete_hof_wrapped_for_guild(connection, server_id)
 
 
 async def send_server_owner_error_message(owner, e, bot):
@@ -627,7 +759,8 @@ async def send_server_owner_error_message(owner, e, bot):
 
 async def logging(bot: discord.Client, message, server_id=None, new_value=None, log_level=log_type.ERROR, validate_for_duplicates=False):
     """
-    Log an error message to the error channel
+    Write a log message to the local log sink, and queue critical and system messages for their Discord log channel.
+    Delivery happens in the background so callers never wait on Discord or the disk.
     :param bot:
     :param message:
     :param server_id: The ID of the server
@@ -636,14 +769,17 @@ async def logging(bot: discord.Client, message, server_id=None, new_value=None,
     :param validate_for_duplicates: Whether to check for duplicate logging messages
     :return:
     """
+    log_sink.write(log_level, message, server_id, new_value)
+
+    # Only critical and system messages are posted to Discord, everything is written to the local log sink
     log_channels = {
-        log_type.ERROR: 1344070396575617085 if bot.application_id == 1177041673352663070 else 1383834395726577765,
         log_type.SYSTEM: 1373699890718441482 if bot.application_id == 1177041673352663070 else 1383834858870145214,
-        log_type.COMMAND: 1436699144163954759 if bot.application_id == 1177041673352663070 else 1436699968571183106,
         log_type.CRITICAL: 1439692415454675045 if bot.application_id == 1177041673352663070 else 1439692461176787074
     }
+    channel_id = log_channels.get(log_level)
+    if not channel_id:
+        return
 
-    target_guild = bot.get_guild(1180006529575960616)
     date_formatted_message = f"{datetime.datetime.now()}: {message}"
 
     if new_value is not None:
@@ -651,18 +787,8 @@ async def logging(bot: discord.Client, message, server_id=None, new_value=None,
     if server_id:
         date_formatted_message += f"\n[Server ID: {server_id}]"
 
-    channel_id = log_channels.get(log_level)
-    if channel_id:
-        channel = target_guild.get_channel(channel_id)
-
-        if validate_for_duplicates:
-            existing_messages = [msg async for msg in channel.history(limit=10)]
-            for existing_message in existing_messages:
-                if existing_message.author.id == bot.user.id and message in existing_message.content:
-                    return  # Do not send duplicate error message
-
-        message_prefix = "<@230698327589650432> " if log_type == log_type.CRITICAL else ""
-        await channel.send(f"{message_prefix}```diff\n{date_formatted_message}\n```")
+    LogShipper().enqueue(bot, channel_id, date_formatted_message,
+                         dedupe_key=(log_level, str(message)) if validate_for_duplicates else None)
 
 
 # noinspection PyTypeChecker
@@ -754,65 +880,106 @@ async def create_custom_profile_picture_and_cover_form(interaction: discord.Inte
     await interaction.response.send_modal(CustomProfilePictureAndCoverModal())
 
 
-async def update_user_database(bot: discord.Client, connection):
+def monthly_window_start() -> datetime.date:
+    """
+    The first day of the rolling 30-day window of the monthly user stats
+    :return: The UTC date
+    """
+    return datetime.datetime.now(timezone.utc).date() - datetime.timedelta(days=30)
+
+
+async def apply_user_stat_deltas(connection, deltas):
+    """
+    Apply new Hall of Fame messages and reaction count changes to the stats of their authors, so the user stats
+    stay current between the daily rank refreshes
+    :param connection: The database connection
+    :param deltas: A list of tuples: (guild_id, author_id, day the Hall of Fame message was created, message_delta, reaction_delta)
+    :return: None
+    """
+    # Not committed here, the caller applies the deltas in the transaction of the change that produced them
+    if not deltas:
+        return
+    await server_user_daily_stat_repo.add_daily_stat_deltas(connection, deltas)
+
+    user_deltas = {}
+    for guild_id, author_id, _, message_delta, reaction_delta in deltas:
+        messages, reactions = user_deltas.get((author_id, guild_id), (0, 0))
+        user_deltas[(author_id, guild_id)] = (messages + message_delta, reactions + reaction_delta)
+    await server_user_repo.add_user_stat_deltas(connection, [(author_id, guild_id, messages, reactions)
+                                                             for (author_id, guild_id), (messages, reactions) in user_deltas.items()],
+                                                monthly_window_start())
+
+
+async def flush_reaction_counts():
+    """
+    Write the reaction counts buffered since the last flush in one batch and apply the changes to the user stats,
+    together with the embed hashes of the posts rendered since. Everything is written in one transaction, and a
+    batch that fails to be written is put back for the next flush, which derives its deltas again.
+    :return: None
+    """
+    buffer = ReactionCountBuffer()
+    embed_hashes = EmbedHashes()
+    batch = buffer.take()
+    unsaved_hashes = embed_hashes.take_unsaved()
+    if not batch and not unsaved_hashes:
+        return
+    try:
+        async with database.connection() as connection, connection.transaction():
+            changes = await hall_of_fame_message_repo.update_reaction_counts(connection, batch)
+            await apply_user_stat_deltas(connection, [(guild_id, author_id, day, 0, reaction_delta)
+                                                      for guild_id, author_id, day, reaction_delta in changes])
+            await hall_of_fame_message_repo.update_embed_hashes(connection, unsaved_hashes)
+    except BaseException:
+        # Also covers the flush loop being cancelled on shutdown
+        if batch:
+            buffer.restore(batch)
+        embed_hashes.restore_unsaved(unsaved_hashes)
+        raise
+    if batch:
+        buffer.mark_flushed(batch)
+
+
+async def flush_reactor_sets():
+    """
+    Write the reactor sets changed since the last flush in one batch. A batch that fails to be written is put back
+    for the next flush.
+    :return: None
     """
-    Update the user database with the latest information
+    reaction_store = ReactionStore()
+    batch = reaction_store.take_unsaved()
+    if not batch:
+        return
+    upserts = [(guild_id, message_id, emoji, list(user_ids))
+               for (message_id, emoji), (guild_id, user_ids) in batch.items() if user_ids]
+    deletes = [(message_id, emoji) for (message_id, emoji), (_, user_ids) in batch.items() if not user_ids]
+    try:
+        async with database.connection() as connection:
+            await message_reactor_repo.upsert_reactor_sets(connection, upserts)
+            await message_reactor_repo.delete_reactor_sets(connection, deletes)
+    except BaseException:
+        reaction_store.restore_unsaved(batch)
+        raise
+
+
+async def update_user_database(bot: discord.Client):
+    """
+    Roll the monthly user stats forward to the current window and refresh the ranks of every user. The totals are
+    maintained from deltas, so each guild is also reconciled against its Hall of Fame messages once a week, spread
+    over the days of the week by guild id.
     :param bot: The Discord bot
-    :param connection: MySQL connection
     :return: None
     """
     await logging(bot, f"Updating user database...")
-    for guild in bot.guilds:
-        if not server_config_repo.check_if_guild_exists(connection, guild.id):
-            continue
-
-        users_stats = {}
-        for message in hall_of_fame_message_repo.get_all_hall_of_fame_messages_for_guild(connection, guild.id):
-            try:
-                if not message.get('author_id') or not message.get('created_at'):
-                    continue
-                user_id = message['author_id']
-                if user_id not in users_stats:
-                    users_stats[user_id] = {
-                        "total_hall_of_fame_messages": 0,
-                        "this_month_hall_of_fame_messages": 0,
-                        "total_hall_of_fame_message_reactions": 0,
-                        "this_month_hall_of_fame_message_reactions": 0
-                    }
-                users_stats[user_id]["total_hall_of_fame_messages"] += 1
-                users_stats[user_id]["total_hall_of_fame_message_reactions"] += message.get('reaction_count', 0)
-                if message['created_at'].replace(tzinfo=timezone.utc) >= (datetime.datetime.now(timezone.utc) - datetime.timedelta(days=30)):
-                    users_stats[user_id]["this_month_hall_of_fame_messages"] += 1
-                    users_stats[user_id]["this_month_hall_of_fame_message_reactions"] += message.get('reaction_count', 0)
-            except KeyError as e:
-                await logging(bot, f"KeyError in message {message['message_id']} in guild {guild.id}: {e}", guild.id)
-
-        # create a rank for each user based on total and monthly for each field
-        for user in users_stats:
-            users_stats[user]["total_message_rank"] = 0
-            users_stats[user]["monthly_message_rank"] = 0
-            users_stats[user]["total_reaction_rank"] = 0
-            users_stats[user]["monthly_reaction_rank"] = 0
-
-        sorted_total_messages = sorted(users_stats.items(), key=lambda x: x[1]["total_hall_of_fame_messages"], reverse=True)
-        sorted_monthly_messages = sorted(users_stats.items(), key=lambda x: x[1]["this_month_hall_of_fame_messages"], reverse=True)
-        sorted_total_reactions = sorted(users_stats.items(), key=lambda x: x[1]["total_hall_of_fame_message_reactions"], reverse=True)
-        sorted_monthly_reactions = sorted(users_stats.items(), key=lambda x: x[1]["this_month_hall_of_fame_message_reactions"], reverse=True)
-
-        for rank, (user_id, stats) in enumerate(sorted_total_messages, start=1):
-            users_stats[user_id]["total_message_rank"] = rank
-        for rank, (user_id, stats) in enumerate(sorted_monthly_messages, start=1):
-            users_stats[user_id]["monthly_message_rank"] = rank
-        for rank, (user_id, stats) in enumerate(sorted_total_reactions, start=1):
-            users_stats[user_id]["total_reaction_rank"] += rank
-        for rank, (user_id, stats) in enumerate(sorted_monthly_reactions, start=1):
-            users_stats[user_id]["monthly_reaction_rank"] += rank
-
-        for user_id, stats in users_stats.items():
-            try:
-                server_user_repo.update_user_stats(connection, stats, user_id, guild.id)
-            except Exception as e:
-                await logging(bot, f"Failed to update user {user_id} in database: {e}", guild.id)
+    weekday = datetime.datetime.now(timezone.utc).weekday()
+    reconciled_guild_ids = [guild.id for guild in bot.guilds if guild.id % 7 == weekday]
+    try:
+        async with database.connection() as connection:
+            if reconciled_guild_ids:
+                async with connection.transaction():
+                    await server_user_repo.reconcile_user_stats(connection, reconciled_guild_ids)
+            await server_user_repo.refresh_user_ranks(connection, [guild.id for guild in bot.guilds], monthly_window_start())
+    except Exception as e:
+        await logging(bot, f"Failed to update users in database: {e}")
     await logging(bot, f"Finished updating user database...")
 
 